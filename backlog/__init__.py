@@ -1,8 +1,18 @@
 """Steam Backlog Tracker - Track and manage your Steam game library"""
+
 import os
 
 CACHE_DIR = "cache"
 CACHE_FILE = os.path.join(CACHE_DIR, "games.json")
+LIBRARY_FILE = os.path.join(CACHE_DIR, "games.bin")
+CHANGE_LOG_FILE = os.path.join(CACHE_DIR, "games.log")
 TAGS_FILE = os.path.join(CACHE_DIR, "tags.json")
 STATUS_FILE = os.path.join(CACHE_DIR, "status.json")
 MANUAL_GAMES_FILE = os.path.join(CACHE_DIR, "manual_games.json")
+DATABASE_FILE = os.path.join(CACHE_DIR, "backlog.db")
+HTTP_CACHE_FILE = os.path.join(CACHE_DIR, "http_cache.json")
+APPDETAILS_FILE = os.path.join(CACHE_DIR, "appdetails.json")
+SEARCH_INDEX_FILE = os.path.join(CACHE_DIR, "search.idx")
+STATS_FILE = os.path.join(CACHE_DIR, "stats.json")
+SORT_INDEX_FILE = os.path.join(CACHE_DIR, "order.idx")
+SOCKET_FILE = os.path.join(CACHE_DIR, "backlog.sock")
@@ -1,90 +1,342 @@
 """Steam API functions"""
 
 import json
+import random
 import sys
-import requests
-from rich.console import Console
+import threading
+import time
 
+from backlog.cache import load_app_names, save_app_names
+from backlog.console import Console
+from backlog.game import Game
+from backlog.timing import count, timed
 
-def validate_credentials(api_key, steam_id):
-    """Test credentials with a request to API"""
-    url = (
-        f"http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-        f"?key={api_key}&steamid={steam_id}&format=json"
-    )
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        return "response" in data
-    except Exception:
-        return False
+API_URL = "http://api.steampowered.com"
+STORE_URL = "https://store.steampowered.com"
 
+# status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-def fetch_games(api_key, steam_id):
-    """Fetch the user's game library from Steam API"""
-    url = (
-        f"http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-        f"?key={api_key}&steamid={steam_id}&format=json&include_appinfo=1"
-    )
 
-    console = Console()
+class SteamAPIError(Exception):
+    """A Steam API request failed, after retries where they apply"""
 
-    # check if API key is valid
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+    def __init__(self, message, hint=None, status_code=None):
+        super().__init__(message)
+        self.hint = hint
+        self.status_code = status_code
 
-        if "response" not in data or "games" not in data["response"]:
-            console.print(
-                "Error: Unexpected response format from Steam API", style="red"
-            )
-            sys.exit(0)
 
-        return data["response"]["games"]
+class RateLimiter:
+    """Thread-safe token bucket allowing rate requests per second"""
 
-    # checks if there is a network error
-    except requests.exceptions.Timeout:
-        console.print("Error: Steam API request timed out", style="red")
-        console.print("Check your internet connection and try again", style="yellow")
-        sys.exit(1)
-    except requests.exceptions.ConnectionError:
-        console.print("Error: Could not connect to Steam API", style="red")
-        console.print("Check your internet connection and try again", style="yellow")
-    except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code if e.response else 500
-        if status_code == 401:
-            console.print("Error: Invalid Steam API key", style="red")
-        elif status_code == 403:
-            console.print(
-                "Error: Steam API request forbidden. Check your Steam profile privacy settings",
-                style="red",
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class SteamClient:
+    """Steam Web API client sharing one pooled keep-alive session
+
+    Requests that fail with a timeout, connection error, 429 or 5xx are
+    retried with exponential backoff and jitter. Conditional requests reuse
+    ETag/Last-Modified validators and report 304 responses as unchanged.
+    requests itself is only imported by the first request, so commands
+    that never reach Steam don't pay for loading it.
+    """
+
+    def __init__(
+        self,
+        timeout=10,
+        retries=3,
+        backoff=0.5,
+        max_backoff=8,
+        pool_size=10,
+        api_url=API_URL,
+        store_url=STORE_URL,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.api_url = api_url.rstrip("/")
+        self.store_url = store_url.rstrip("/")
+        self.validators = {}
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled keep-alive session, created on first use"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size, pool_maxsize=self.pool_size
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+        return self._session
+
+    def _delay(self, attempt, response=None):
+        """Seconds to wait before retry number attempt"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(int(retry_after), self.max_backoff)
+
+        # full jitter keeps concurrent clients from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    @timed("http")
+    def request(self, url, params=None, validator_key=None):
+        """GET url and return its decoded JSON body
+
+        With validator_key, the request is conditional on the validators
+        stored under that key, and None is returned if the server answers
+        304 Not Modified.
+        """
+        headers = {}
+        validators = self.validators.get(validator_key) if validator_key else None
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        session = self.session
+        from requests import exceptions
+
+        attempt = 0
+        while True:
+            try:
+                response = session.get(
+                    url, params=params, headers=headers, timeout=self.timeout
+                )
+            except exceptions.Timeout:
+                error = SteamAPIError(
+                    "Steam API request timed out",
+                    "Check your internet connection and try again",
+                )
+                response = None
+            except exceptions.ConnectionError:
+                error = SteamAPIError(
+                    "Could not connect to Steam API",
+                    "Check your internet connection and try again",
+                )
+                response = None
+            except exceptions.RequestException as e:
+                # e.g. a response cut off mid-body; worth another try too
+                error = SteamAPIError(f"Steam API request failed: {e}")
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                error = SteamAPIError(
+                    f"Steam API request failed with status code {response.status_code}",
+                    status_code=response.status_code,
+                )
+
+            if attempt >= self.retries:
+                raise error
+            count("http: retries")
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+        if response.status_code == 304:
+            count("http: not modified")
+            return None
+
+        if response.status_code == 401:
+            raise SteamAPIError("Invalid Steam API key", status_code=401)
+        if response.status_code == 403:
+            raise SteamAPIError(
+                "Steam API request forbidden. Check your Steam profile privacy settings",
+                status_code=403,
             )
-        else:
-            console.print(
-                f"Error: Steam API request failed with status code {status_code}",
-                style="red",
+        if response.status_code >= 400:
+            raise SteamAPIError(
+                f"Steam API request failed with status code {response.status_code}",
+                status_code=response.status_code,
             )
 
-        sys.exit(1)
-    except json.JSONDecodeError:
-        console.print("Error: Invalid response from Steam API", style="red")
-        sys.exit(1)
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            raise SteamAPIError("Invalid response from Steam API")
 
+        if validator_key:
+            self.validators[validator_key] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
 
-def lookup_steam_game(appid):
-    """Lookup game name from Steam Store API by App ID"""
-    url = f"https://store.steampowered.com/api/appdetails?appids={appid}"
+        return data
 
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+    def get_owned_games(
+        self, api_key, steam_id, include_appinfo=True, conditional=False
+    ):
+        """Return the owned games of a Steam account
+
+        With conditional, returns None if the library is unchanged since the
+        last request made with this client's validators.
+        """
+        params = {"key": api_key, "steamid": steam_id, "format": "json"}
+        if include_appinfo:
+            params["include_appinfo"] = 1
+
+        # validators are always recorded so the next fetch can be conditional
+        validator_key = f"owned_games:{steam_id}"
+        if not conditional:
+            self.validators.pop(validator_key, None)
+
+        data = self.request(
+            f"{self.api_url}/IPlayerService/GetOwnedGames/v0001/",
+            params,
+            validator_key=validator_key,
+        )
+        if data is None:
+            return None
+
+        if "response" not in data or "games" not in data["response"]:
+            raise SteamAPIError("Unexpected response format from Steam API")
+
+        return [Game.from_dict(game) for game in data["response"]["games"]]
 
-        app_data = data.get(str(appid))
+    def get_app_name(self, appid):
+        """Return a game's name from the Steam Store, or None if unknown"""
+        data = self.request(f"{self.store_url}/api/appdetails", {"appids": appid})
+
+        app_data = data.get(str(appid)) if data else None
         if app_data and app_data.get("success"):
             return app_data.get("data", {}).get("name")
         return None
-    except Exception:
-        return None
+
+    def get_app_names(self, appids, workers=8, rate=None):
+        """Look up many App IDs concurrently
+
+        Runs at most workers requests at once and, with rate, no more than
+        rate requests per second. Returns a dict of appid to name (None if
+        not found) and a dict of appid to the SteamAPIError that stopped
+        its lookup.
+        """
+        limiter = RateLimiter(rate, burst=workers) if rate else None
+        names = {}
+        errors = {}
+
+        def lookup(appid):
+            if limiter:
+                limiter.acquire()
+            try:
+                names[appid] = self.get_app_name(appid)
+            except SteamAPIError as e:
+                errors[appid] = e
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lookup, appids))
+
+        return names, errors
+
+
+_client = None
+
+
+def get_client(**options):
+    """Return the shared client, creating it with options on first use"""
+    global _client
+
+    if _client is None:
+        _client = SteamClient(**options)
+    return _client
+
+
+def configure_client(**options):
+    """Replace the shared client, e.g. with timeouts from config.json"""
+    global _client
+
+    _client = SteamClient(**options)
+    return _client
+
+
+def validate_credentials(api_key, steam_id):
+    """Test credentials with a request to API"""
+    from requests import RequestException
+
+    client = get_client()
+    try:
+        data = client.request(
+            f"{client.api_url}/IPlayerService/GetOwnedGames/v0001/",
+            {"key": api_key, "steamid": steam_id, "format": "json"},
+        )
+        return data is not None and "response" in data
+    # any failure, down to DNS errors or a malformed body, means the
+    # credentials couldn't be confirmed
+    except (SteamAPIError, RequestException, ValueError):
+        return False
+
+
+def fetch_games(api_key, steam_id, conditional=False):
+    """Fetch the user's game library from Steam API
+
+    Returns None for a conditional fetch when the library is unchanged.
+    """
+    try:
+        return get_client().get_owned_games(api_key, steam_id, conditional=conditional)
+    except SteamAPIError as e:
+        console = Console()
+        console.print(f"Error: {e}", style="red")
+        if e.hint:
+            console.print(e.hint, style="yellow")
+        sys.exit(1)
+
+
+def resolve_app_names(appids, workers=8, rate=None):
+    """Resolve App IDs to names, using the on-disk appdetails cache first
+
+    Only App IDs missing from the cache (or expired) are looked up, and the
+    answers are written back in one save. Returns a dict of appid to name,
+    None for App IDs that Steam doesn't know or that failed to resolve.
+    """
+    appids = [str(appid) for appid in appids]
+    names = load_app_names(appids)
+    missing = list(dict.fromkeys(a for a in appids if a not in names))
+
+    if missing:
+        found, errors = get_client().get_app_names(missing, workers, rate)
+        save_app_names(found)
+        names.update(found)
+        names.update(dict.fromkeys(errors))
+
+    return names
+
+
+def lookup_steam_game(appid):
+    """Lookup game name from Steam Store API by App ID"""
+    return resolve_app_names([appid], workers=1).get(str(appid))
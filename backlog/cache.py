@@ -2,42 +2,423 @@
 
 import json
 import os
+import re
 import sys
+import time
 
+from contextlib import contextmanager
 from datetime import datetime
-from rich.console import Console
+from typing import NotRequired, TypedDict
 
-from . import CACHE_DIR, CACHE_FILE, TAGS_FILE, STATUS_FILE, MANUAL_GAMES_FILE
+import backlog
+from . import (
+    CACHE_DIR,
+    CACHE_FILE,
+    LIBRARY_FILE,
+    CHANGE_LOG_FILE,
+    TAGS_FILE,
+    STATUS_FILE,
+    MANUAL_GAMES_FILE,
+    DATABASE_FILE,
+    HTTP_CACHE_FILE,
+    APPDETAILS_FILE,
+    SEARCH_INDEX_FILE,
+    STATS_FILE,
+    SORT_INDEX_FILE,
+)
+from . import changelog, order, search, sqlite_store, storage
+from .tags import TagIndex
+from .columnar import ColumnarLibrary, open_library, write_library
+from .console import Console
+from .game import Game, to_json
+from .timing import timed
+
+# "binary" keeps the library in games.bin, "json" in games.json and
+# "sqlite" keeps everything, including tags and status, in backlog.db
+BACKENDS = ("binary", "json", "sqlite")
+_backend = "binary"
+_database_conn = None
+
+# what the loaders read, by path, while keep_loaded() is on:
+# path(s) -> (file signatures, loaded value)
+_loaded = None
+
+# edits apply_batch understands
+BATCH_ACTIONS = ("tag", "untag", "status", "clearstatus")
+
+# fold the change log into the base cache once it holds more entries than
+# this fraction of the library (and at least COMPACT_MIN_ENTRIES)
+COMPACT_RATIO = 0.1
+COMPACT_MIN_ENTRIES = 100
+
+# how long Store lookups stay cached; unknown App IDs are retried sooner
+APPDETAILS_TTL = 30 * 24 * 60 * 60
+APPDETAILS_MISS_TTL = 24 * 60 * 60
+
+
+# per-profile files; the appdetails and HTTP validator caches are shared
+PROFILE_PATHS = (
+    "CACHE_FILE",
+    "LIBRARY_FILE",
+    "CHANGE_LOG_FILE",
+    "TAGS_FILE",
+    "STATUS_FILE",
+    "MANUAL_GAMES_FILE",
+    "DATABASE_FILE",
+    "SEARCH_INDEX_FILE",
+    "STATS_FILE",
+    "SORT_INDEX_FILE",
+)
+
+
+def use_profile(name):
+    """Point every per-account cache file at a profile's own directory
+
+    Profiles live in cache/profiles/<name>/; None selects the top-level
+    cache directory used by single-account setups.
+    """
+    global CACHE_DIR
+
+    # "." and ".." would point outside cache/profiles/
+    if name is not None and (not re.fullmatch(r"[\w.-]+", name) or name in (".", "..")):
+        console = Console()
+        console.print(f"Error: invalid profile name '{name}'", style="red")
+        sys.exit(1)
+
+    directory = backlog.CACHE_DIR
+    if name is not None:
+        directory = os.path.join(directory, "profiles", name)
+
+    paths = globals()
+    for attr in PROFILE_PATHS:
+        default = getattr(backlog, attr)
+        paths[attr] = os.path.join(directory, os.path.basename(default))
+
+    CACHE_DIR = directory
+    close_database()
+
+
+def get_profiles(config):
+    """Return the configured accounts as a dict of profile name to Steam ID
+
+    The top-level STEAM_ID is the "default" profile and keeps using the
+    top-level cache directory; PROFILES maps extra names to Steam IDs.
+    """
+    profiles = {}
+    if config.get("STEAM_ID"):
+        profiles["default"] = config["STEAM_ID"]
+    profiles.update(config.get("PROFILES", {}))
+    return profiles
+
+
+def profile_directory(name):
+    """Map a profile name to the use_profile argument for its cache"""
+    return None if name == "default" else name
+
+
+def set_backend(name):
+    """Select the storage backend used by save_cache and load_cache"""
+    global _backend
+
+    if name not in BACKENDS:
+        console = Console()
+        console.print(
+            f"Error: unknown cache backend '{name}' (expected one of: "
+            f"{', '.join(BACKENDS)})",
+            style="red",
+        )
+        sys.exit(1)
+
+    _backend = name
+
+
+def _database():
+    """Open backlog.db, importing the JSON/binary files on first use"""
+    global _database_conn
+
+    if _database_conn is None:
+        # the sqlite backend is the only user of sqlite3
+        import sqlite3
+
+        try:
+            # locked, so only the first of several processes imports
+            with locked():
+                conn, fresh = sqlite_store.connect(DATABASE_FILE)
+                if fresh:
+                    _import_files(conn)
+        except sqlite3.Error as e:
+            console = Console()
+            console.print(f"Error opening database: {e}", style="red")
+            sys.exit(1)
+        _database_conn = conn
+
+    return _database_conn
+
+
+def close_database():
+    """Close backlog.db, so the next SQLite access opens it afresh
+
+    For when the working or cache directory changes, e.g. another profile
+    or another scratch directory in the benchmarks.
+    """
+    global _database_conn
+
+    if _database_conn is not None:
+        _database_conn.close()
+        _database_conn = None
+
+
+def _import_files(conn):
+    """Copy the file-based cache, tags, status and manual games into conn"""
+    if os.path.exists(LIBRARY_FILE):
+        cache_data = _load_binary_cache()
+    else:
+        cache_data = _load_json_cache()
+
+    if cache_data is not None:
+        cache_data = _apply_change_log(cache_data)
+        sqlite_store.save_games(conn, cache_data["games"], cache_data["last_updated"])
+
+    sqlite_store.save_manual_games(conn, _read_json(MANUAL_GAMES_FILE, []))
+    sqlite_store.save_tags(conn, _read_json(TAGS_FILE, {}))
+    sqlite_store.save_status(conn, _read_json(STATUS_FILE, {}))
+
+
+def keep_loaded():
+    """Hold loaded cache files in memory, re-reading only files that change
+
+    For the --serve daemon: its workers are forked from it, so each gets
+    its own copy of what was loaded and may change it freely. Changes are
+    noticed by inode, size and modification time, and every cache write
+    replaces its file, so a write is never missed.
+    """
+    global _loaded
+    _loaded = {}
+
+
+def _signature(path):
+    """Identify a file's current version, None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _remember(paths, load):
+    """Call load, or under keep_loaded() reuse its result while paths are unchanged"""
+    if _loaded is None:
+        return load()
+
+    signature = tuple(_signature(path) for path in paths)
+    held = _loaded.get(paths)
+    if held is not None and held[0] == signature:
+        return held[1]
+
+    value = load()
+    _loaded[paths] = (signature, value)
+    return value
+
+
+def _read_json(path, default):
+    """Read a JSON file, falling back to default if it's missing or invalid"""
+    return _remember((path,), lambda: _read_json_file(path, default))
+
+
+@timed("load: json")
+def _read_json_file(path, default):
+    """Read a JSON file from disk, as _read_json does without keep_loaded()"""
+    if not os.path.exists(path):
+        return default
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return default
 
 
 def ensure_cache():
     """Create cache directory if it doesn't exist"""
     try:
         if not os.path.exists(CACHE_DIR):
-            os.mkdir(CACHE_DIR)
+            os.makedirs(CACHE_DIR)
     except OSError as e:
         console = Console()
         console.print(f"Error creating cache directory: {e}", style="red")
         sys.exit(1)
 
 
+@timed("save")
 def save_cache(games):
-    """Save the user's game library to a cache file with timestamp"""
-    ensure_cache()
+    """Save the user's game library to the cache with timestamp"""
+    with locked():
+        invalidate_stats_snapshot()
+        invalidate_sort_index()
+
+        last_updated = datetime.now().isoformat()
+
+        if _backend == "sqlite":
+            sqlite_store.save_games(_database(), games, last_updated)
+            return
+
+        try:
+            if _backend == "binary":
+                write_library(LIBRARY_FILE, games, last_updated)
+            else:
+                _save_json_cache(games, last_updated)
+            changelog.clear_log(CHANGE_LOG_FILE)
+        except OSError as e:
+            console = Console()
+            console.print(f"Error saving cache file: {e}", style="red")
+            sys.exit(1)
 
-    cache_data = {"last_updated": datetime.now().isoformat(), "games": games}
 
+class SyncSummary(TypedDict):
+    """What sync_cache did: game counts, and the changes of a delta sync"""
+
+    added: int
+    changed: int
+    removed: int
+    unchanged: int
+    upserts: NotRequired[list[Game]]
+    previous: NotRequired[list[Game]]
+    compacted: NotRequired[bool]
+
+
+@timed("save")
+def sync_cache(games) -> SyncSummary:
+    """Store a freshly fetched library, writing only what changed
+
+    File backends append the delta to the change log and compact it into
+    the base cache once it grows; SQLite upserts the changed rows.
+    Returns a summary with the number of added, changed, removed and
+    unchanged games. Unless the library was saved for the first time, it
+    also holds the changes: "upserts", the new or changed games, and
+    "previous", the cached versions of the changed and removed ones.
+    """
+    with locked():
+        cache_data = load_cache()
+        if cache_data is None:
+            save_cache(games)
+            return {"added": len(games), "changed": 0, "removed": 0, "unchanged": 0}
+
+        invalidate_stats_snapshot()
+        invalidate_sort_index()
+
+        old_appids = set(_appids(cache_data["games"]))
+        upserts, removed = changelog.diff_games(cache_data["games"], games)
+        added = sum(1 for game in upserts if game["appid"] not in old_appids)
+        summary: SyncSummary = {
+            "added": added,
+            "changed": len(upserts) - added,
+            "removed": len(removed),
+            "unchanged": len(games) - len(upserts),
+            "upserts": upserts,
+            "previous": _games_by_appid(
+                cache_data["games"], {g["appid"] for g in upserts} | set(removed)
+            ),
+        }
+
+        ensure_cache()
+        last_updated = datetime.now().isoformat()
+
+        if _backend == "sqlite":
+            sqlite_store.apply_changes(_database(), upserts, removed, last_updated)
+            return summary
+
+        try:
+            changelog.append_log(CHANGE_LOG_FILE, upserts, removed, last_updated)
+        except OSError as e:
+            console = Console()
+            console.print(f"Error saving cache file: {e}", style="red")
+            sys.exit(1)
+
+        entries = len(changelog.read_log(CHANGE_LOG_FILE))
+        if entries > max(COMPACT_MIN_ENTRIES, len(games) * COMPACT_RATIO):
+            save_cache(games)
+            summary["compacted"] = True
+
+        return summary
+
+
+def _appids(games):
+    """Iterate the appids of a library without building game dicts"""
+    if isinstance(games, ColumnarLibrary):
+        return games.column("appid")
+    return (game["appid"] for game in games)
+
+
+def _games_by_appid(games, appids):
+    """Return the games whose appid is in appids, in library order"""
+    if not appids:
+        return []
+    if isinstance(games, ColumnarLibrary):
+        column = games.column("appid")
+        return [games.row(i) for i, appid in enumerate(column) if appid in appids]
+    return [game for game in games if game["appid"] in appids]
+
+
+def _save_json_cache(games, last_updated):
+    """Write the library as indented JSON to games.json"""
+    cache_data = {"last_updated": last_updated, "games": list(games)}
+
+    storage.write_json(CACHE_FILE, cache_data, default=to_json)
+
+
+@timed("load")
+def load_cache():
+    """Load the user's game library from the cache if it exists"""
+    if _backend == "sqlite":
+        return sqlite_store.load_games(_database())
+
+    return _remember((LIBRARY_FILE, CACHE_FILE, CHANGE_LOG_FILE), _load_file_cache)
+
+
+def _load_file_cache():
+    """Load the library of the binary or JSON backend, with logged changes"""
+    if _backend == "binary":
+        cache_data = _load_binary_cache()
+    else:
+        if _newer(LIBRARY_FILE, CACHE_FILE):
+            _export_binary_cache()
+        cache_data = _load_json_cache()
+
+    if cache_data is None:
+        return None
+
+    cache_data = _apply_change_log(cache_data)
+    if not isinstance(cache_data["games"], ColumnarLibrary):
+        cache_data["games"] = [Game.from_dict(game) for game in cache_data["games"]]
+    return cache_data
+
+
+def _apply_change_log(cache_data):
+    """Replay changes logged by incremental syncs on top of the base cache"""
     try:
-        with open(CACHE_FILE, "w") as f:
-            json.dump(cache_data, f, indent=2)
+        entries = changelog.read_log(CHANGE_LOG_FILE)
     except OSError as e:
         console = Console()
-        console.print(f"Error saving cache file: {e}", style="red")
-        sys.exit(1)
+        console.print(f"Error reading change log: {e}", style="red")
+        return cache_data
 
+    if not entries:
+        return cache_data
 
-def load_cache():
-    """Load the user's game library from a cache file if it exists"""
+    return changelog.replay(cache_data, entries)
+
+
+def load_last_updated():
+    """Return when the library was last synced, or None if it never was"""
+    if _backend == "sqlite":
+        return sqlite_store.load_last_updated(_database())
+
+    cache_data = load_cache()
+    return cache_data["last_updated"] if cache_data else None
+
+
+def _load_json_cache():
+    """Load the library from games.json"""
     if not os.path.exists(CACHE_FILE):
         return None
 
@@ -58,71 +439,478 @@ def load_cache():
     return cache_data
 
 
+def _load_binary_cache():
+    """Memory-map games.bin, importing games.json first if it is newer"""
+    if _newer(CACHE_FILE, LIBRARY_FILE):
+        _migrate_json_cache()
+
+    if not os.path.exists(LIBRARY_FILE):
+        return None
+
+    try:
+        library = open_library(LIBRARY_FILE)
+    except ValueError:
+        console = Console()
+        console.print(
+            "Warning: Cache file is corrupted. Run --sync to rebuild", style="yellow"
+        )
+        return None
+    except OSError as e:
+        console = Console()
+        console.print(f"Error reading cache file: {e}", style="red")
+        return None
+
+    return {"last_updated": library.last_updated, "games": library}
+
+
+def _newer(path, other):
+    """Whether path exists and other doesn't, or was modified before it"""
+    return os.path.exists(path) and (
+        not os.path.exists(other) or os.path.getmtime(path) > os.path.getmtime(other)
+    )
+
+
+def _migrate_json_cache():
+    """Convert games.json into games.bin, leaving games.json in place"""
+    cache_data = _load_json_cache()
+    if cache_data is None:
+        return
+
+    invalidate_stats_snapshot()
+    invalidate_sort_index()
+    try:
+        write_library(LIBRARY_FILE, cache_data["games"], cache_data["last_updated"])
+    except OSError as e:
+        console = Console()
+        console.print(f"Error converting cache file: {e}", style="red")
+
+
+def _export_binary_cache():
+    """Convert games.bin into games.json, for going back to the json backend
+
+    Like the import, only the base cache is converted; the change log is
+    shared by both files and replayed on top either way. games.json then
+    holds the same library, so the stats and sort orders stay valid.
+    """
+    try:
+        library = open_library(LIBRARY_FILE)
+    except (ValueError, OSError):
+        return
+
+    try:
+        _save_json_cache(library, library.last_updated)
+    except OSError as e:
+        console = Console()
+        console.print(f"Error converting cache file: {e}", style="red")
+
+
 def load_tags():
     """Load tags from file"""
-    if not os.path.exists(TAGS_FILE):
-        return {}
+    if _backend == "sqlite":
+        return sqlite_store.load_tags(_database())
 
-    try:
-        with open(TAGS_FILE) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
+    return _read_json(TAGS_FILE, {})
 
 
 def save_tags(tags):
     """Save tags to file"""
+    if _backend == "sqlite":
+        sqlite_store.save_tags(_database(), tags)
+        return
+
     ensure_cache()
 
     try:
-        with open(TAGS_FILE, "w") as f:
-            json.dump(tags, f, indent=2)
+        storage.write_json(TAGS_FILE, tags)
     except OSError as e:
         console = Console()
         console.print(f"Error saving tags: {e}", style="red")
 
 
+@contextmanager
+def locked():
+    """Hold the cache lock for a read-modify-write sequence
+
+    Other processes block on the lock until the block exits, so changes
+    made in between aren't lost. It can be taken again while held.
+    """
+    ensure_cache()
+    with storage.locked(CACHE_DIR):
+        yield
+
+
+def update_tags(change):
+    """Apply change to the tags as a TagIndex, under the cache lock
+
+    The tags are saved unless change returns False, and its return value
+    is passed back.
+    """
+    with locked():
+        index = load_tag_index()
+        result = change(index)
+        if result is not False:
+            save_tag_index(index)
+    return result
+
+
+def update_status(change):
+    """Apply change to the manual status overrides, under the cache lock
+
+    The overrides are saved unless change returns False, and its return
+    value is passed back.
+    """
+    with locked():
+        status = load_status()
+        result = change(status)
+        if result is not False:
+            save_status(status)
+    return result
+
+
+def update_manual_games(change):
+    """Apply change to the manual games list, under the cache lock
+
+    The list is saved unless change returns False, and its return value
+    is passed back.
+    """
+    with locked():
+        games = load_manual_games()
+        result = change(games)
+        if result is not False:
+            save_manual_games(games)
+    return result
+
+
+def load_tag_index():
+    """Load tags as a TagIndex, to look games up by tag or update in bulk"""
+    return TagIndex(load_tags())
+
+
+def save_tag_index(index):
+    """Save the tags held by a TagIndex"""
+    save_tags(index.to_dict())
+
+
+def add_tag(appid, tag):
+    """Add a tag to one game, returning False if it was already there"""
+    appid = str(appid)
+
+    if _backend == "sqlite":
+        return sqlite_store.add_tag(_database(), appid, tag)
+
+    return update_tags(lambda index: index.add(appid, tag))
+
+
+def remove_tag(appid, tag):
+    """Remove a tag from one game, returning False if it wasn't there"""
+    appid = str(appid)
+
+    if _backend == "sqlite":
+        return sqlite_store.remove_tag(_database(), appid, tag)
+
+    return update_tags(lambda index: index.remove(appid, tag))
+
+
 def load_status():
     """Load manual status overrides from file"""
-    if not os.path.exists(STATUS_FILE):
-        return {}
-    try:
-        with open(STATUS_FILE) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
+    if _backend == "sqlite":
+        return sqlite_store.load_status(_database())
+
+    return _read_json(STATUS_FILE, {})
 
 
 def save_status(status):
     """Save manual status overrides to file"""
+    invalidate_stats_snapshot()
+    if _backend == "sqlite":
+        sqlite_store.save_status(_database(), status)
+        return
+
     ensure_cache()
 
     try:
-        with open(STATUS_FILE, "w") as f:
-            json.dump(status, f, indent=2)
+        storage.write_json(STATUS_FILE, status)
     except OSError as e:
         console = Console()
         console.print(f"Error saving status: {e}", style="red")
 
 
+def set_status(appid, new_status):
+    """Set the manual status override of one game"""
+    appid = str(appid)
+    invalidate_stats_snapshot()
+
+    if _backend == "sqlite":
+        sqlite_store.set_status(_database(), appid, new_status)
+        return
+
+    def change(status):
+        status[appid] = new_status
+
+    update_status(change)
+
+
+def clear_status(appid):
+    """Clear the manual status override of one game, False if it had none"""
+    appid = str(appid)
+
+    if _backend == "sqlite":
+        cleared = sqlite_store.clear_status(_database(), appid)
+        if cleared:
+            invalidate_stats_snapshot()
+        return cleared
+
+    return update_status(lambda status: status.pop(appid, None) is not None)
+
+
+def apply_batch(operations):
+    """Apply many tag and status edits with one write per file
+
+    operations is a list of (action, appid, value) tuples, action one of
+    BATCH_ACTIONS and value the tag or status (None for "clearstatus").
+    Tags and statuses are each loaded and saved at most once, under the
+    cache lock; with SQLite the batch is a single transaction. Returns,
+    for each operation, whether it changed anything.
+    """
+    operations = [(action, str(appid), value) for action, appid, value in operations]
+    for action, _, _ in operations:
+        if action not in BATCH_ACTIONS:
+            raise ValueError(f"unknown batch action '{action}'")
+
+    if _backend == "sqlite":
+        changed = sqlite_store.apply_batch(_database(), operations)
+        if any(c for op, c in zip(operations, changed) if "status" in op[0]):
+            invalidate_stats_snapshot()
+        return changed
+
+    with locked():
+        tags = load_tag_index()
+        status = load_status()
+        changed = []
+
+        for action, appid, value in operations:
+            if action == "tag":
+                changed.append(tags.add(appid, value))
+            elif action == "untag":
+                changed.append(tags.remove(appid, value))
+            elif action == "status":
+                changed.append(status.get(appid) != value)
+                status[appid] = value
+            else:
+                changed.append(status.pop(appid, None) is not None)
+
+        edited = {action for (action, _, _), c in zip(operations, changed) if c}
+        if edited & {"tag", "untag"}:
+            save_tag_index(tags)
+        if edited & {"status", "clearstatus"}:
+            save_status(status)
+
+    return changed
+
+
 def load_manual_games():
     """Load manually added games from file"""
-    if not os.path.exists(MANUAL_GAMES_FILE):
-        return []
+    if _backend == "sqlite":
+        return sqlite_store.load_manual_games(_database())
 
-    try:
-        with open(MANUAL_GAMES_FILE) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return []
+    return _read_json(MANUAL_GAMES_FILE, [])
 
 
 def save_manual_games(games):
     """Save manually added games to file"""
+    invalidate_stats_snapshot()
+    invalidate_sort_index()
+    if _backend == "sqlite":
+        sqlite_store.save_manual_games(_database(), games)
+        return
+
     ensure_cache()
     try:
-        with open(MANUAL_GAMES_FILE, "w") as f:
-            json.dump(games, f, indent=2)
+        storage.write_json(MANUAL_GAMES_FILE, games)
     except OSError as e:
         console = Console()
         console.print(f"Error saving manually added games: {e}", style="red")
+
+
+def supports_queries():
+    """Whether the active backend can filter the library with query_games"""
+    return _backend == "sqlite"
+
+
+@timed("query (sql)")
+def query_games(cutoff, **filters):
+    """Filter, sort and limit the merged library inside the database
+
+    See sqlite_store.query_games for the supported filters.
+    """
+    return sqlite_store.query_games(_database(), cutoff, **filters)
+
+
+@timed("query (sql)")
+def count_games(cutoff, **filters):
+    """Count the games query_games would return without a limit"""
+    return sqlite_store.count_games(_database(), cutoff, **filters)
+
+
+def load_http_validators():
+    """Load ETag/Last-Modified validators saved by earlier API requests"""
+    return _read_json(HTTP_CACHE_FILE, {})
+
+
+def save_http_validators(validators):
+    """Save API response validators for conditional requests"""
+    ensure_cache()
+
+    try:
+        storage.write_json(HTTP_CACHE_FILE, validators)
+    except OSError as e:
+        console = Console()
+        console.print(f"Error saving HTTP cache: {e}", style="red")
+
+
+def load_app_names(appids):
+    """Return cached Store names for appids that haven't expired yet
+
+    The result maps appid to name, or to None for App IDs Steam reported
+    as unknown. Expired and never-seen App IDs are left out.
+    """
+    cached = _read_json(APPDETAILS_FILE, {})
+    now = time.time()
+    names = {}
+
+    for appid in appids:
+        entry = cached.get(str(appid))
+        if entry is None:
+            continue
+        ttl = APPDETAILS_TTL if entry["name"] else APPDETAILS_MISS_TTL
+        if now - entry["fetched"] < ttl:
+            names[str(appid)] = entry["name"]
+
+    return names
+
+
+def save_app_names(names):
+    """Add freshly looked up Store names to the appdetails cache"""
+    if not names:
+        return
+
+    ensure_cache()
+    # shared by every profile, so it has its own lock
+    with storage.locked(os.path.dirname(APPDETAILS_FILE) or "."):
+        cached = _read_json(APPDETAILS_FILE, {})
+        now = time.time()
+
+        for appid, name in names.items():
+            cached[str(appid)] = {"name": name, "fetched": now}
+
+        try:
+            storage.write_json(APPDETAILS_FILE, cached, indent=None)
+        except OSError as e:
+            console = Console()
+            console.print(f"Error saving appdetails cache: {e}", style="red")
+
+
+def load_search_index(names):
+    """Return the fuzzy search index for names, rebuilding it if stale
+
+    The index is stored next to the cache and keyed by a digest of the
+    names, so a sync, addgame or rename makes the next search rebuild it.
+    """
+    names = list(names)
+    digest = search.names_digest(names)
+
+    if os.path.exists(SEARCH_INDEX_FILE):
+        try:
+            index = _remember(
+                (SEARCH_INDEX_FILE,), lambda: search.read_index(SEARCH_INDEX_FILE)
+            )
+            if index.digest == digest:
+                return index
+        except (OSError, ValueError):
+            pass
+
+    index = search.SearchIndex.build(names)
+    ensure_cache()
+    try:
+        search.write_index(SEARCH_INDEX_FILE, index)
+    except OSError as e:
+        console = Console()
+        console.print(f"Error saving search index: {e}", style="red")
+
+    return index
+
+
+def load_stats_snapshot():
+    """Load the materialized --stats summary, or None if there is none"""
+    return _read_json(STATS_FILE, None)
+
+
+def save_stats_snapshot(snapshot):
+    """Save the materialized --stats summary"""
+    ensure_cache()
+    try:
+        storage.write_json(STATS_FILE, snapshot, indent=None)
+    except OSError as e:
+        console = Console()
+        console.print(f"Error saving stats snapshot: {e}", style="red")
+
+
+def invalidate_stats_snapshot():
+    """Drop the stats summary before a change it doesn't account for
+
+    Every write to the library, manual games or status overrides calls
+    this; callers that update the summary incrementally save it again
+    afterwards, anything else leaves --stats to rebuild it.
+    """
+    try:
+        if os.path.exists(STATS_FILE):
+            os.remove(STATS_FILE)
+    except OSError:
+        pass
+
+
+def load_sort_index(manual_games, games=None, last_updated=None):
+    """Load the saved sort orders of the merged library
+
+    games and last_updated default to the cached library, which is only
+    loaded if there are saved orders. Returns None if there are none or
+    they were built from another sync or a different number of games.
+    """
+    try:
+        index = _remember((SORT_INDEX_FILE,), lambda: order.read_index(SORT_INDEX_FILE))
+    except (OSError, ValueError):
+        return None
+
+    if games is None:
+        cache_data = load_cache()
+        if cache_data is None:
+            return None
+        games = cache_data["games"]
+        last_updated = cache_data["last_updated"]
+
+    if not index.matches(games, manual_games, last_updated):
+        return None
+    return index.bind(games, manual_games)
+
+
+def save_sort_index(index):
+    """Save the sort orders of the merged library"""
+    ensure_cache()
+    try:
+        order.write_index(SORT_INDEX_FILE, index)
+    except OSError as e:
+        console = Console()
+        console.print(f"Error saving sort index: {e}", style="red")
+
+
+def invalidate_sort_index():
+    """Drop the sort orders before a change they don't account for
+
+    Like invalidate_stats_snapshot, called on every write to the library
+    or manual games; callers that update the orders save them again.
+    """
+    try:
+        if os.path.exists(SORT_INDEX_FILE):
+            os.remove(SORT_INDEX_FILE)
+    except OSError:
+        pass
@@ -0,0 +1,130 @@
+"""Append-only change log for incremental library syncs
+
+Each line of the log is one JSON entry:
+
+    {"op": "upsert", "game": {...}}      new or changed game
+    {"op": "remove", "appid": 440}       game no longer in the library
+    {"op": "synced", "last_updated": ""} end of one sync
+"""
+
+import json
+import os
+
+from .columnar import ColumnarLibrary
+from .game import to_json
+from .storage import append_durably
+
+# fields that decide whether a cached game changed since the last sync
+TRACKED_FIELDS = ("name", "playtime_forever", "playtime_2weeks", "rtime_last_played")
+
+
+def _fingerprint(game):
+    """Return the tracked fields of a game as a comparable tuple"""
+    return tuple(game.get(field, 0) for field in TRACKED_FIELDS)
+
+
+def diff_games(old_games, new_games):
+    """Compare two libraries by appid
+
+    Returns the games that are new or changed in new_games, and the appids
+    that disappeared from it.
+    """
+    if isinstance(old_games, ColumnarLibrary):
+        return _diff_columnar(old_games, new_games)
+
+    old = {game["appid"]: _fingerprint(game) for game in old_games}
+    upserts = []
+
+    for game in new_games:
+        if old.pop(game["appid"], None) != _fingerprint(game):
+            upserts.append(game)
+
+    return upserts, list(old)
+
+
+def _diff_columnar(library, new_games):
+    """diff_games against a columnar library, reading its columns directly"""
+    numbers = TRACKED_FIELDS[1:]
+    old = dict(
+        zip(
+            library.column("appid"),
+            zip(range(len(library)), *(library.column(f) for f in numbers)),
+        )
+    )
+    upserts = []
+
+    for game in new_games:
+        entry = old.pop(game["appid"], None)
+        if (
+            entry is None
+            or entry[1:] != tuple(game.get(field, 0) for field in numbers)
+            or library.name(entry[0]) != game["name"]
+        ):
+            upserts.append(game)
+
+    return upserts, list(old)
+
+
+def read_log(path):
+    """Read all complete entries from the log, oldest first"""
+    if not os.path.exists(path):
+        return []
+
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            # a crash mid-append leaves a partial last line, skip it
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+
+    return entries
+
+
+def append_log(path, upserts, removed, last_updated):
+    """Append one sync's changes to the log as a single write"""
+    lines = [
+        json.dumps({"op": "upsert", "game": game}, default=to_json) for game in upserts
+    ]
+    lines += [json.dumps({"op": "remove", "appid": appid}) for appid in removed]
+    lines.append(json.dumps({"op": "synced", "last_updated": last_updated}))
+
+    append_durably(path, "\n".join(lines) + "\n")
+
+
+def clear_log(path):
+    """Delete the log once its changes are part of the base cache"""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def replay(cache_data, entries):
+    """Apply logged changes on top of a loaded cache"""
+    upserts = {}
+    removed = set()
+    last_updated = cache_data["last_updated"]
+
+    for entry in entries:
+        if entry["op"] == "upsert":
+            game = entry["game"]
+            upserts[game["appid"]] = game
+            removed.discard(game["appid"])
+        elif entry["op"] == "remove":
+            upserts.pop(entry["appid"], None)
+            removed.add(entry["appid"])
+        elif entry["op"] == "synced":
+            last_updated = entry["last_updated"]
+
+    games = cache_data["games"]
+    if isinstance(games, ColumnarLibrary):
+        games = games.with_changes(list(upserts.values()), removed, last_updated)
+    else:
+        merged = []
+        for game in games:
+            appid = game["appid"]
+            if appid not in removed:
+                merged.append(upserts.pop(appid, game))
+        games = merged + list(upserts.values())
+
+    return {"last_updated": last_updated, "games": games}
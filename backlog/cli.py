@@ -1,28 +1,81 @@
 """Command line interface for Steam Backlog Tracker"""
 
 import argparse
+import functools
 import json
 import os
 import sys
 import time as time_module
 from datetime import datetime
-from rich.console import Console
 
-from backlog.api import fetch_games, validate_credentials, lookup_steam_game
+from backlog import timing
+from backlog.api import (
+    configure_client,
+    fetch_games,
+    get_client,
+    lookup_steam_game,
+    resolve_app_names,
+    validate_credentials,
+)
 from backlog.cache import (
+    set_backend,
+    use_profile,
+    supports_queries,
+    query_games,
+    count_games,
     load_cache,
-    save_cache,
-    load_tags,
-    save_tags,
+    load_last_updated,
+    sync_cache,
+    locked,
+    apply_batch,
+    load_tag_index,
+    save_tag_index,
+    add_tag,
+    remove_tag,
     load_status,
     save_status,
+    set_status,
+    clear_status,
     load_manual_games,
-    save_manual_games
-
+    save_manual_games,
+    load_http_validators,
+    save_http_validators,
+    load_search_index,
+    load_stats_snapshot,
+    save_stats_snapshot,
+    load_sort_index,
+    save_sort_index,
+    get_profiles,
+    profile_directory,
+)
+from backlog.console import Console
+from backlog.display import (
+    FORMATS,
+    display_games,
+    display_all_tags,
+    display_page,
+    display_stats,
+    display_timings,
+    page_through,
+    write_games,
+    write_pages,
+)
+from backlog.index import GameIndex
+from backlog.order import SortIndex
+from backlog.query import CLASSIFY, COLUMN, LOOKUP, SORT_KEYS, TEXT, Query
+from backlog.stats import LibraryStats, library_stats
+from backlog.tags import parse_tag_expression
+from backlog.timing import timed
+from backlog.utils import (
+    dropped_cutoff,
+    find_game_by_name,
+    game_source,
+    fuzzy_ranks,
+    get_next_manual_id,
+    hours_predicate,
+    merge_games,
+    status_predicate,
 )
-from backlog.display import display_games, display_all_tags, display_stats
-from backlog.export import export_csv, export_json
-from backlog.utils import find_game_by_name, get_game_status, get_next_manual_id, merge_games
 
 
 def setup_config():
@@ -95,17 +148,547 @@ def load_config():
         console.print("Delete config.json and run again to start fresh", style="yellow")
         sys.exit(1)
 
-    if "API_KEY" not in config or "STEAM_ID" not in config:
+    if "API_KEY" not in config or not ("STEAM_ID" in config or "PROFILES" in config):
         console.print("Error: config.json is missing required keys", style="red")
         console.print("Delete config.json and run again to start fresh", style="yellow")
         sys.exit(1)
 
+    # an empty STEAM_ID or PROFILES passes the check above but names no account
+    if not get_profiles(config):
+        console.print("Error: config.json has no Steam ID configured", style="red")
+        console.print(
+            "Set STEAM_ID or add PROFILES, or delete config.json and run again "
+            "to start fresh",
+            style="yellow",
+        )
+        sys.exit(1)
+
     return config
 
 
-def main():
+def get_playtime_filter(args):
+    """Return (column, min hours, max hours, strict) for the playtime filter"""
+    if args.notplayed:
+        return "playtime_forever", 0, 0, False
+    elif args.started:
+        return "playtime_forever", None, 2, False
+    elif args.recent:
+        return "playtime_2weeks", 0, None, True
+    elif args.under:
+        return "playtime_forever", None, args.under, True
+    elif args.over:
+        return "playtime_forever", args.over, None, True
+    elif args.between:
+        min_hrs, max_hrs = args.between
+        return "playtime_forever", min_hrs, max_hrs, False
+
+    return None
+
+
+def open_stats_snapshot():
+    """Load the saved --stats summary, e.g. to update it after a change"""
+    return LibraryStats.from_dict(load_stats_snapshot(), load_status())
+
 
-    # initializing parser
+def check_stats_snapshot(stats):
+    """Compare the saved --stats summary with one computed from scratch"""
+    console = Console()
+    saved = open_stats_snapshot()
+
+    if saved is None:
+        console.print("No saved stats summary, building one", style="yellow")
+        return
+
+    differences = saved.differences(stats)
+    if differences:
+        console.print(
+            f"Saved stats summary was out of date ({', '.join(differences)}), "
+            "rebuilt it",
+            style="yellow",
+        )
+    elif not saved.is_current():
+        console.print("Saved stats summary had expired, rebuilt it", style="yellow")
+    else:
+        console.print("Saved stats summary matches the library", style="green")
+
+
+def save_stats(stats):
+    """Save a --stats summary that was updated in place, if there was one"""
+    if stats is not None:
+        save_stats_snapshot(stats.to_dict())
+
+
+@timed("sort index")
+def sort_index(games, manual_games, last_updated):
+    """Return the sort orders of the merged library, building them if stale"""
+    index = load_sort_index(manual_games, games, last_updated)
+    if index is None:
+        index = SortIndex.build(games, manual_games, last_updated)
+        # a sync or edit since the library was read would make it stale
+        with locked():
+            current = load_last_updated() == last_updated
+            if current and load_manual_games() == manual_games:
+                save_sort_index(index)
+    return index
+
+
+@timed("name index")
+def name_index(args, games):
+    """Index the merged library for name lookups, fuzzy with --fuzzy"""
+    search_index = None
+    if args.fuzzy:
+        search_index = load_search_index(g["name"] for g in games)
+    return GameIndex(games, search_index)
+
+
+def library_query(args, ranks=None):
+    """Build the query plan for the filter, sort and limit options
+
+    ranks, from fuzzy_ranks, keeps only similar games and orders them by
+    similarity, or breaks ties in --sortby.
+    """
+    query = Query(SORT_KEYS.get(args.sortby), args.limit)
+
+    # playtime filters run on the raw columns, before games become dicts
+    playtime_filter = get_playtime_filter(args)
+
+    if playtime_filter:
+        column, min_hrs, max_hrs, strict = playtime_filter
+        query.where(hours_predicate(min_hrs, max_hrs, strict), COLUMN, column)
+
+    if ranks is not None:
+        query.where(lambda g: (g["appid"], g["name"]) in ranks)
+        rank = lambda g: ranks[(g["appid"], g["name"])]
+        if query.key is None:
+            query.order_by(rank)
+        else:
+            key = query.key
+            query.order_by(lambda g: (key(g), rank(g)))
+    elif args.search:
+        term = args.search.lower()
+        query.where(lambda name: term in name.lower(), TEXT, "name")
+
+    if args.filter_tag:
+        matches = load_tag_index().matcher(args.filter_tag)
+        query.where(matches, LOOKUP, "appid")
+
+    if args.filterstatus:
+        query.where(status_predicate(args.filterstatus, load_status()), CLASSIFY)
+
+    return query
+
+
+def select_games(args, games, manual_games, last_updated=None):
+    """Filter, sort and limit the merged library in Python
+
+    With last_updated, sorted listings and playtime ranges walk the saved
+    sort orders instead of scanning and sorting every game.
+    """
+    # ranked against the whole library so the persisted index stays valid
+    ranks = None
+    if args.search and args.fuzzy:
+        ranks = fuzzy_ranks(games, manual_games, args.search)
+
+    query = library_query(args, ranks)
+
+    playtime_filter = get_playtime_filter(args)
+    hours = None
+    if playtime_filter and playtime_filter[0] == "playtime_forever":
+        hours = playtime_filter[1:]
+
+    if last_updated is not None and ranks is None and (args.sortby or hours):
+        index = sort_index(games, manual_games, last_updated)
+
+        # positions cover both libraries, so --source filters game by game
+        if args.source == "steam":
+            query.where(lambda g: game_source(g) == "Steam")
+        elif args.source == "manual":
+            query.where(lambda g: game_source(g) != "Steam")
+
+        query.order_by(None)
+        positions = index.positions(args.sortby, hours)
+        return query.run(query.indexed(index, positions, args.source != "manual"))
+
+    # --source drops whole libraries, before any game is looked at
+    library = merge_games(games, manual_games).partition(args.source)
+    return query.run(query.merged(library.steam_games, library.manual_games))
+
+
+def library_filters(args):
+    """Turn the filter options into query_games/count_games keywords"""
+    filters = {
+        "source": args.source,
+        "search": args.search,
+        "tag": args.filter_tag,
+        "status": args.filterstatus,
+    }
+    playtime_filter = get_playtime_filter(args)
+
+    if playtime_filter:
+        column, min_hrs, max_hrs, strict = playtime_filter
+        filters.update(column=column, minimum=min_hrs, maximum=max_hrs, strict=strict)
+
+    return filters
+
+
+def query_library(args, offset=0, count=None):
+    """Filter, sort and limit the merged library as one database query
+
+    offset and count select one page of the result, which --limit still
+    caps.
+    """
+    limit = args.limit
+    if count is not None:
+        limit = count if not args.limit else min(count, args.limit - offset)
+        if limit <= 0:
+            return []
+
+    return query_games(
+        dropped_cutoff(),
+        sortby=args.sortby,
+        limit=limit,
+        offset=offset,
+        **library_filters(args),
+    )
+
+
+def count_library(args):
+    """Count the games query_library would return"""
+    total = count_games(dropped_cutoff(), **library_filters(args))
+    return min(total, args.limit) if args.limit else total
+
+
+def listing_format(args):
+    """--format, or a table on a terminal and plain lines anywhere else"""
+    return args.format or ("table" if sys.stdout.isatty() else "plain")
+
+
+def show_pages(args, fetch, total, title, last_updated):
+    """Show --page or --pager over a result set fetched a range at a time
+
+    fetch(start, stop) returns the games in that range of the total.
+    """
+    output = listing_format(args)
+    if output != "table":
+        page = args.page or 1
+        write_pages(fetch, total, page, args.page_size, output, args.pager)
+    elif args.pager:
+        page_through(fetch, total, args.page_size, title, last_updated, args.page or 1)
+    else:
+        display_page(fetch, total, args.page, args.page_size, title, last_updated)
+
+
+def read_game_list(path):
+    """Read (game, platform) pairs from a file, one game per line
+
+    Each line is an App ID or a name, optionally followed by a comma and a
+    platform. Blank lines and lines starting with # are skipped.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            game, _, platform = line.partition(",")
+            entries.append((game.strip(), platform.strip() or None))
+    return entries
+
+
+def add_games_from_file(path, default_platform, config):
+    """Add every game listed in a file, resolving App IDs concurrently"""
+    console = Console()
+
+    try:
+        entries = read_game_list(path)
+    except OSError as e:
+        console.print(f"Error reading {path}: {e}", style="red")
+        return
+
+    appids = list(dict.fromkeys(game for game, _ in entries if game.isdigit()))
+    if appids:
+        console.print(f"Looking up {len(appids)} Steam App IDs...", style="dim")
+    names = resolve_app_names(
+        appids,
+        workers=config.get("STORE_WORKERS", 8),
+        rate=config.get("STORE_RATE_LIMIT", 4),
+    )
+
+    with locked():
+        manual_games = load_manual_games()
+        known_appids = {str(g.get("appid")) for g in manual_games}
+        known_names = {g["name"].lower() for g in manual_games}
+        next_id = int(get_next_manual_id(manual_games).split("_")[1])
+        orders = load_sort_index(manual_games)
+        added = 0
+
+        for game, platform in entries:
+            platform = platform or default_platform
+
+            if game.isdigit():
+                appid, name = game, names.get(game)
+                if not name:
+                    console.print(f"  Could not find AppID {appid}", style="red")
+                    continue
+            else:
+                appid, name = None, game
+
+            if appid in known_appids or name.lower() in known_names:
+                console.print(f"  Already exists: '{name}'", style="yellow")
+                continue
+
+            if appid is None:
+                appid = f"manual_{next_id}"
+                next_id += 1
+
+            manual_games.append(
+                {
+                    "appid": appid,
+                    "name": name,
+                    "platform": platform,
+                    "playtime_forever": 0,
+                    "rtime_last_played": 0,
+                    "playtime_2weeks": 0,
+                }
+            )
+            known_appids.add(appid)
+            known_names.add(name.lower())
+            console.print(f"  Added: {name} ({platform})", style="green")
+            added += 1
+
+        if added:
+            save_manual_games(manual_games)
+            if orders is not None:
+                for _ in range(added):
+                    orders.add_manual()
+                save_sort_index(orders)
+
+    console.print(f"\nAdded {added} of {len(entries)} game(s)", style="bold green")
+
+
+# --apply results per action, when it changed something and when it didn't
+APPLY_MESSAGES = {
+    "tag": ("Tagged: {name} ({value})", "Already tagged: {name} ({value})"),
+    "untag": ("Untagged: {name} ({value})", "No such tag: {name} ({value})"),
+    "status": ("Set status: {name} ({value})", "Status already '{value}': {name}"),
+    "clearstatus": ("Cleared status: {name}", "No manual status: {name}"),
+}
+
+
+def read_operations(path):
+    """Read tag and status edits from a CSV or NDJSON file
+
+    CSV files have a header row with action, game and value columns; NDJSON
+    files (.ndjson/.jsonl, or starting with "{") hold one object with the
+    same keys per line. Returns (line number, row) pairs, skipping blank
+    lines.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        text = f.read()
+
+    if path.endswith((".ndjson", ".jsonl")) or text.lstrip().startswith("{"):
+        return [
+            (number, json.loads(line))
+            for number, line in enumerate(text.splitlines(), 1)
+            if line.strip()
+        ]
+
+    import csv
+
+    reader = csv.DictReader(text.splitlines())
+    return [
+        (reader.line_num, row)
+        for row in reader
+        if any(value and value.strip() for value in row.values())
+    ]
+
+
+def apply_operations_file(path, args):
+    """Apply every tag and status edit listed in a file in one batch
+
+    Names are resolved through one index of the library, and the edits are
+    written with a single save per file (one transaction with SQLite).
+    """
+    console = Console()
+
+    try:
+        rows = read_operations(path)
+    except (OSError, ValueError) as e:
+        console.print(f"Error reading {path}: {e}", style="red")
+        return
+
+    cache_data = load_cache()
+
+    if cache_data is None:
+        console.print("No cache found. Use --sync first", style="red")
+        return
+
+    manual_games = load_manual_games()
+    index = name_index(args, merge_games(cache_data["games"], manual_games))
+    operations = []
+    targets = []
+    failed = 0
+
+    for number, row in rows:
+        action = str(row.get("action") or "").strip().lower()
+        game_name = str(row.get("game") or "").strip()
+        value = str(row.get("value") or "").strip() or None
+
+        if action not in APPLY_MESSAGES:
+            console.print(f"  Line {number}: unknown action '{action}'", style="red")
+        elif action != "clearstatus" and value is None:
+            console.print(f"  Line {number}: {action} needs a value", style="red")
+        elif action == "status" and value not in ["completed", "hold"]:
+            console.print(
+                f"  Line {number}: manual status must be 'completed' or 'hold'",
+                style="red",
+            )
+        else:
+            result = find_game_by_name(index, game_name)
+
+            if result is None:
+                console.print(
+                    f"  Line {number}: no game found: '{game_name}'", style="red"
+                )
+            elif isinstance(result, list):
+                console.print(
+                    f"  Line {number}: multiple matches: '{game_name}'",
+                    style="yellow",
+                )
+            else:
+                operations.append((action, result["appid"], value))
+                targets.append(result)
+                continue
+        failed += 1
+
+    with locked():
+        stats = open_stats_snapshot()
+        changed = apply_batch(operations)
+
+        for (action, appid, value), game, done in zip(operations, targets, changed):
+            if done and stats is not None and "status" in action:
+                stats.remove_game(game)
+                stats.set_override(appid, value)
+                stats.add_game(game)
+
+            message = APPLY_MESSAGES[action][0 if done else 1]
+            console.print(
+                "  " + message.format(name=game["name"], value=value),
+                style="green" if done else "dim",
+            )
+
+        save_stats(stats)
+
+    applied = sum(changed)
+    console.print(
+        f"\nApplied {applied} change(s), {len(changed) - applied} unchanged, "
+        f"{failed} failed",
+        style="bold green" if not failed else "yellow",
+    )
+
+
+def sync_library(config, steam_id):
+    """Sync the current profile's library from Steam and report the changes
+
+    Returns the fetched games, or None if Steam says the library is
+    unchanged since the last sync.
+    """
+    console = Console()
+    console.print("Syncing game library from Steam...", style="dim")
+    # only ask Steam for changes if there is a cache to fall back on
+    client = get_client()
+    client.validators = load_http_validators()
+    conditional = load_last_updated() is not None
+    games = fetch_games(config["API_KEY"], steam_id, conditional)
+
+    if games is None:
+        console.print("Library unchanged since last sync", style="green")
+        save_http_validators(client.validators)
+        return None
+
+    # one lock, so no edit lands between the sync and the summary update
+    with locked():
+        stats = open_stats_snapshot()
+        summary = sync_cache(games)
+
+        # fold the delta into the saved --stats summary
+        if stats is not None and "previous" in summary and "upserts" in summary:
+            for game in summary["previous"]:
+                stats.remove_game(game)
+            for game in summary["upserts"]:
+                stats.add_game(game)
+            save_stats(stats)
+
+        # sort orders for the next --sortby, built while the library is at hand
+        cache_data = None if supports_queries() else load_cache()
+        if cache_data is not None:
+            index = SortIndex.build(
+                cache_data["games"], load_manual_games(), cache_data["last_updated"]
+            )
+            save_sort_index(index)
+
+        # only once the library is stored: validators saved ahead of a
+        # failed write would answer every later sync with "unchanged"
+        save_http_validators(client.validators)
+
+    console.print("Games synced successfully!", style="green")
+    console.print(
+        f"{summary['added']} new, {summary['changed']} changed, "
+        f"{summary['removed']} removed, {summary['unchanged']} unchanged",
+        style="dim",
+    )
+    if summary.get("compacted"):
+        console.print("Compacted the sync change log", style="dim")
+    return games
+
+
+def sync_all_profiles(config, profiles):
+    """Sync every configured profile concurrently and report each result"""
+    console = Console()
+    console.print(f"Syncing {len(profiles)} profile(s) from Steam...", style="dim")
+    started = time_module.perf_counter()
+    # asyncio is only needed here, so it's imported here
+    from backlog.sync import sync_profiles
+
+    results = sync_profiles(
+        config["API_KEY"],
+        profiles,
+        concurrency=config.get("SYNC_CONCURRENCY", 8),
+        rate=config.get("API_RATE_LIMIT", 4),
+    )
+    elapsed = time_module.perf_counter() - started
+
+    for name in profiles:
+        result = results[name]
+        if result["error"]:
+            console.print(f"  {name}: {result['error']}", style="red")
+        elif result["summary"] is None:
+            console.print(f"  {name}: unchanged", style="dim")
+        else:
+            summary = result["summary"]
+            console.print(
+                f"  {name}: {summary['added']} new, {summary['changed']} changed, "
+                f"{summary['removed']} removed ({result['elapsed']:.2f}s)",
+                style="green",
+            )
+
+    console.print(f"\nSynced in {elapsed:.2f}s", style="dim")
+
+
+def positive_count(text):
+    """argparse type for counts that must be at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+@functools.cache
+def build_parser():
+    """Build the argument parser once per process
+
+    A --serve daemon builds it before forking, so its workers reuse it.
+    """
     parser = argparse.ArgumentParser(description="Steam game backlog tracker")
     parser.add_argument(
         "--notplayed",
@@ -138,6 +721,17 @@ def main():
     parser.add_argument(
         "--sync", action="store_true", help="Sync the game library from Steam"
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="NAME",
+        help="Use the library of a profile from PROFILES in config.json",
+    )
+    parser.add_argument(
+        "--all-profiles",
+        action="store_true",
+        help="With --sync, sync every configured profile concurrently",
+    )
     parser.add_argument(
         "--sortby",
         choices=["name", "playtime", "playtime-asc", "recent"],
@@ -146,10 +740,40 @@ def main():
     parser.add_argument(
         "--stats", action="store_true", help="Display library statistics"
     )
+    parser.add_argument(
+        "--check-stats",
+        action="store_true",
+        help="Check the saved statistics summary against the library and rebuild it",
+    )
     parser.add_argument(
         "--setup", action="store_true", help="Run setup wizard to configure credentials"
     )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long each stage of the command took (on stderr)",
+    )
+    parser.add_argument(
+        "--timings-out",
+        type=str,
+        metavar="FILE",
+        help="Like --timings, also writing a Chrome trace (FILE.json) or cProfile "
+        "stats (any other name, read with pstats)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a daemon that keeps the library loaded and answers later "
+        "commands from this directory",
+    )
     parser.add_argument("--search", type=str, help="Search for a game by name")
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Rank --search results by similarity, tolerating typos and "
+        "punctuation; also picks the closest match for game names in tag "
+        "and status commands",
+    )
     # tag arguments
     parser.add_argument(
         "--tag", nargs=2, metavar=("GAME", "TAG"), help="Add a tag to a game"
@@ -159,7 +783,11 @@ def main():
     )
     parser.add_argument("--tags", action="store_true", help="Display all tags")
     parser.add_argument(
-        "--filter-tag", type=str, metavar="TAG", help="Filter games by tag"
+        "--filter-tag",
+        type=str,
+        metavar="EXPR",
+        help="Filter games by tag, or a tag expression such as 'rpg & !finished' "
+        "(& and, | or, ! not, parentheses)",
     )
     parser.add_argument(
         "--bulktag",
@@ -173,13 +801,44 @@ def main():
         metavar="ARGS",
         help="Remove tag from multiple games: --bulkuntag TAG GAME1 GAME2 ...",
     )
-    parser.add_argument("--limit", type=int, help="Limit number of games to display")
+    parser.add_argument(
+        "--limit", type=positive_count, help="Limit number of games to display"
+    )
+    parser.add_argument(
+        "--page", type=int, metavar="N", help="Display only page N of the results"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=50,
+        metavar="K",
+        help="Games per page for --page and --pager (default: 50)",
+    )
+    parser.add_argument(
+        "--pager",
+        action="store_true",
+        help="Browse the results one page at a time",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["table", *FORMATS],
+        help="Listing output: a table, or plain lines, TSV or JSON lines to pipe "
+        "into other tools (default: table on a terminal, plain otherwise)",
+    )
     parser.add_argument(
         "--export",
-        choices=["csv", "json"],
+        choices=["csv", "json", "ndjson"],
         help="Export games to file (respects filters)",
     )
 
+    parser.add_argument(
+        "--apply",
+        type=str,
+        metavar="FILE",
+        help="Apply tag/untag/status/clearstatus edits listed in a CSV or NDJSON "
+        "file in one batch",
+    )
+
     # status arguments
     parser.add_argument(
         "--setstatus",
@@ -207,6 +866,12 @@ def main():
     parser.add_argument(
         "--addgame", type=str, metavar="NAME", help="Add a non-Steam game"
     )
+    parser.add_argument(
+        "--addgames-from",
+        type=str,
+        metavar="FILE",
+        help="Add games listed in FILE, one App ID or name per line",
+    )
     parser.add_argument(
         "--platform",
         type=str,
@@ -228,10 +893,71 @@ def main():
         default="all",
         help="Filter by game source",
     )
+    return parser
+
 
-    args = parser.parse_args()
+def main():
+    args = build_parser().parse_args()
+
+    if not (args.timings or args.timings_out):
+        run(args)
+        return
 
+    out = args.timings_out
+    trace = out is not None and out.endswith(".json")
+    timing.enable(trace=trace)
+    profiler = None
+    if out and not trace:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run(args)
+    finally:
+        if profiler is not None and out:
+            profiler.disable()
+            profiler.dump_stats(out)
+        elif trace:
+            timing.write_trace(out)
+        display_timings(*timing.report())
+        if out:
+            Console(stderr=True).print(f"Wrote {out}", style="dim")
+
+
+def run(args):
+    """Run the command args asks for"""
     config = load_config()
+    set_backend(config.get("CACHE_BACKEND", "binary"))
+    configure_client(
+        timeout=config.get("HTTP_TIMEOUT", 10), retries=config.get("HTTP_RETRIES", 3)
+    )
+
+    profiles = get_profiles(config)
+    profile = args.profile or ("default" if "default" in profiles else None)
+    if profile is None and profiles:
+        profile = next(iter(profiles))
+
+    if args.sync and args.all_profiles:
+        sync_all_profiles(config, profiles)
+        return
+
+    if profile not in profiles:
+        console = Console()
+        console.print(f"Error: unknown profile '{profile}'", style="red")
+        console.print("Add it to PROFILES in config.json", style="yellow")
+        return
+
+    use_profile(profile_directory(profile))
+    steam_id = profiles[profile]
+
+    if args.serve:
+        sync_argv = ["--sync", "--all-profiles"] if len(profiles) > 1 else ["--sync"]
+        from backlog.server import serve
+
+        serve(sync_argv, config.get("SERVE_SYNC_INTERVAL", 3600))
+        return
 
     # first time setup / reconfigure setup
     if args.setup:
@@ -248,9 +974,16 @@ def main():
         setup_config()
         return
 
+    if args.addgames_from:
+        add_games_from_file(args.addgames_from, args.platform, config)
+        return
+
+    if args.apply:
+        apply_operations_file(args.apply, args)
+        return
+
     if args.addgame:
         console = Console()
-        manual_games = load_manual_games()
 
         if args.addgame.isdigit():
             appid = args.addgame
@@ -260,71 +993,86 @@ def main():
             if not game_name:
                 console.print(f"Could not find game with AppID {appid}", style="red")
                 return
+        else:
+            appid = None
+            game_name = args.addgame
+
+        # held from reading the list to saving it, so concurrent edits survive
+        with locked():
+            manual_games = load_manual_games()
 
             for game in manual_games:
-                if (
-                    str(game.get("appid")) == appid
-                    or game["name"].lower() == game_name.lower()
-                ):
-                    console.print(
-                        f"'{game_name}' already exists in manual games", style="yellow"
-                    )
+                if (appid is not None and str(game.get("appid")) == appid) or game[
+                    "name"
+                ].lower() == game_name.lower():
+                    if appid is not None:
+                        message = f"'{game_name}' already exists in manual games"
+                    else:
+                        message = f"{game_name} already exists in manual games"
+                    console.print(message, style="yellow")
                     return
 
             new_game = {
-                "appid": appid,
+                "appid": appid or get_next_manual_id(manual_games),
                 "name": game_name,
                 "platform": args.platform,
                 "playtime_forever": 0,
                 "rtime_last_played": 0,
                 "playtime_2weeks": 0,
             }
+            stats = open_stats_snapshot()
+            orders = load_sort_index(manual_games)
             manual_games.append(new_game)
             save_manual_games(manual_games)
+            if stats is not None:
+                stats.add_game(new_game)
+                save_stats(stats)
+            if orders is not None:
+                orders.add_manual()
+                save_sort_index(orders)
+
+        if appid is not None:
             console.print(
                 f"Added '{game_name}' (App ID: {appid}, {args.platform})", style="green"
             )
-            return
-
-        for game in manual_games:
-            if game["name"].lower() == args.addgame.lower():
-                console.print(
-                    f"{args.addgame} already exists in manual games", style="yellow"
-                )
-                return
-        new_game = {
-            "appid": get_next_manual_id(),
-            "name": args.addgame,
-            "platform": args.platform,
-            "playtime_forever": 0,
-            "rtime_last_played": 0,
-            "playtime_2weeks": 0,
-        }
-        manual_games.append(new_game)
-        save_manual_games(manual_games)
-        console.print(f"Added '{args.addgame}' ({args.platform})", style="green")
+        else:
+            console.print(f"Added '{game_name}' ({args.platform})", style="green")
         return
 
     if args.removegame:
         console = Console()
-        manual_games = load_manual_games()
 
-        found = None
-        for game in manual_games:
-            if game["name"].lower() == args.removegame.lower():
-                found = game
-                break
+        with locked():
+            manual_games = load_manual_games()
 
-        if not found:
-            console.print(f"No game found matching '{args.removegame}'", style="red")
-            console.print(
-                f"Note: Steam games cannot be removed, only manual entries.",
-                style="dim",
-            )
-            return
+            found = None
+            for game in manual_games:
+                if game["name"].lower() == args.removegame.lower():
+                    found = game
+                    break
+
+            if not found:
+                console.print(
+                    f"No game found matching '{args.removegame}'", style="red"
+                )
+                console.print(
+                    f"Note: Steam games cannot be removed, only manual entries.",
+                    style="dim",
+                )
+                return
+
+            stats = open_stats_snapshot()
+            orders = load_sort_index(manual_games)
+            if orders is not None:
+                orders.remove_manual(manual_games.index(found))
+            manual_games.remove(found)
+            save_manual_games(manual_games)
+            if stats is not None:
+                stats.remove_game(found)
+                save_stats(stats)
+            if orders is not None:
+                save_sort_index(orders)
 
-        manual_games.remove(found)
-        save_manual_games(manual_games)
         console.print(f"Removed '{found['name']}'", style="green")
         return
 
@@ -337,23 +1085,39 @@ def main():
             console.print(f"Invalid hours: {hours_str}", style="red")
             return
         console = Console()
-        manual_games = load_manual_games()
 
-        found = None
-        for game in manual_games:
-            if game["name"].lower() == game_name.lower():
-                found = game
-                break
-        if not found:
-            console.print(f"No manual game found matching '{game_name}'", style="red")
-            console.print(f"Note: Steam games are tracked automatically", style="dim")
-            return
+        with locked():
+            manual_games = load_manual_games()
+
+            found = None
+            for game in manual_games:
+                if game["name"].lower() == game_name.lower():
+                    found = game
+                    break
+            if not found:
+                console.print(
+                    f"No manual game found matching '{game_name}'", style="red"
+                )
+                console.print(
+                    f"Note: Steam games are tracked automatically", style="dim"
+                )
+                return
 
-        import time as time_module
+            stats = open_stats_snapshot()
+            if stats is not None:
+                stats.remove_game(found)
+            orders = load_sort_index(manual_games)
+
+            found["playtime_forever"] += int(hours * 60)
+            found["rtime_last_played"] = int(time_module.time())
+            save_manual_games(manual_games)
 
-        found["playtime_forever"] += int(hours * 60)
-        found["rtime_last_played"] = int(time_module.time())
-        save_manual_games(manual_games)
+            if stats is not None:
+                stats.add_game(found)
+                save_stats(stats)
+            if orders is not None:
+                orders.update_manual(found)
+                save_sort_index(orders)
 
         total_hours = found["playtime_forever"] / 60
         console.print(
@@ -379,9 +1143,11 @@ def main():
             display_all_tags(games)
             return
 
+        index = name_index(args, games)
+
         if args.tag:
             game_name, tag_name = args.tag
-            result = find_game_by_name(games, game_name)
+            result = find_game_by_name(index, game_name)
             console = Console()
 
             if result is None:
@@ -394,14 +1160,7 @@ def main():
                     console.print(f" - {g['name']}", style="dim")
                 return
 
-            tags = load_tags()
-            appid = str(result["appid"])
-
-            if appid not in tags:
-                tags[appid] = []
-            if tag_name not in tags[appid]:
-                tags[appid].append(tag_name)
-                save_tags(tags)
+            if add_tag(result["appid"], tag_name):
                 console.print(
                     f"Added tag '{tag_name}' to {result['name']}", style="green"
                 )
@@ -413,7 +1172,7 @@ def main():
 
         if args.untag:
             game_name, tag_name = args.untag
-            result = find_game_by_name(games, game_name)
+            result = find_game_by_name(index, game_name)
             console = Console()
 
             if result is None:
@@ -427,16 +1186,7 @@ def main():
                     console.print(f" - {g['name']}", style="dim")
                 return
 
-            tags = load_tags()
-            appid = str(result["appid"])
-
-            if appid in tags and tag_name in tags[appid]:
-                tags[appid].remove(tag_name)
-
-                if not tags[appid]:
-                    del tags[appid]
-
-                save_tags(tags)
+            if remove_tag(result["appid"], tag_name):
                 console.print(
                     f"Removed tag '{tag_name}' from {result['name']}", style="green"
                 )
@@ -458,7 +1208,7 @@ def main():
 
         games = cache_data["games"]
         manual_games = load_manual_games()
-        games = merge_games(games, manual_games)
+        index = name_index(args, merge_games(games, manual_games))
         console = Console()
 
         if args.bulktag:
@@ -468,32 +1218,30 @@ def main():
 
             tag_name = args.bulktag[0]
             game_names = args.bulktag[1:]
-            tags = load_tags()
-            success_count = 0
+            with locked():
+                tags = load_tag_index()
+                success_count = 0
 
-            for game_name in game_names:
-                result = find_game_by_name(games, game_name)
+                for game_name in game_names:
+                    result = find_game_by_name(index, game_name)
 
-                if result is None:
-                    console.print(f"  No game found: '{game_name}'", style="red")
-                elif isinstance(result, list):
-                    console.print(f"  Multiple matches: '{game_name}'", style="yellow")
-                else:
-                    appid = str(result["appid"])
-                    if appid not in tags:
-                        tags[appid] = []
-                    if tag_name not in tags[appid]:
-                        tags[appid].append(tag_name)
+                    if result is None:
+                        console.print(f"  No game found: '{game_name}'", style="red")
+                    elif isinstance(result, list):
+                        console.print(
+                            f"  Multiple matches: '{game_name}'", style="yellow"
+                        )
+                    elif tags.add(result["appid"], tag_name):
                         console.print(f"  Tagged: {result['name']}", style="green")
                         success_count += 1
                     else:
                         console.print(
                             f"  Already tagged: {result['name']}", style="dim"
                         )
-            save_tags(tags)
+                save_tag_index(tags)
             console.print(
                 f"\nAdded tag '{tag_name}' to {success_count} game(s)",
-                style="bold_green",
+                style="bold green",
             )
             return
 
@@ -504,28 +1252,26 @@ def main():
 
             tag_name = args.bulkuntag[0]
             game_names = args.bulkuntag[1:]
-            tags = load_tags()
-            success_count = 0
+            with locked():
+                tags = load_tag_index()
+                success_count = 0
 
-            for game_name in game_names:
-                result = find_game_by_name(games, game_name)
+                for game_name in game_names:
+                    result = find_game_by_name(index, game_name)
 
-                if result is None:
-                    console.print(f"  No game found: '{game_name}'", style="red")
-                elif isinstance(result, list):
-                    console.print(f"  Multiple matches: '{game_name}'", style="yellow")
-                else:
-                    appid = str(result["appid"])
-                    if appid in tags and tag_name in tags[appid]:
-                        tags[appid].remove(tag_name)
-                        if not tags[appid]:
-                            del tags[appid]
+                    if result is None:
+                        console.print(f"  No game found: '{game_name}'", style="red")
+                    elif isinstance(result, list):
+                        console.print(
+                            f"  Multiple matches: '{game_name}'", style="yellow"
+                        )
+                    elif tags.remove(result["appid"], tag_name):
                         console.print(f"  Untagged: {result['name']}", style="green")
                         success_count += 1
                     else:
                         console.print(f"  No such tag: {result['name']}", style="dim")
 
-            save_tags(tags)
+                save_tag_index(tags)
             console.print(
                 f"\nRemoved '{tag_name}' from {success_count} game(s)",
                 style="bold green",
@@ -541,7 +1287,8 @@ def main():
             console.print("No cache found. Use --sync first", style="red")
             return
 
-        games = cache_data["games"]
+        manual_games = load_manual_games()
+        index = name_index(args, merge_games(cache_data["games"], manual_games))
         if args.setstatus:
 
             game_name, new_status = args.setstatus
@@ -557,7 +1304,7 @@ def main():
                 )
                 return
 
-            result = find_game_by_name(games, game_name)
+            result = find_game_by_name(index, game_name)
             console = Console()
 
             if result is None:
@@ -571,17 +1318,21 @@ def main():
 
                 return
 
-            status = load_status()
-            appid = str(result["appid"])
-            status[appid] = new_status
-            save_status(status)
+            with locked():
+                stats = open_stats_snapshot()
+                set_status(result["appid"], new_status)
+                if stats is not None:
+                    stats.remove_game(result)
+                    stats.set_override(result["appid"], new_status)
+                    stats.add_game(result)
+                    save_stats(stats)
             console.print(
                 f"Set {result['name']} status to '{new_status}'", style="green"
             )
             return
 
         if args.clearstatus:
-            result = find_game_by_name(games, args.clearstatus)
+            result = find_game_by_name(index, args.clearstatus)
             console = Console()
 
             if result is None:
@@ -598,20 +1349,23 @@ def main():
                     console.print(f"  - {g['name']}", style="dim")
                 return
 
-            status = load_status()
-            appid = str(result["appid"])
-
-            if appid in status:
-                del status[appid]
-                save_status(status)
-                console.print(
-                    f"Cleared status for {result['name']} (will auto-detect)",
-                    style="green",
-                )
-            else:
-                console.print(
-                    f"{result['name']} has no manual status override", style="yellow"
-                )
+            with locked():
+                stats = open_stats_snapshot()
+                if clear_status(result["appid"]):
+                    if stats is not None:
+                        stats.remove_game(result)
+                        stats.set_override(result["appid"], None)
+                        stats.add_game(result)
+                        save_stats(stats)
+                    console.print(
+                        f"Cleared status for {result['name']} (will auto-detect)",
+                        style="green",
+                    )
+                else:
+                    console.print(
+                        f"{result['name']} has no manual status override",
+                        style="yellow",
+                    )
             return
     # bulk status management
     if args.bulkstatus:
@@ -641,107 +1395,114 @@ def main():
 
         games = cache_data["games"]
         manual_games = load_manual_games()
-        games = merge_games(games, manual_games)
+        index = name_index(args, merge_games(games, manual_games))
         console = Console()
-        status = load_status()
-        success_count = 0
+        with locked():
+            status = load_status()
+            stats = open_stats_snapshot()
+            success_count = 0
 
-        for game_name in game_names:
-            result = find_game_by_name(games, game_name)
+            for game_name in game_names:
+                result = find_game_by_name(index, game_name)
 
-            if result is None:
-                console.print(f"  No game found: '{game_name}'", style="red")
-            elif isinstance(result, list):
-                console.print(f"  Multiple matches: '{game_name}'", style="yellow")
-            else:
-                appid = str(result["appid"])
-                status[appid] = new_status
-                console.print(f"  Set status: {result['name']}", style="green")
-                success_count += 1
+                if result is None:
+                    console.print(f"  No game found: '{game_name}'", style="red")
+                elif isinstance(result, list):
+                    console.print(f"  Multiple matches: '{game_name}'", style="yellow")
+                else:
+                    appid = str(result["appid"])
+                    status[appid] = new_status
+                    if stats is not None:
+                        stats.remove_game(result)
+                        stats.set_override(appid, new_status)
+                        stats.add_game(result)
+                    console.print(f"  Set status: {result['name']}", style="green")
+                    success_count += 1
 
-        save_status(status)
+            save_status(status)
+            save_stats(stats)
         console.print(
             f"\nSet '{new_status}' for {success_count} game(s)", style="green"
         )
         return
 
-    # syncing, checks if user has cache already or not
-    if args.sync:
-        console = Console()
-        console.print("Syncing game library from Steam...", style="dim")
-        games = fetch_games(config["API_KEY"], config["STEAM_ID"])
+    # the saved summary answers --stats without loading the library
+    if args.stats and args.source == "all" and not (args.sync or args.check_stats):
+        stats = open_stats_snapshot()
+        if stats is not None and stats.is_current():
+            display_stats(stats)
+            return
 
-        save_cache(games)
+    # manual games only, so the Steam library is never read; fuzzy search
+    # still ranks against the whole library
+    manual_only = args.source == "manual" and not args.fuzzy
 
-        console.print("Games synced successfully!", style="green")
+    # syncing, checks if user has cache already or not; an unchanged
+    # library goes on to the listing from the cache
+    games = sync_library(config, steam_id) if args.sync else None
+
+    if games is not None:
         last_updated = datetime.now().isoformat()
+        # games is the fetched list, not the cache the sort orders describe
+        cached_at = None
+    elif supports_queries() and not (args.stats or args.check_stats or args.fuzzy):
+        # the database filters the library itself, only the sync time is needed
+        games = None
+        last_updated = cached_at = load_last_updated()
+    elif manual_only:
+        games = []
+        last_updated = cached_at = None
     else:
-
         cache_data = load_cache()
+        games = last_updated = None
 
-        if cache_data is None:
-            console = Console()
-            console.print(
-                "No cache found. Use --sync to sync the game library from Steam.",
-                style="red",
-            )
-            return
+        if cache_data is not None:
+            games = cache_data["games"]
+            last_updated = cache_data["last_updated"]
+        cached_at = last_updated
 
-        games = cache_data["games"]
-        last_updated = cache_data["last_updated"]
+    if last_updated is None and not manual_only:
+        console = Console()
+        console.print(
+            "No cache found. Use --sync to sync the game library from Steam.",
+            style="red",
+        )
+        return
 
-    manual_games = load_manual_games()
-    games = merge_games(games, manual_games)
+    # statistics
+    if args.stats or args.check_stats:
+        # locked, so no edit lands between reading and saving the summary
+        with locked():
+            library = merge_games(games, load_manual_games()).partition(args.source)
+            stats = library_stats(
+                [library.steam_games, library.manual_games], load_status()
+            )
 
-    if args.source == "steam":
-        games = [g for g in games if g.get("source") == "Steam"]
-    elif args.source == "manual":
-        games = [g for g in games if g.get("source") != "Steam"]
+            # only the whole library is worth saving for the next --stats,
+            # unless another sync replaced it since it was loaded
+            if args.source == "all":
+                if args.check_stats:
+                    check_stats_snapshot(stats)
+                if cached_at is None or load_last_updated() == cached_at:
+                    save_stats_snapshot(stats.to_dict())
 
-    # statistics
-    if args.stats:
-        display_stats(games)
+        display_stats(stats)
         return
 
-    # filtering
-    if args.search:
-        search_term = args.search.lower()
-        games = [g for g in games if search_term in g["name"].lower()]
+    # pages only fetch and render the rows they show; exports take everything
+    paged = (args.page or args.pager) and not args.export
+    if paged and args.page_size < 1:
+        console = Console()
+        console.print("--page-size must be at least 1", style="red")
+        return
 
     if args.filter_tag:
-        tags = load_tags()
-        games = [g for g in games if args.filter_tag in tags.get(str(g["appid"]), [])]
-
-    if args.filterstatus:
-        manual_status = load_status()
-        games = [
-            g for g in games if get_game_status(g, manual_status) == args.filterstatus
-        ]
-
-    if args.notplayed:
-        games = [g for g in games if g["playtime_forever"] == 0]
-    elif args.started:
-        games = [g for g in games if g["playtime_forever"] / 60 <= 2]
-    elif args.recent:
-        games = [g for g in games if g.get("playtime_2weeks", 0) > 0]
-    elif args.under:
-        games = [g for g in games if g["playtime_forever"] / 60 < args.under]
-    elif args.over:
-        games = [g for g in games if g["playtime_forever"] / 60 > args.over]
-    elif args.between:
-        min_hrs, max_hrs = args.between
-        games = [g for g in games if min_hrs <= g["playtime_forever"] / 60 <= max_hrs]
-
-    # sorting
-
-    if args.sortby == "name":
-        games = sorted(games, key=lambda g: g["name"].lower())
-    elif args.sortby == "playtime":
-        games = sorted(games, key=lambda g: g["playtime_forever"], reverse=True)
-    elif args.sortby == "playtime-asc":
-        games = sorted(games, key=lambda g: g["playtime_forever"])
-    elif args.sortby == "recent":
-        games = sorted(games, key=lambda g: g.get("rtime_last_played", 0), reverse=True)
+        try:
+            parse_tag_expression(args.filter_tag)
+        except ValueError as e:
+            console = Console()
+            console.print(f"Invalid --filter-tag: {e}", style="red")
+            return
 
     # title labeling
 
@@ -766,11 +1527,31 @@ def main():
     else:
         title = "Library"
 
-    # limits # of games displayed
-    if args.limit:
-        games = games[: args.limit]
+    queried = supports_queries() and not args.fuzzy
+    if paged and queried:
+
+        def query_rows(start, stop):
+            return query_library(args, offset=start, count=stop - start)
+
+        show_pages(args, query_rows, count_library(args), title, last_updated)
+        return
+
+    if queried:
+        games = query_library(args)
+    else:
+        games = select_games(args, games, load_manual_games(), cached_at)
+
+    if paged:
+
+        def slice_rows(start, stop):
+            return games[start:stop]
+
+        show_pages(args, slice_rows, len(games), title, last_updated)
+        return
 
     if args.export:
+        from backlog.export import export_csv, export_json, export_ndjson
+
         console = Console()
 
         if args.export == "csv":
@@ -779,9 +1560,16 @@ def main():
         elif args.export == "json":
             filename = export_json(games)
             console.print(f"Exported {len(games)} games to {filename}", style="green")
+        elif args.export == "ndjson":
+            filename = export_ndjson(games)
+            console.print(f"Exported {len(games)} games to {filename}", style="green")
         return
 
-    display_games(games, title, last_updated=last_updated)
+    output = listing_format(args)
+    if output != "table":
+        write_games(games, output)
+    else:
+        display_games(games, title, last_updated=last_updated)
 
 
 if __name__ == "__main__":
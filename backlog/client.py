@@ -0,0 +1,71 @@
+"""Thin client for the --serve daemon
+
+Imports nothing beyond the standard library, so a command answered by
+the daemon doesn't pay for loading the CLI. The daemon's worker writes
+to this process's own stdin, stdout and stderr, passed over the socket,
+so output, colours and the pager behave as if the command ran here.
+"""
+
+import json
+import os
+import signal
+import socket
+
+from . import SOCKET_FILE
+
+# commands that must run in this process, not in the daemon
+LOCAL_ONLY = ("--serve",)
+
+
+def connect(path=SOCKET_FILE):
+    """Connect to the daemon at path, or return None if none is running"""
+    if not hasattr(socket, "send_fds") or not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _read_line(stream):
+    """Read one line from the daemon, or None if it hung up first"""
+    line = stream.readline()
+    return line.decode().strip() if line.endswith(b"\n") else None
+
+
+def forward(argv, path=SOCKET_FILE):
+    """Run a command in the daemon and return its exit status
+
+    Returns None, to run the command locally instead, when no daemon is
+    listening at path or the command must run in this process.
+    """
+    if any(arg in LOCAL_ONLY for arg in argv):
+        return None
+
+    sock = connect(path)
+    if sock is None:
+        return None
+
+    request = json.dumps({"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)})
+    with sock, sock.makefile("rb") as replies:
+        # the descriptors ride on a single byte, the request follows
+        socket.send_fds(sock, [b"\0"], [0, 1, 2])
+        sock.sendall(request.encode() + b"\n")
+
+        worker = _read_line(replies)
+        if worker is None:
+            return None
+
+        while True:
+            try:
+                status = _read_line(replies)
+                break
+            except KeyboardInterrupt:
+                # Ctrl-C reaches this process, not the worker
+                os.kill(int(worker), signal.SIGINT)
+
+    return 1 if status is None else int(status)
@@ -0,0 +1,250 @@
+"""Columnar binary library format, memory-mapped on load
+
+Layout (native byte order, every section 8-byte aligned):
+
+    header        magic, version, byte order, last_updated, game count
+    appid               int64[count]
+    playtime_forever    int64[count]
+    playtime_2weeks     int64[count]
+    rtime_last_played   int64[count]
+    name offsets        uint64[count + 1]
+    names               utf-8 string table
+"""
+
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Literal, overload
+
+from .game import Game
+from .storage import atomic_open
+
+MAGIC = b"BKLG"
+VERSION = 1
+HEADER = struct.Struct("<4sHH32sQ")
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+COLUMNS = ("appid", "playtime_forever", "playtime_2weeks", "rtime_last_played")
+
+
+class NameTable(Sequence[str]):
+    """Names stored as one UTF-8 blob plus an offsets column"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return str(self._blob[start:end], "utf-8")
+
+
+class PatchedNames(Sequence[str]):
+    """Names of a base table seen through a row mapping and overrides"""
+
+    def __init__(self, base: Sequence[str], rows: Sequence[int], overrides):
+        self._base = base
+        self._rows = rows
+        self._overrides = overrides
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index: int) -> str:
+        if index in self._overrides:
+            return self._overrides[index]
+        return self._base[self._rows[index]]
+
+
+class ColumnarLibrary:
+    """Read-only library backed by fixed-width columns and a name table
+
+    Iterating or indexing yields Game records built on demand, so code
+    that only needs numbers can work on the columns without materializing
+    any games.
+    """
+
+    def __init__(self, count, last_updated, columns, names: Sequence[str], buf=None):
+        self.count = count
+        self.last_updated = last_updated
+        self._columns = columns
+        self._names = names
+        self._buf = buf
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("library index out of range")
+        return self.row(index)
+
+    @overload
+    def column(self, name: Literal["name"]) -> Sequence[str]: ...
+
+    @overload
+    def column(self, name: str) -> Sequence[int]: ...
+
+    def column(self, name):
+        """Return a column as a sequence of ints without copying
+
+        The "name" column is the name table, decoding each name on access.
+        """
+        if name == "name":
+            return self._names
+        return self._columns[name]
+
+    def name(self, index):
+        """Decode a single game name from the string table"""
+        return self._names[index]
+
+    def names(self):
+        """Decode every game name, in library order"""
+        return [self._names[i] for i in range(self.count)]
+
+    def decode_names(self):
+        """Decode the name table once and keep the strings
+
+        For processes that hold the library for many lookups; later name
+        accesses index a list instead of decoding UTF-8.
+        """
+        self._names = self.names()
+
+    def row(self, index):
+        """Materialize a single game as a Game record"""
+        columns = self._columns
+        return Game(
+            columns["appid"][index],
+            self._names[index],
+            columns["playtime_forever"][index],
+            columns["playtime_2weeks"][index],
+            columns["rtime_last_played"][index],
+        )
+
+    def where(self, column, predicate):
+        """Materialize only the games whose column value matches predicate"""
+        values = self._columns[column]
+        return [self.row(i) for i, value in enumerate(values) if predicate(value)]
+
+    def with_changes(self, upserts, removed, last_updated):
+        """Return an in-memory copy with changed, new and removed games applied
+
+        The numeric columns are copied, not turned into dicts, and names
+        keep pointing into the original table unless a game was renamed.
+        """
+        if removed:
+            appids = self._columns["appid"]
+            rows = array(
+                "q", (i for i in range(self.count) if appids[i] not in removed)
+            )
+            columns = {
+                c: array("q", (self._columns[c][i] for i in rows)) for c in COLUMNS
+            }
+        else:
+            rows = array("q", range(self.count))
+            columns = {c: array("q", self._columns[c]) for c in COLUMNS}
+
+        overrides = {}
+
+        position = {appid: i for i, appid in enumerate(columns["appid"])}
+        for game in upserts:
+            index = position.get(game["appid"])
+            if index is None:
+                index = len(rows)
+                rows.append(-1)
+                for column in COLUMNS:
+                    columns[column].append(0)
+
+            for column in COLUMNS:
+                columns[column][index] = int(game.get(column, 0))
+            overrides[index] = game["name"]
+
+        return ColumnarLibrary(
+            len(rows),
+            last_updated,
+            columns,
+            PatchedNames(self._names, rows, overrides),
+        )
+
+
+def write_library(path, games, last_updated):
+    """Write games to path in the columnar format, replacing it atomically"""
+    games = list(games)
+    count = len(games)
+
+    columns = [array("q", (int(g.get(c, 0)) for g in games)) for c in COLUMNS]
+
+    encoded = [g["name"].encode("utf-8") for g in games]
+    offsets = array("Q", [0])
+    total = 0
+    for name in encoded:
+        total += len(name)
+        offsets.append(total)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, BYTE_ORDER, last_updated.encode("ascii")[:32], count
+    )
+
+    with atomic_open(path, "wb") as f:
+        f.write(header)
+        for col in columns:
+            col.tofile(f)
+        offsets.tofile(f)
+        f.write(b"".join(encoded))
+
+
+def open_library(path):
+    """Memory-map a columnar library file
+
+    Raises ValueError if the file is truncated, from another version or
+    written with a different byte order.
+    """
+    import mmap
+
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(buf)
+    if len(view) < HEADER.size:
+        raise ValueError("library file is truncated")
+
+    magic, version, byte_order, last_updated, count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+        raise ValueError("library file has an unsupported format")
+
+    width = 8 * count
+    pos = HEADER.size
+    names_start = pos + width * len(COLUMNS) + 8 * (count + 1)
+    if len(view) < names_start:
+        raise ValueError("library file is truncated")
+
+    columns = {}
+    for column in COLUMNS:
+        columns[column] = view[pos : pos + width].cast("q")
+        pos += width
+
+    name_offsets = view[pos:names_start].cast("Q")
+    blob = view[names_start:]
+    if len(blob) < name_offsets[count]:
+        raise ValueError("library file is truncated")
+
+    return ColumnarLibrary(
+        count,
+        last_updated.rstrip(b"\0").decode("ascii"),
+        columns,
+        NameTable(name_offsets, blob),
+        buf,
+    )
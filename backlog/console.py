@@ -0,0 +1,12 @@
+"""rich's Console, imported the first time one is made
+
+Importing rich takes longer than the rest of the CLI put together, and
+commands such as piped listings never print through it.
+"""
+
+
+def Console(*args, **kwargs):
+    """Create a rich.console.Console, importing rich on first use"""
+    from rich.console import Console
+
+    return Console(*args, **kwargs)
@@ -1,20 +1,37 @@
 """Display functions for game data visualization"""
 
+import os
+import sys
 from datetime import datetime
-from rich.console import Console
-from rich.table import Table
 
-from backlog.cache import load_tags, load_status
-from backlog.utils import get_game_status
+from backlog.cache import load_tag_index, load_tags, load_status
+from backlog.console import Console
+from backlog.stats import BRACKETS
+from backlog.timing import timed
+from backlog.utils import classify_library, game_source
 
+# output formats besides the rich table, for piping (--format)
+FORMATS = ("plain", "tsv", "jsonl")
+TSV_COLUMNS = ("name", "appid", "playtime_hours", "status", "source", "tags")
+
+# rows joined into one write by write_games
+WRITE_CHUNK = 4096
+
+
+@timed("render")
+def display_games(games, title="Library", last_updated=None, page=None):
+    """Display the user's game library
+
+    page is (number, pages, total) when games is one page of a longer
+    result set.
+    """
+    from rich.table import Table
 
-def display_games(games, title="Library", last_updated=None):
-    """Display the user's game library"""
     console = Console()
     tags = load_tags()
     manual_status = load_status()
 
-    has_manual = any(g.get("source") != "Steam" for g in games)
+    has_manual = any(game_source(g) != "Steam" for g in games)
 
     table = Table(title=title)
     table.add_column("Game", justify="left", style="green", no_wrap=False)
@@ -28,12 +45,11 @@ def display_games(games, title="Library", last_updated=None):
         table.add_column("Tags", justify="left", style="yellow")
 
     # checks hours played and displays it
-    for game in games:
+    for game, status in zip(games, classify_library(games, manual_status)):
         hours = game["playtime_forever"] / 60
         appid = str(game["appid"])
         game_tags = tags.get(appid, [])
-        status = get_game_status(game, manual_status)
-        source = game.get("source", "Steam")
+        source = game_source(game)
 
         row = [game["name"], f"{hours:.2f} hours", status]
         if has_manual:
@@ -44,7 +60,11 @@ def display_games(games, title="Library", last_updated=None):
         table.add_row(*row)
 
     console.print(table)
-    console.print(f"\nTotal games: {len(games)}", style="dim")
+    if page:
+        number, pages, total = page
+        console.print(f"\nPage {number} of {pages} ({total} games)", style="dim")
+    else:
+        console.print(f"\nTotal games: {len(games)}", style="dim")
 
     # self explanatory i think
     if last_updated:
@@ -52,25 +72,175 @@ def display_games(games, title="Library", last_updated=None):
         console.print(f"Last synced: {dt.strftime('%Y-%m-%d %H:%M:%S')}", style="dim")
 
 
+def page_bounds(total, page, page_size):
+    """Return page clamped to the result set, the number of pages and its first row"""
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 1), pages)
+    return page, pages, (page - 1) * page_size
+
+
+def display_page(fetch, total, page, page_size, title="Library", last_updated=None):
+    """Display one page of a result set, fetching only the rows it shows
+
+    fetch(start, stop) returns the games in that range. Returns the page
+    actually shown, clamped to the result set, and the number of pages.
+    """
+    page, pages, start = page_bounds(total, page, page_size)
+
+    games = fetch(start, min(start + page_size, total))
+    display_games(games, title, last_updated, page=(page, pages, total))
+    return page, pages
+
+
+def page_through(fetch, total, page_size, title="Library", last_updated=None, page=1):
+    """Page through a result set: Enter or n for next, p, a number, q"""
+    console = Console()
+
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        # nobody to answer a prompt, stream every page as it is fetched
+        pages = page
+        while page <= pages:
+            page, pages = display_page(
+                fetch, total, page, page_size, title, last_updated
+            )
+            page += 1
+        return
+
+    while True:
+        console.clear()
+        page, pages = display_page(fetch, total, page, page_size, title, last_updated)
+
+        try:
+            answer = console.input(
+                "[dim]Enter/n next, p previous, page number, q quit:[/dim] "
+            )
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        answer = answer.strip().lower()
+        if answer == "q":
+            return
+        elif answer == "p":
+            page -= 1
+        elif answer.isdigit():
+            page = int(answer)
+        elif page >= pages:
+            return
+        else:
+            page += 1
+
+
+def _field(value):
+    """One TSV field, with the tabs and line breaks that would split it blanked"""
+    return value.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _plain_line(game, status, tags):
+    hours = game["playtime_forever"] / 60
+    line = f"{hours:>9.2f} hrs  {status:<9}  {game['name']}"
+
+    source = game_source(game)
+    if source != "Steam":
+        line += f"  ({source})"
+    game_tags = tags.get(str(game["appid"]))
+    if game_tags:
+        line += f"  [{', '.join(game_tags)}]"
+    return line + "\n"
+
+
+def _tsv_line(game, status, tags):
+    fields = (
+        game["name"],
+        str(game["appid"]),
+        f"{game['playtime_forever'] / 60:.2f}",
+        status,
+        game_source(game),
+        ",".join(tags.get(str(game["appid"]), [])),
+    )
+    return "\t".join(map(_field, fields)) + "\n"
+
+
+@timed("render")
+def write_games(games, fmt, out=None, header=True):
+    """Write games as plain lines, TSV or JSON lines, without rich
+
+    For piping into grep, awk or jq: one line per game, no table, colour
+    or footer, written to out (stdout by default) in large chunks. header
+    is the TSV column row, left out for the pages after the first.
+    """
+    out = out or sys.stdout
+    tags = load_tags()
+    manual_status = load_status()
+
+    if fmt == "jsonl":
+        import json
+
+        from backlog.export import export_record
+
+        def line(game, status, tags):
+            return json.dumps(export_record(game, tags, status)) + "\n"
+
+    elif fmt == "tsv":
+        line = _tsv_line
+    else:
+        line = _plain_line
+
+    try:
+        if fmt == "tsv" and header:
+            out.write("\t".join(TSV_COLUMNS) + "\n")
+
+        chunk = []
+        for game, status in zip(games, classify_library(games, manual_status)):
+            chunk.append(line(game, status, tags))
+            if len(chunk) == WRITE_CHUNK:
+                out.write("".join(chunk))
+                chunk.clear()
+        out.write("".join(chunk))
+        out.flush()
+    except BrokenPipeError:
+        # the reader (head, grep -m) stopped early; point stdout at devnull
+        # so the flush at exit doesn't fail again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+
+
+def write_pages(fetch, total, page, page_size, fmt, through=False):
+    """Write one page of a result set with write_games, or every page from it on
+
+    The output has no page breaks, so rows are fetched WRITE_CHUNK or a
+    page at a time, whichever is more, rather than one small page per query.
+    """
+    page, pages, start = page_bounds(total, page, page_size)
+    stop = total if through else min(start + page_size, total)
+    step = max(page_size, WRITE_CHUNK)
+
+    # an empty result still writes once, for the TSV header
+    for offset in range(start, max(stop, start + 1), step):
+        games = fetch(offset, min(offset + step, stop))
+        write_games(games, fmt, header=offset == start)
+
+
+@timed("render")
 def display_all_tags(games):
     """Display all tags and their game counts"""
+    from rich.table import Table
+
     console = Console()
-    tags = load_tags()
+    tags = load_tag_index()
 
     if not tags:
         console.print("No tags found. Use --tag to add tags to games", style="yellow")
         return
 
-    tag_games = {}
-    games_by_id = {str(g["appid"]): g["name"] for g in games}
-
-    for appid, game_tags in tags.items():
-        for tag in game_tags:
-            if tag not in tag_games:
-                tag_games[tag] = []
-
-            game_name = games_by_id.get(appid, f"Unknown ({appid})")
-            tag_games[tag].append(game_name)
+    # only the previewed games need their names looked up
+    tag_games = {tag: tags.games_with(tag) for tag in tags.tag_names()}
+    shown = {appid for appids in tag_games.values() for appid in appids[:3]}
+    games_by_id = {}
+    for game in games:
+        appid = str(game["appid"])
+        if appid in shown:
+            games_by_id[appid] = game["name"]
 
     table = Table(title="Tags")
     table.add_column("Tag", style="yellow")
@@ -78,52 +248,34 @@ def display_all_tags(games):
     table.add_column("Games", style="green")
 
     for tag in sorted(tag_games.keys()):
-        game_list = tag_games[tag]
-        preview = ", ".join(game_list[:3])
-        if len(game_list) > 3:
-            preview += f" (+{len(game_list) - 3} more)"
+        appids = tag_games[tag]
+        preview = ", ".join(
+            games_by_id.get(appid, f"Unknown ({appid})") for appid in appids[:3]
+        )
+        if len(appids) > 3:
+            preview += f" (+{len(appids) - 3} more)"
 
-        table.add_row(tag, str(len(game_list)), preview)
+        table.add_row(tag, str(len(appids)), preview)
 
     console.print(table)
 
 
-def display_stats(games):
-    """Display stats about the user's game library"""
+@timed("render")
+def display_stats(stats):
+    """Display stats about the user's game library from a LibraryStats"""
+    from rich.table import Table
+
     console = Console()
 
     # total games, total playtime, not played games
-    total_games = len(games)
-    total_minutes = sum(g["playtime_forever"] for g in games)
-    total_hours = total_minutes / 60
+    total_games = stats.count
+    total_hours = stats.total_minutes / 60
 
-    not_played = [g for g in games if g["playtime_forever"] == 0]
-    not_played_count = len(not_played)
+    not_played_count = stats.unplayed
     not_played_percent = (
         (not_played_count / total_games * 100) if total_games > 0 else 0
     )
 
-    played_games = [g for g in games if g["playtime_forever"] > 0]
-    avg_hours = (
-        (sum(g["playtime_forever"] for g in played_games) / 60 / len(played_games))
-        if played_games
-        else 0
-    )
-
-    most_played = max(games, key=lambda g: g["playtime_forever"]) if games else None
-    least_played = (
-        min(played_games, key=lambda g: g["playtime_forever"]) if played_games else None
-    )
-
-    brackets = [
-        ("Never played", lambda h: h == 0),
-        ("Under 1 hour", lambda h: 0 < h < 1),
-        ("1-10 hours", lambda h: 1 <= h < 10),
-        ("10-50 hours", lambda h: 10 <= h < 50),
-        ("50-100 hours", lambda h: 50 <= h < 100),
-        ("100+ hours", lambda h: h >= 100),
-    ]
-
     # initialize table
     table = Table(title="Library Statistics", show_header=False)
     table.add_column("Statistic", style="cyan")
@@ -132,21 +284,33 @@ def display_stats(games):
     table.add_row("Total Games", str(total_games))
     table.add_row("Total Playtime", f"{total_hours:.2f} hours")
     table.add_row("Not Played Games", f"{not_played_count} ({not_played_percent:.2f}%)")
-    table.add_row("Played Games", str(len(played_games)))
+    table.add_row("Played Games", str(stats.played))
 
-    if played_games:
+    if stats.played:
+        avg_hours = stats.mean_played_minutes / 60
         table.add_row("Average Playtime", f"{avg_hours:.2f} hours")
 
-    if most_played:
-        most_played_hours = most_played["playtime_forever"] / 60
+        # percentiles come from a sketch, accurate to about 1%
+        for label, q in (
+            ("Median", 0.5),
+            ("90th Percentile", 0.9),
+            ("99th Percentile", 0.99),
+        ):
+            hours = stats.percentile(q) / 60
+            table.add_row(f"{label} Playtime", f"~{hours:.2f} hours")
+
+    if stats.most_played is not None:
+        most_played_hours = stats.most_played[0] / 60
         table.add_row(
-            "Most Played", f"{most_played['name']} ({most_played_hours:.2f} hrs)"
+            "Most Played",
+            f"{stats.most_played[2]} ({most_played_hours:.2f} hrs)",
         )
 
-    if least_played:
-        least_played_hours = least_played["playtime_forever"] / 60
+    if stats.least_played is not None:
+        least_played_hours = stats.least_played[0] / 60
         table.add_row(
-            "Least Played", f"{least_played['name']} ({least_played_hours:.2f} hrs)"
+            "Least Played",
+            f"{stats.least_played[2]} ({least_played_hours:.2f} hrs)",
         )
 
     console.print(table)
@@ -158,8 +322,7 @@ def display_stats(games):
 
     bracket_data = []
 
-    for label, condition in brackets:
-        count = len([g for g in games if condition(g["playtime_forever"] / 60)])
+    for (label, bound), count in zip(BRACKETS, stats.brackets):
         percent = (count / total_games * 100) if total_games else 0
         bracket_data.append((label, count, percent))
 
@@ -199,26 +362,41 @@ def display_stats(games):
     console.print()
     console.print("[bold]Status Summary[/bold]")
 
-    manual_status = load_status()
-    status_counts = {
-        "playing": 0,
-        "backlog": 0,
-        "inactive": 0,
-        "dropped": 0,
-        "completed": 0,
-        "hold": 0,
-    }
-
-    for game in games:
-        status = get_game_status(game, manual_status)
-        status_counts[status] = status_counts.get(status, 0) + 1
-
     status_table = Table(show_header=False)
     status_table.add_column("Status", style="magenta")
-    status_table.add_colum("Count", justify="right", style="green")
+    status_table.add_column("Count", justify="right", style="green")
 
-    for status_name, count in status_counts.items():
+    for status_name, count in stats.statuses.items():
         if count > 0:
             status_table.add_row(status_name.capitalize(), str(count))
 
     console.print(status_table)
+
+
+def display_timings(wall, stages, counters):
+    """Display the --timings breakdown on stderr, so piped output stays clean"""
+    from rich.table import Table
+
+    console = Console(stderr=True)
+
+    table = Table(title=f"Timings ({wall * 1000:.1f} ms total)")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (ms)", justify="right", style="green")
+    table.add_column("Own (ms)", justify="right", style="green")
+    table.add_column("Share", justify="right", style="magenta")
+
+    # own time leaves out nested stages, so shares of it add up to at most 100%
+    for name, (calls, total, own) in stages.items():
+        share = own / wall * 100 if wall else 0
+        table.add_row(
+            name,
+            str(calls),
+            f"{total * 1000:.1f}",
+            f"{own * 1000:.1f}",
+            f"{share:.1f}%",
+        )
+
+    console.print(table)
+    for name, value in counters.items():
+        console.print(f"{name}: {value}", style="dim")
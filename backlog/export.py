@@ -5,16 +5,21 @@ import json
 from datetime import datetime
 
 from backlog.cache import load_tags, load_status
-from backlog.utils import get_game_status
+from backlog.timing import timed
+from backlog.utils import classify_library, game_source
 
+# large buffer so records are flushed to disk in few, big writes
+WRITE_BUFFER = 1024 * 1024
 
+
+@timed("export")
 def export_csv(games, filename="backlog.csv"):
     """Export games to CSV file"""
 
     tags = load_tags()
     manual_status = load_status()
 
-    with open(filename, "w", newline="", encoding="utf-8") as f:
+    with open(filename, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f:
         writer = csv.writer(f)
         writer.writerow(
             [
@@ -28,7 +33,7 @@ def export_csv(games, filename="backlog.csv"):
             ]
         )
 
-        for game in games:
+        for game, status in zip(games, classify_library(games, manual_status)):
             hours = game["playtime_forever"] / 60
             appid = str(game["appid"])
             last_played = game.get("rtime_last_played", 0)
@@ -38,8 +43,7 @@ def export_csv(games, filename="backlog.csv"):
             else:
                 last_played = "Never"
 
-            status = get_game_status(game, manual_status)
-            source = game.get("source", "Steam")
+            source = game_source(game)
             game_tags = ", ".join(tags.get(appid, []))
 
             writer.writerow(
@@ -57,38 +61,60 @@ def export_csv(games, filename="backlog.csv"):
     return filename
 
 
+def export_record(game, tags, status):
+    """Build the exported representation of a single game"""
+    hours = game["playtime_forever"] / 60
+    appid = str(game["appid"])
+    last_played = game.get("rtime_last_played", 0)
+
+    if last_played > 0:
+        last_played = datetime.fromtimestamp(last_played).strftime("%Y-%m-%d")
+    else:
+        last_played = None
+
+    return {
+        "name": game["name"],
+        "appid": game["appid"],
+        "playtime_hours": round(hours, 2),
+        "status": status,
+        "source": game_source(game),
+        "last_played": last_played,
+        "tags": tags.get(appid, []),
+    }
+
+
+@timed("export")
 def export_json(games, filename="backlog.json"):
-    """Export games to JSON file"""
+    """Export games to JSON file, streaming one record at a time"""
     tags = load_tags()
     manual_status = load_status()
 
-    export_data = []
-
-    for game in games:
-        hours = game["playtime_forever"] / 60
-        appid = str(game["appid"])
-        last_played = game.get("rtime_last_played", 0)
-
-        if last_played > 0:
-            last_played = datetime.fromtimestamp(last_played).strftime("%Y-%m-%d")
-        else:
-            last_played = None
-
-        status = get_game_status(game, manual_status)
-        source = game.get("source", "Steam")
-        export_data.append(
-            {
-                "name": game["name"],
-                "appid": game["appid"],
-                "playtime_hours": round(hours, 2),
-                "status": status,
-                "source": source,
-                "last_played": last_played,
-                "tags": tags.get(appid, []),
-            }
-        )
+    # output matches json.dump(records, f, indent=2) without holding the list
+    with open(filename, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        f.write("[")
+        separator = "\n"
+
+        for game, status in zip(games, classify_library(games, manual_status)):
+            record = json.dumps(export_record(game, tags, status), indent=2)
+            f.write(separator)
+            f.write("  ")
+            f.write(record.replace("\n", "\n  "))
+            separator = ",\n"
+
+        f.write("]" if separator == "\n" else "\n]")
+
+    return filename
+
+
+@timed("export")
+def export_ndjson(games, filename="backlog.ndjson"):
+    """Export games to newline-delimited JSON, one record per line"""
+    tags = load_tags()
+    manual_status = load_status()
 
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(export_data, f, indent=2)
+    with open(filename, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        for game, status in zip(games, classify_library(games, manual_status)):
+            f.write(json.dumps(export_record(game, tags, status)))
+            f.write("\n")
 
     return filename
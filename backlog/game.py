@@ -0,0 +1,91 @@
+"""Compact record for one game of the Steam library"""
+
+from typing import ClassVar
+
+
+class Game:
+    """One Steam library game, keeping only the fields the tool uses
+
+    Steam sends a dozen fields per game (icon hashes, per-OS playtimes,
+    ...) and a dict of them costs several hundred bytes; a slotted record
+    costs a fraction of that. It reads like the dicts it replaces
+    (game["name"], game.get("playtime_2weeks", 0)), so code takes records
+    and manual game dicts alike. Records are always Steam games, which is
+    how utils.game_source tells them from manual ones.
+    """
+
+    __slots__ = (
+        "appid",
+        "name",
+        "playtime_forever",
+        "playtime_2weeks",
+        "rtime_last_played",
+    )
+
+    def __init__(
+        self,
+        appid,
+        name,
+        playtime_forever=0,
+        playtime_2weeks=0,
+        rtime_last_played=0,
+    ):
+        self.appid = appid
+        self.name = name
+        self.playtime_forever = playtime_forever
+        self.playtime_2weeks = playtime_2weeks
+        self.rtime_last_played = rtime_last_played
+
+    @classmethod
+    def from_dict(cls, game):
+        """Build a record from a Steam or cached game dict, dropping other fields"""
+        if isinstance(game, cls):
+            return game
+        return cls(
+            game["appid"],
+            game["name"],
+            game.get("playtime_forever", 0),
+            game.get("playtime_2weeks", 0),
+            game.get("rtime_last_played", 0),
+        )
+
+    def to_dict(self):
+        """Return the stored fields as a dict, as games.json holds them"""
+        return {field: getattr(self, field) for field in Game.__slots__}
+
+    def __getitem__(self, key):
+        if key not in Game.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in Game.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in Game.__slots__
+
+    def get(self, key, default=None):
+        """Return a field like dict.get, default for fields records don't have"""
+        if key not in Game.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Game):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in Game.__slots__)
+
+    # mutable and compared by value, so unhashable like the dicts it replaces
+    __hash__: ClassVar[None] = None
+
+    def __repr__(self):
+        return f"Game({self.to_dict()!r})"
+
+
+def to_json(value):
+    """json default= hook writing records as their dicts"""
+    if isinstance(value, Game):
+        return value.to_dict()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,129 @@
+"""In-memory name index for looking games up by exact or partial name"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+# substring lookups switch to trigram postings once this many have run
+POSTINGS_AFTER = 256
+GRAM = 3
+
+
+def _grams(text):
+    """Return the distinct trigrams of text"""
+    return {text[i : i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class GameIndex:
+    """Lowercased names of a game list, built once and queried many times
+
+    Exact matches come from a hash map. Repeated substring matches search
+    one newline-joined blob of the names with str.find, mapping hits back
+    to games by offset, so a lookup never lowercases or visits every game.
+    A long-lived index that keeps answering substring lookups builds
+    trigram postings instead, which narrow each lookup to a few names.
+
+    With a search index built over the same games, find settles ambiguous
+    or missing matches by fuzzy score when one game clearly wins.
+    """
+
+    def __init__(self, games, search_index=None):
+        self.games = games if isinstance(games, list) else list(games)
+        self.search_index = search_index
+        self._lower = [game["name"].lower() for game in self.games]
+        self._blob = None
+        self._starts = None
+        self._exact = None
+        self._postings = None
+        self._lookups = 0
+
+    def __len__(self):
+        return len(self.games)
+
+    def _build_postings(self):
+        """Map every trigram to the positions of the names containing it"""
+        postings = {}
+        for i, name in enumerate(self._lower):
+            for gram in _grams(name):
+                postings.setdefault(gram, []).append(i)
+        self._postings = postings
+
+    def _scan(self, term):
+        """Positions of the names containing term, found in the blob"""
+        if self._lookups == 1:
+            # a single --search is cheaper as one pass than building the blob
+            return [i for i, name in enumerate(self._lower) if term in name]
+
+        blob = self._blob
+        starts = self._starts
+        if blob is None or starts is None:
+            blob = self._blob = "\n".join(self._lower)
+            starts = self._starts = [0]
+            starts += accumulate(len(name) + 1 for name in self._lower)
+
+        positions = []
+
+        pos = blob.find(term)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            positions.append(i)
+            pos = blob.find(term, starts[i + 1])
+
+        return positions
+
+    def _positions(self, term):
+        """Positions of the names containing term, in library order"""
+        if "\n" in term:
+            return []
+
+        self._lookups += 1
+        if self._postings is None and self._lookups > POSTINGS_AFTER:
+            self._build_postings()
+        if self._postings is None or len(term) < GRAM:
+            return self._scan(term)
+
+        lists = []
+        for gram in _grams(term):
+            positions = self._postings.get(gram)
+            if positions is None:
+                return []
+            lists.append(positions)
+
+        # the rarest trigram bounds the candidates, the check does the rest
+        lower = self._lower
+        return [i for i in min(lists, key=len) if term in lower[i]]
+
+    def search(self, term):
+        """Return every game whose name contains term, in library order"""
+        return [self.games[i] for i in self._positions(term.lower())]
+
+    def find(self, term):
+        """Look a game up like find_game_by_name
+
+        Returns the game whose name equals term, else the only game whose
+        name contains it, a list of games if several do, or None. With a
+        search index, a clear best fuzzy match is returned instead of a
+        list or None.
+        """
+        if self._exact is None:
+            self._exact = {}
+            for i, name in enumerate(self._lower):
+                self._exact.setdefault(name, i)
+
+        term_lower = term.lower()
+        exact = self._exact.get(term_lower)
+        if exact is not None:
+            return self.games[exact]
+
+        positions = self._positions(term_lower)
+        if len(positions) == 1:
+            return self.games[positions[0]]
+
+        if self.search_index is not None:
+            best = self.search_index.resolve(term, positions or None)
+            if best is not None:
+                return self.games[best]
+
+        if positions:
+            return [self.games[i] for i in positions]
+
+        return None
@@ -0,0 +1,216 @@
+"""Persisted sort orders of the merged library
+
+A SortIndex holds, for each --sortby order, the merged library positions
+(Steam games first, then manual games, as merge_games lays them out) in
+sorted order, so a sorted listing walks an array instead of sorting, and
+a playtime range is two binary searches. The file layout (native byte
+order):
+
+    header        magic, version, byte order, last_updated, counts
+    orders        uint32[steam + manual] for each of ORDERS
+"""
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from .columnar import ColumnarLibrary
+from .storage import atomic_open
+
+MAGIC = b"BKSO"
+VERSION = 1
+HEADER = struct.Struct("<4sHH32sQQ")
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+# the column each order sorts on and how its value becomes an ascending key;
+# ties keep library order, as the sorts in query.SORT_KEYS do
+ORDERS = {
+    "name": ("name", str.lower),
+    "playtime": ("playtime_forever", lambda v: -v),
+    "playtime-asc": ("playtime_forever", lambda v: v),
+    "recent": ("rtime_last_played", lambda v: -v),
+}
+
+
+class SortIndex:
+    """Sort orders of one merged library, by position in that library
+
+    The Steam library and manual games it was built from are kept, to
+    look up the values a binary search or an incremental update needs.
+    """
+
+    def __init__(self, last_updated, steam_count, manual_count, orders):
+        self.last_updated = last_updated
+        self.steam_count = steam_count
+        self.manual_count = manual_count
+        self.orders = orders
+        # empty until bind() attaches the libraries the index was built from
+        self.steam_games = []
+        self.manual_games = []
+
+    def __len__(self):
+        return self.steam_count + self.manual_count
+
+    @classmethod
+    def build(cls, steam_games, manual_games, last_updated):
+        """Sort the merged library once for every order"""
+        steam_count = len(steam_games)
+        orders = {}
+
+        for name, (column, key) in ORDERS.items():
+            keys = [key(v) for v in _values(column, steam_games, manual_games)]
+            orders[name] = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+
+        index = cls(last_updated, steam_count, len(manual_games), orders)
+        return index.bind(steam_games, manual_games)
+
+    def bind(self, steam_games, manual_games):
+        """Attach the libraries the index was built from"""
+        self.steam_games = steam_games
+        self.manual_games = manual_games
+        return self
+
+    def matches(self, steam_games, manual_games, last_updated):
+        """Whether the index was built from a library of this shape and sync"""
+        return (
+            self.last_updated == last_updated
+            and self.steam_count == len(steam_games)
+            and self.manual_count == len(manual_games)
+        )
+
+    def value(self, column, position):
+        """Look a column value up by merged position"""
+        if position >= self.steam_count:
+            return self.manual_games[position - self.steam_count].get(column, 0)
+        if isinstance(self.steam_games, ColumnarLibrary):
+            return self.steam_games.column(column)[position]
+        return self.steam_games[position].get(column, 0)
+
+    def _key(self, name):
+        """The sort key of a position in order name, ties broken by position"""
+        column, key = ORDERS[name]
+        return lambda position: (key(self.value(column, position)), position)
+
+    def positions(self, sortby=None, hours=None):
+        """Merged positions in sortby order, or library order without one
+
+        hours is (min, max, strict) as hours_predicate takes it, and keeps
+        only positions whose playtime_forever falls in that range.
+        """
+        if hours is None:
+            return self.orders[sortby] if sortby else range(len(self))
+
+        min_hrs, max_hrs, strict = hours
+        ascending = self.orders["playtime-asc"]
+        hours_at = lambda position: self.value("playtime_forever", position) / 60
+
+        lo, hi = 0, len(ascending)
+        if min_hrs is not None:
+            bisect = bisect_right if strict else bisect_left
+            lo = bisect(ascending, min_hrs, key=hours_at)
+        if max_hrs is not None:
+            bisect = bisect_left if strict else bisect_right
+            hi = bisect(ascending, max_hrs, lo, key=hours_at)
+
+        candidates = ascending[lo:hi]
+        if sortby == "playtime-asc":
+            return candidates
+        if not sortby:
+            return sorted(candidates)
+
+        keep = set(candidates)
+        return [position for position in self.orders[sortby] if position in keep]
+
+    def add_manual(self):
+        """Place the manual game that was just appended"""
+        position = len(self)
+        self.manual_count += 1
+        for name, order in self.orders.items():
+            insort(order, position, key=self._key(name))
+
+    def update_manual(self, game):
+        """Re-place a manual game whose playtime or last played time changed"""
+        position = self.steam_count + self.manual_games.index(game)
+        for name, order in self.orders.items():
+            if ORDERS[name][0] != "name":
+                order.remove(position)
+                insort(order, position, key=self._key(name))
+
+    def remove_manual(self, index):
+        """Drop the manual game that was at manual_games[index]
+
+        Call it before the game leaves manual_games; later manual games
+        move up one position.
+        """
+        position = self.steam_count + index
+        for name, order in self.orders.items():
+            self.orders[name] = array(
+                "I", (p - (p > position) for p in order if p != position)
+            )
+        self.manual_count -= 1
+
+
+def _values(column, steam_games, manual_games):
+    """A column of the merged library, without building Steam game dicts"""
+    if isinstance(steam_games, ColumnarLibrary):
+        if column == "name":
+            values = steam_games.names()
+        else:
+            values = list(steam_games.column(column))
+    else:
+        values = [g.get(column, 0) for g in steam_games]
+    return values + [g.get(column, 0) for g in manual_games]
+
+
+def write_index(path, index):
+    """Write index to path, replacing it atomically"""
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        BYTE_ORDER,
+        index.last_updated.encode("ascii")[:32],
+        index.steam_count,
+        index.manual_count,
+    )
+
+    with atomic_open(path, "wb") as f:
+        f.write(header)
+        for name in ORDERS:
+            index.orders[name].tofile(f)
+
+
+def read_index(path):
+    """Load an index written by write_index
+
+    Raises ValueError if the file is truncated, from another version or
+    written with a different byte order.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError("sort index is truncated")
+
+    magic, version, byte_order, last_updated, steam_count, manual_count = (
+        HEADER.unpack_from(data)
+    )
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+        raise ValueError("sort index has an unsupported format")
+
+    view = memoryview(data)
+    total = steam_count + manual_count
+    pos = HEADER.size
+    orders = {}
+    for name in ORDERS:
+        order = array("I")
+        end = pos + order.itemsize * total
+        if end > len(data):
+            raise ValueError("sort index is truncated")
+        order.frombytes(view[pos:end])
+        orders[name] = order
+        pos = end
+
+    return SortIndex(
+        last_updated.rstrip(b"\0").decode("ascii"), steam_count, manual_count, orders
+    )
@@ -0,0 +1,135 @@
+"""Lazy filter, sort and limit pipeline over the merged library"""
+
+import heapq
+from itertools import islice
+
+from .columnar import ColumnarLibrary
+from .timing import timed
+
+# predicate costs; cheaper predicates run first so costly ones see fewer games
+COLUMN = 0
+LOOKUP = 1
+CLASSIFY = 2
+TEXT = 3
+
+# every key sorts ascending, so descending orders negate their value
+SORT_KEYS = {
+    "name": lambda g: g["name"].lower(),
+    "playtime": lambda g: -g["playtime_forever"],
+    "playtime-asc": lambda g: g["playtime_forever"],
+    "recent": lambda g: -g.get("rtime_last_played", 0),
+}
+
+
+class Query:
+    """A query plan: predicates, an optional sort key and an optional limit
+
+    Nothing is evaluated until run. Column predicates test one value, a
+    number or the name, and on a columnar library run on the raw columns
+    so only the games that pass become dicts. The other predicates are
+    chained as lazy filters. Either kind runs cheapest first. A sort
+    combined with a limit keeps the top k with a heap instead of sorting
+    everything; ties keep library order either way.
+    """
+
+    def __init__(self, key=None, limit=None):
+        self.key = key
+        self._predicates = []
+        self.limit_to(limit)
+
+    def where(self, predicate, cost=LOOKUP, column=None):
+        """Keep the games for which predicate(game) is true
+
+        With column, predicate is given only game[column] instead, and on
+        a columnar library it runs before the game becomes a dict.
+        """
+        self._predicates.append((cost, column, predicate))
+        return self
+
+    def order_by(self, key):
+        """Sort by key(game), ascending"""
+        self.key = key
+        return self
+
+    def limit_to(self, limit):
+        """Keep at most limit games; None or 0 keeps all of them
+
+        Raises ValueError for a negative limit, which --limit rejects
+        before it gets here.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must not be negative, got {limit}")
+        self.limit = limit
+        return self
+
+    def _plan(self, columns):
+        """Predicates in the order they run, cheapest first"""
+        # a stable sort, so equal-cost predicates keep the order they came in
+        ordered = sorted(self._predicates, key=lambda p: p[0])
+        return [(c, p) for cost, c, p in ordered if (c is not None) == columns]
+
+    def rows(self, games):
+        """Yield the games of one library that pass the column predicates"""
+        checks = self._plan(columns=True)
+        if not checks:
+            yield from games
+            return
+
+        if isinstance(games, ColumnarLibrary):
+            indices = range(len(games))
+            for column, predicate in checks:
+                values = games.column(column)
+                indices = [i for i in indices if predicate(values[i])]
+            for i in indices:
+                yield games.row(i)
+            return
+
+        for game in games:
+            if all(predicate(game.get(c, 0)) for c, predicate in checks):
+                yield game
+
+    def merged(self, steam_games, manual_games):
+        """Yield the matching rows of both libraries, in merge_games order"""
+        yield from self.rows(steam_games)
+        yield from self.rows(manual_games)
+
+    def indexed(self, index, positions, steam=True):
+        """Like merged, but yielding the games at positions, in that order
+
+        index is the SortIndex the positions come from; without steam only
+        its manual games are yielded. Column predicates run on the values
+        at each position, before the game becomes a dict.
+        """
+        checks = self._plan(columns=True)
+        value = index.value
+        steam_games = index.steam_games
+        steam_count = index.steam_count
+        if isinstance(steam_games, ColumnarLibrary):
+            row = steam_games.row
+        else:
+            row = steam_games.__getitem__
+
+        for position in positions:
+            if position < steam_count and not steam:
+                continue
+            if checks and not all(p(value(c, position)) for c, p in checks):
+                continue
+            if position < steam_count:
+                yield row(position)
+            else:
+                yield index.manual_games[position - steam_count]
+
+    @timed("filter + sort")
+    def run(self, games):
+        """Apply the other predicates, the order and the limit to games
+
+        games is typically rows() or merged(); returns a list.
+        """
+        for column, predicate in self._plan(columns=False):
+            games = filter(predicate, games)
+
+        if self.key is None:
+            return list(islice(games, self.limit or None))
+        if self.limit:
+            return heapq.nsmallest(self.limit, games, key=self.key)
+        return sorted(games, key=self.key)
@@ -0,0 +1,213 @@
+"""Ranked fuzzy name search over a persisted trigram index
+
+Names are normalized (accents, case and punctuation dropped) and split
+into words; each word contributes the trigrams of "  word ", so
+"witcher 3" still finds "The Witcher® 3: Wild Hunt" and survives a typo
+or two. The index file layout (native byte order):
+
+    header        magic, version, byte order, names digest, counts
+    sizes         uint16[count]      distinct trigrams per name
+    offsets       uint64[grams + 1]  where each trigram's postings start
+    postings      uint32[total]      name positions, ascending per trigram
+    grams         newline-joined utf-8 trigrams
+"""
+
+import heapq
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+
+from .storage import atomic_open
+
+MAGIC = b"BKSX"
+VERSION = 1
+HEADER = struct.Struct("<4sHH32sQQQ")
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+# results scoring below this are not similar enough to show
+MIN_SCORE = 0.35
+# an ambiguous name resolves to the best match if it scores at least this
+RESOLVE_SCORE = 0.6
+# and beats the runner-up by this much
+RESOLVE_MARGIN = 0.1
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Lowercase text, strip accents and punctuation, keep single spaces"""
+    if not text.isascii():
+        import unicodedata
+
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(WORD.findall(text.lower()))
+
+
+def trigrams(text):
+    """Return the distinct word trigrams of normalized text"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def names_digest(names):
+    """Fingerprint a list of names, to tell whether an index still fits it"""
+    import hashlib
+
+    return hashlib.blake2b("\n".join(names).encode("utf-8")).digest()[:32]
+
+
+class SearchIndex:
+    """Trigram postings for a list of names, queried by similarity"""
+
+    def __init__(self, digest, sizes, grams, offsets, postings):
+        self.digest = digest
+        self._sizes = sizes
+        self._grams = grams
+        self._offsets = offsets
+        self._postings = postings
+
+    def __len__(self):
+        return len(self._sizes)
+
+    @classmethod
+    def build(cls, names):
+        """Index names; positions in results refer to this list"""
+        names = list(names)
+        lists = {}
+        sizes = array("H")
+
+        for position, name in enumerate(names):
+            grams = trigrams(normalize(name))
+            sizes.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                lists.setdefault(gram, []).append(position)
+
+        offsets = array("Q", [0])
+        postings = array("I")
+        grams = {}
+        for i, (gram, positions) in enumerate(lists.items()):
+            grams[gram] = i
+            postings.extend(positions)
+            offsets.append(len(postings))
+
+        return cls(names_digest(names), sizes, grams, offsets, postings)
+
+    def _common(self, query_grams):
+        """Count the query trigrams each name shares"""
+        common = Counter()
+        postings = memoryview(self._postings)
+        for gram in query_grams:
+            i = self._grams.get(gram)
+            if i is not None:
+                common.update(postings[self._offsets[i] : self._offsets[i + 1]])
+        return common
+
+    def search(self, query, limit=None, min_score=MIN_SCORE, positions=None):
+        """Rank names by similarity to query
+
+        Returns (position, score) pairs, best first and ties in list order.
+        The score mostly rewards covering the query's trigrams, and a little
+        how few other trigrams a name has; it ranges from 0 to 1. With
+        positions, only those names are ranked.
+        """
+        query_grams = trigrams(normalize(query))
+        if not query_grams:
+            return []
+
+        wanted = len(query_grams)
+        sizes = self._sizes
+        common = self._common(query_grams)
+        if positions is not None:
+            common = {p: common[p] for p in positions if p in common}
+
+        scored = []
+        for position, shared in common.items():
+            score = 0.75 * shared / wanted + 0.25 * shared / (
+                wanted + sizes[position] - shared
+            )
+            if score >= min_score:
+                scored.append((score, -position))
+
+        if limit is None:
+            scored.sort(reverse=True)
+        else:
+            scored = heapq.nlargest(limit, scored)
+        return [(-position, score) for score, position in scored]
+
+    def resolve(self, query, positions=None):
+        """Return the position of the one clear best match, or None"""
+        ranked = self.search(
+            query, limit=2, min_score=RESOLVE_SCORE, positions=positions
+        )
+        if not ranked:
+            return None
+        if len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= RESOLVE_MARGIN:
+            return ranked[0][0]
+        return None
+
+
+def write_index(path, index):
+    """Write index to path, replacing it atomically"""
+    grams = "\n".join(index._grams).encode("utf-8")
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        BYTE_ORDER,
+        index.digest,
+        len(index._sizes),
+        len(index._grams),
+        len(index._postings),
+    )
+
+    with atomic_open(path, "wb") as f:
+        f.write(header)
+        index._sizes.tofile(f)
+        index._offsets.tofile(f)
+        index._postings.tofile(f)
+        f.write(grams)
+
+
+def read_index(path):
+    """Load an index written by write_index
+
+    Raises ValueError if the file is truncated, from another version or
+    written with a different byte order.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError("search index is truncated")
+
+    magic, version, byte_order, digest, count, gram_count, total = HEADER.unpack_from(
+        data
+    )
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+        raise ValueError("search index has an unsupported format")
+
+    view = memoryview(data)
+    pos = HEADER.size
+    sections = []
+    for typecode, length in (("H", count), ("Q", gram_count + 1), ("I", total)):
+        section = array(typecode)
+        end = pos + section.itemsize * length
+        if end > len(data):
+            raise ValueError("search index is truncated")
+        section.frombytes(view[pos:end])
+        sections.append(section)
+        pos = end
+
+    sizes, offsets, postings = sections
+    grams = str(view[pos:], "utf-8").split("\n") if gram_count else []
+    if len(grams) != gram_count:
+        raise ValueError("search index is truncated")
+
+    return SearchIndex(
+        digest, sizes, {gram: i for i, gram in enumerate(grams)}, offsets, postings
+    )
@@ -0,0 +1,233 @@
+"""--serve: a daemon that keeps the library in memory between commands
+
+The daemon loads the cache once and listens on cache/backlog.sock. Each
+command sent by backlog.client runs in a worker forked from it, so it
+starts with the CLI imported and the library, indexes, tags and statuses
+loaded, and whatever it changes stays in the worker. Between commands the
+daemon re-reads cache files that changed, and syncs from Steam in the
+background every SERVE_SYNC_INTERVAL seconds.
+"""
+
+import gc
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from rich.console import Console
+from rich.table import Table
+
+from . import SOCKET_FILE, cache
+from .client import connect
+from .columnar import ColumnarLibrary
+from .utils import library_names
+
+# how often an idle daemon reaps workers, reloads changed files and
+# checks whether a sync is due, in seconds
+POLL_INTERVAL = 1.0
+
+
+def warm(held):
+    """Load the cache into memory, re-reading only the files that changed
+
+    held keeps the library and manual games of the last call, to prepare
+    lookups again only when one of them was reloaded.
+    """
+    # a database connection must not be shared with forked workers
+    if cache.supports_queries():
+        return
+
+    cache_data = cache.load_cache()
+    manual_games = cache.load_manual_games()
+    cache.load_tags()
+    cache.load_status()
+    cache.load_stats_snapshot()
+
+    if cache_data is None:
+        return
+
+    games = cache_data["games"]
+    if games is held.get("games") and manual_games is held.get("manual_games"):
+        return
+
+    if isinstance(games, ColumnarLibrary) and games is not held.get("games"):
+        games.decode_names()
+    cache.load_sort_index(manual_games, games, cache_data["last_updated"])
+    if os.path.exists(cache.SEARCH_INDEX_FILE):
+        cache.load_search_index(library_names(games, manual_games))
+
+    held["games"] = games
+    held["manual_games"] = manual_games
+
+
+def warm_rendering():
+    """Render throwaway output, so workers skip rich's first-use setup
+
+    Emoji codes, markup, styles and highlighter patterns are loaded or
+    compiled on the first print; done here once, every forked worker
+    starts with them ready.
+    """
+    table = Table(title="Backlog")
+    table.add_column("Game", style="cyan")
+    table.add_column("Hours", justify="right")
+    table.add_row("[bold]Game[/bold] :video_game:", "1.00 hours")
+
+    console = Console(file=io.StringIO(), force_terminal=True)
+    console.print(table, style="green")
+    console.print("Total games: 1 (1.00 hours, 2026-01-01 00:00:00)", style="dim")
+
+
+def run_command(argv):
+    """Run one CLI command in this process, returning its exit status"""
+    # imported here, as the CLI imports this module for --serve
+    from .cli import main
+
+    sys.argv = ["main.py", *argv]
+    try:
+        main()
+        status = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            status = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except KeyboardInterrupt:
+        status = 130
+    except Exception:
+        traceback.print_exc()
+        status = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return status
+
+
+def _answer(conn):
+    """Run a client's command on its own stdin, stdout and stderr"""
+    _, fds, _, _ = socket.recv_fds(conn, 1, 3)
+    if len(fds) != 3:
+        return 1
+
+    with conn.makefile("rb") as requests:
+        request = json.loads(requests.readline())
+
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+
+    # the client forwards Ctrl-C to this pid
+    conn.sendall(f"{os.getpid()}\n".encode())
+    status = run_command(request["argv"])
+    conn.sendall(f"{status}\n".encode())
+    return 0
+
+
+def _fork(work, *close):
+    """Run work() in a forked worker, returning the worker's pid"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # the collector then skips what the worker inherits, so touching it
+    # doesn't copy every page of the library into the worker
+    gc.freeze()
+
+    pid = os.fork()
+    if pid:
+        return pid
+
+    status = 1
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        for sock in close:
+            sock.close()
+        status = work()
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os._exit(status)
+
+
+def _reap(syncing):
+    """Collect finished workers, returning the sync worker's pid if it runs"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return syncing
+        if pid == 0:
+            return syncing
+        if pid == syncing:
+            syncing = None
+
+
+def serve(sync_argv, interval, path=SOCKET_FILE):
+    """Answer client commands until interrupted
+
+    Every interval seconds, unless it is 0, a worker runs sync_argv.
+    """
+    console = Console()
+
+    if not hasattr(os, "fork") or not hasattr(socket, "recv_fds"):
+        console.print("Error: --serve needs a Unix system", style="red")
+        sys.exit(1)
+
+    running = connect(path)
+    if running is not None:
+        running.close()
+        console.print(f"Error: a daemon is already serving {path}", style="red")
+        sys.exit(1)
+
+    cache.ensure_cache()
+    if os.path.exists(path):
+        os.remove(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # only this user may send commands
+    umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    server.settimeout(POLL_INTERVAL)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    cache.keep_loaded()
+    held = {}
+    warm(held)
+    warm_rendering()
+    console.print(f"Serving on {path}, Ctrl-C to stop", style="green")
+
+    next_sync = time.monotonic() + interval if interval else None
+    syncing = None
+    try:
+        while True:
+            syncing = _reap(syncing)
+            if next_sync is not None and time.monotonic() >= next_sync:
+                if syncing is None:
+                    syncing = _fork(lambda: run_command(sync_argv), server)
+                next_sync = time.monotonic() + interval
+
+            try:
+                conn, _ = server.accept()
+            except TimeoutError:
+                warm(held)
+                continue
+
+            with conn:
+                warm(held)
+                _fork(lambda: _answer(conn), server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+        console.print("Stopped serving", style="dim")
@@ -0,0 +1,385 @@
+"""SQLite storage for games, manual games, tags and status overrides"""
+
+from .game import Game
+from .tags import parse_tag_expression
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    kind TEXT NOT NULL,
+    appid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    playtime_forever INTEGER NOT NULL DEFAULT 0,
+    playtime_2weeks INTEGER NOT NULL DEFAULT 0,
+    rtime_last_played INTEGER NOT NULL DEFAULT 0,
+    platform TEXT,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (kind, appid)
+);
+CREATE INDEX IF NOT EXISTS games_appid ON games (appid);
+CREATE INDEX IF NOT EXISTS games_name_lower ON games (name_lower);
+CREATE INDEX IF NOT EXISTS games_playtime ON games (playtime_forever);
+CREATE INDEX IF NOT EXISTS games_hours ON games (playtime_forever / 60.0);
+CREATE INDEX IF NOT EXISTS games_order ON games (kind, position);
+
+CREATE TABLE IF NOT EXISTS tags (
+    appid TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (appid, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag, appid);
+
+CREATE TABLE IF NOT EXISTS status (
+    appid TEXT PRIMARY KEY,
+    status TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+GAME_FIELDS = ("playtime_forever", "playtime_2weeks", "rtime_last_played")
+
+# mirrors utils.classify_status so --filterstatus can run in SQL
+STATUS_EXPR = """
+COALESCE(
+    s.status,
+    CASE
+        WHEN g.playtime_2weeks > 0 THEN 'playing'
+        WHEN g.playtime_forever = 0 THEN 'backlog'
+        WHEN g.rtime_last_played > 0 AND g.rtime_last_played < :cutoff
+            THEN 'dropped'
+        ELSE 'inactive'
+    END
+)
+"""
+
+SOURCE_EXPR = (
+    "CASE WHEN g.kind = 'steam' THEN 'Steam' ELSE COALESCE(g.platform, 'Manual') END"
+)
+
+SORT_ORDERS = {
+    "name": "g.name_lower",
+    "playtime": "g.playtime_forever DESC",
+    "playtime-asc": "g.playtime_forever",
+    "recent": "g.rtime_last_played DESC",
+}
+
+
+def connect(path):
+    """Open the database, creating the schema if needed
+
+    Returns the connection and whether the database was freshly created.
+    """
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    fresh = (
+        conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'games'"
+        ).fetchone()[0]
+        == 0
+    )
+    conn.executescript(SCHEMA)
+    return conn, fresh
+
+
+def _row_to_game(row):
+    """Convert a games row back into a Game, or a dict for a manual game"""
+    if row["kind"] == "steam":
+        return Game(
+            int(row["appid"]),
+            row["name"],
+            *(row[field] for field in GAME_FIELDS),
+        )
+
+    game = {"appid": row["appid"], "name": row["name"], "platform": row["platform"]}
+    for field in GAME_FIELDS:
+        game[field] = row[field]
+    return game
+
+
+def _replace_games(conn, kind, games):
+    """Replace every game of one kind, keeping list order in position"""
+    with conn:
+        conn.execute("DELETE FROM games WHERE kind = ?", (kind,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    kind,
+                    str(g["appid"]),
+                    g["name"],
+                    g["name"].lower(),
+                    g.get("playtime_forever", 0),
+                    g.get("playtime_2weeks", 0),
+                    g.get("rtime_last_played", 0),
+                    g.get("platform"),
+                    position,
+                )
+                for position, g in enumerate(games)
+            ),
+        )
+
+
+def _load_games(conn, kind):
+    """Load every game of one kind in list order"""
+    rows = conn.execute("SELECT * FROM games WHERE kind = ? ORDER BY position", (kind,))
+    return [_row_to_game(row) for row in rows]
+
+
+def save_games(conn, games, last_updated):
+    """Replace the Steam library and record the sync time"""
+    _replace_games(conn, "steam", games)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('last_updated', ?)", (last_updated,)
+        )
+
+
+def apply_changes(conn, upserts, removed, last_updated):
+    """Upsert changed Steam games and delete removed ones in one transaction"""
+    with conn:
+        next_position = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM games WHERE kind = 'steam'"
+        ).fetchone()[0]
+
+        for game in upserts:
+            appid = str(game["appid"])
+            values = (
+                game["name"],
+                game["name"].lower(),
+                game.get("playtime_forever", 0),
+                game.get("playtime_2weeks", 0),
+                game.get("rtime_last_played", 0),
+            )
+            cursor = conn.execute(
+                "UPDATE games SET name = ?, name_lower = ?, playtime_forever = ?,"
+                " playtime_2weeks = ?, rtime_last_played = ?"
+                " WHERE kind = 'steam' AND appid = ?",
+                values + (appid,),
+            )
+            if cursor.rowcount == 0:
+                conn.execute(
+                    "INSERT INTO games VALUES ('steam', ?, ?, ?, ?, ?, ?, NULL, ?)",
+                    (appid,) + values + (next_position,),
+                )
+                next_position += 1
+
+        conn.executemany(
+            "DELETE FROM games WHERE kind = 'steam' AND appid = ?",
+            ((str(appid),) for appid in removed),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('last_updated', ?)", (last_updated,)
+        )
+
+
+def load_last_updated(conn):
+    """Return the last sync time, or None if the library was never synced"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'last_updated'").fetchone()
+    return row[0] if row else None
+
+
+def load_games(conn):
+    """Load the Steam library, or None if it was never synced"""
+    last_updated = load_last_updated(conn)
+    if last_updated is None:
+        return None
+    return {"last_updated": last_updated, "games": _load_games(conn, "steam")}
+
+
+def save_manual_games(conn, games):
+    """Replace the manually added games"""
+    _replace_games(conn, "manual", games)
+
+
+def load_manual_games(conn):
+    """Load the manually added games"""
+    return _load_games(conn, "manual")
+
+
+def load_tags(conn):
+    """Load tags as a dict of appid to tag list"""
+    tags = {}
+    for appid, tag in conn.execute("SELECT appid, tag FROM tags ORDER BY rowid"):
+        tags.setdefault(appid, []).append(tag)
+    return tags
+
+
+def save_tags(conn, tags):
+    """Replace every tag"""
+    with conn:
+        conn.execute("DELETE FROM tags")
+        conn.executemany(
+            "INSERT OR IGNORE INTO tags VALUES (?, ?)",
+            ((appid, tag) for appid, game_tags in tags.items() for tag in game_tags),
+        )
+
+
+def add_tag(conn, appid, tag):
+    """Add one tag, returning False if the game already had it"""
+    with conn:
+        cursor = conn.execute("INSERT OR IGNORE INTO tags VALUES (?, ?)", (appid, tag))
+    return cursor.rowcount > 0
+
+
+def remove_tag(conn, appid, tag):
+    """Remove one tag, returning False if the game didn't have it"""
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM tags WHERE appid = ? AND tag = ?", (appid, tag)
+        )
+    return cursor.rowcount > 0
+
+
+def load_status(conn):
+    """Load manual status overrides as a dict of appid to status"""
+    return dict(conn.execute("SELECT appid, status FROM status"))
+
+
+def save_status(conn, status):
+    """Replace every manual status override"""
+    with conn:
+        conn.execute("DELETE FROM status")
+        conn.executemany("INSERT INTO status VALUES (?, ?)", status.items())
+
+
+def set_status(conn, appid, status):
+    """Upsert one manual status override"""
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO status VALUES (?, ?)", (appid, status))
+
+
+def clear_status(conn, appid):
+    """Remove one manual status override, returning False if there was none"""
+    with conn:
+        cursor = conn.execute("DELETE FROM status WHERE appid = ?", (appid,))
+    return cursor.rowcount > 0
+
+
+# one statement per batch action, written to touch a row only if the edit
+# changes something, so rowcount says whether it did
+BATCH_STATEMENTS = {
+    "tag": "INSERT OR IGNORE INTO tags VALUES (:appid, :value)",
+    "untag": "DELETE FROM tags WHERE appid = :appid AND tag = :value",
+    "status": (
+        "INSERT INTO status VALUES (:appid, :value) ON CONFLICT (appid)"
+        " DO UPDATE SET status = excluded.status WHERE status != excluded.status"
+    ),
+    "clearstatus": "DELETE FROM status WHERE appid = :appid",
+}
+
+
+def apply_batch(conn, operations):
+    """Apply (action, appid, value) edits in a single transaction
+
+    Returns whether each edit changed anything.
+    """
+    changed = []
+    with conn:
+        for action, appid, value in operations:
+            cursor = conn.execute(
+                BATCH_STATEMENTS[action], {"appid": appid, "value": value}
+            )
+            changed.append(cursor.rowcount > 0)
+    return changed
+
+
+def _tag_clause(node, params):
+    """Translate a parsed tag expression into a condition on g.appid"""
+    kind = node[0]
+    if kind == "tag":
+        name = f"tag{len(params)}"
+        params[name] = node[1]
+        return f"g.appid IN (SELECT appid FROM tags WHERE tag = :{name})"
+    if kind == "not":
+        return f"NOT {_tag_clause(node[1], params)}"
+
+    operator = " AND " if kind == "and" else " OR "
+    left = _tag_clause(node[1], params)
+    return f"({left}{operator}{_tag_clause(node[2], params)})"
+
+
+def _filter_clause(
+    cutoff,
+    source="all",
+    search=None,
+    tag=None,
+    status=None,
+    column=None,
+    minimum=None,
+    maximum=None,
+    strict=False,
+):
+    """Build the WHERE clause and parameters shared by the library queries"""
+    clauses = []
+    params = {"cutoff": cutoff}
+
+    if source == "steam":
+        clauses.append(f"{SOURCE_EXPR} = 'Steam'")
+    elif source == "manual":
+        clauses.append(f"{SOURCE_EXPR} != 'Steam'")
+
+    if search:
+        clauses.append("instr(g.name_lower, :search) > 0")
+        params["search"] = search.lower()
+
+    if tag:
+        clauses.append(_tag_clause(parse_tag_expression(tag), params))
+
+    if status:
+        clauses.append(f"{STATUS_EXPR} = :status")
+        params["status"] = status
+
+    if column is not None:
+        if column not in GAME_FIELDS:
+            raise ValueError(f"cannot filter on {column}")
+        low, high = (">", "<") if strict else (">=", "<=")
+        if minimum is not None:
+            clauses.append(f"g.{column} / 60.0 {low} :minimum")
+            params["minimum"] = minimum
+        if maximum is not None:
+            clauses.append(f"g.{column} / 60.0 {high} :maximum")
+            params["maximum"] = maximum
+
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, params
+
+
+def query_games(conn, cutoff, sortby=None, limit=None, offset=None, **filters):
+    """Filter, sort and limit the merged library in a single SQL query
+
+    column/minimum/maximum bound a playtime column in hours, compared the
+    same way as the Python filters (minutes / 60); strict excludes both
+    bounds. tag is a tag expression, see backlog.tags. offset skips that
+    many games of the sorted result, for paging.
+    """
+    where, params = _filter_clause(cutoff, **filters)
+    sql = (
+        "SELECT g.* FROM games g LEFT JOIN status s ON s.appid = g.appid"
+        + where
+        + " ORDER BY "
+    )
+
+    # ties keep library order, like Python's stable sort
+    if sortby:
+        sql += SORT_ORDERS[sortby] + ", "
+    sql += "g.kind = 'manual', g.position"
+
+    if limit or offset:
+        sql += " LIMIT :limit OFFSET :offset"
+        params["limit"] = limit or -1
+        params["offset"] = offset or 0
+
+    return [_row_to_game(row) for row in conn.execute(sql, params)]
+
+
+def count_games(conn, cutoff, **filters):
+    """Count the games query_games would return without a limit"""
+    where, params = _filter_clause(cutoff, **filters)
+    sql = "SELECT COUNT(*) FROM games g LEFT JOIN status s ON s.appid = g.appid" + where
+    return conn.execute(sql, params).fetchone()[0]
@@ -0,0 +1,406 @@
+"""Single-pass library statistics with constant-memory percentiles"""
+
+from bisect import bisect_right
+from math import ceil, log
+
+from .columnar import COLUMNS, ColumnarLibrary
+from .timing import timed
+from .utils import classify_status, dropped_cutoff, status_overrides
+
+# playtime brackets as (label, lower bound in minutes), lowest first
+BRACKETS = (
+    ("Never played", 0),
+    ("Under 1 hour", 1),
+    ("1-10 hours", 60),
+    ("10-50 hours", 600),
+    ("50-100 hours", 3000),
+    ("100+ hours", 6000),
+)
+BRACKET_BOUNDS = [bound for label, bound in BRACKETS[1:]]
+
+SNAPSHOT_VERSION = 1
+
+STATUSES = ("playing", "backlog", "inactive", "dropped", "completed", "hold")
+
+
+class QuantileSketch:
+    """Approximate quantiles in bounded memory (DDSketch)
+
+    Values land in logarithmic buckets, so any quantile is returned within
+    relative_accuracy of a true value. Past max_buckets, the lowest buckets
+    are merged, which only costs accuracy at the very bottom.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.max_buckets = max_buckets
+        self.count = 0
+        self.zeros = 0
+        self.scale = 1 / log(self.gamma)
+        self._buckets = {}
+
+    def add(self, value):
+        """Record one value"""
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+
+        key = self.key(value)
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            self.trim()
+
+    def key(self, value):
+        """Bucket of a positive value"""
+        return ceil(log(value) * self.scale)
+
+    def add_counts(self, counts, zeros=0):
+        """Record pre-bucketed values, e.g. counted in a caller's hot loop"""
+        for key, count in counts.items():
+            self._buckets[key] = self._buckets.get(key, 0) + count
+            self.count += count
+        self.zeros += zeros
+        self.count += zeros
+        self.trim()
+
+    def remove(self, value):
+        """Forget one value recorded earlier"""
+        self.count -= 1
+        if value <= 0:
+            self.zeros -= 1
+            return
+
+        key = self.key(value)
+        if key not in self._buckets:
+            # merged away by trim, it was counted in the lowest bucket
+            key = min(self._buckets)
+        self._buckets[key] -= 1
+        if not self._buckets[key]:
+            del self._buckets[key]
+
+    def trim(self):
+        """Merge the lowest buckets until at most max_buckets are left"""
+        if len(self._buckets) > self.max_buckets:
+            keys = sorted(self._buckets)
+            excess = keys[: len(keys) - self.max_buckets + 1]
+            self._buckets[excess[-1]] += sum(self._buckets.pop(k) for k in excess[:-1])
+
+    def to_dict(self):
+        """Serialize the sketch, e.g. into the stats snapshot"""
+        return {
+            "relative_accuracy": (self.gamma - 1) / (self.gamma + 1),
+            "max_buckets": self.max_buckets,
+            "zeros": self.zeros,
+            "buckets": [[key, count] for key, count in self._buckets.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a sketch saved with to_dict"""
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch.add_counts(dict(data["buckets"]), data["zeros"])
+        return sketch
+
+    def quantile(self, q):
+        """Return the approximate q-quantile (0 <= q <= 1), None if empty"""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen > rank:
+                return 2 * self.gamma**key / (self.gamma + 1)
+
+
+class LibraryStats:
+    """Totals, extremes, histogram, status counts and percentiles of a library
+
+    Games are fed in through add_library, which reads each library once;
+    nothing per game is kept, so memory doesn't grow with the library.
+    add_game and remove_game keep a saved summary up to date as single
+    games change; see is_current for when it has to be rebuilt instead.
+    """
+
+    def __init__(self, manual_status=None, cutoff=None):
+        self.count = 0
+        self.total_minutes = 0
+        self.played = 0
+        self.most_played = None
+        self.least_played = None
+        self.brackets = [0] * len(BRACKETS)
+        self.statuses = dict.fromkeys(STATUSES, 0)
+        self.playtime = QuantileSketch()
+        self.cutoff = dropped_cutoff() if cutoff is None else cutoff
+        # earliest last played time of an inactive game; once the cutoff
+        # passes it that game counts as dropped and the counts are stale
+        self.next_drop = None
+        # set when the game holding an extreme changed or left the library
+        self.most_stale = False
+        self.least_stale = False
+
+        self._overrides = status_overrides(manual_status) if manual_status else {}
+
+    def add_library(self, games):
+        """Fold one library, a ColumnarLibrary or list of game dicts, in"""
+        if isinstance(games, ColumnarLibrary):
+            rows = zip(*(games.column(c) for c in COLUMNS))
+        else:
+            rows = (
+                (
+                    g["appid"],
+                    g.get("playtime_forever", 0),
+                    g.get("playtime_2weeks", 0),
+                    g.get("rtime_last_played", 0),
+                )
+                for g in games
+            )
+
+        cutoff = self.cutoff
+        overrides = self._overrides
+        brackets = self.brackets
+        statuses = self.statuses
+        buckets = {}
+        scale = self.playtime.scale
+        most = self.most_played[0] if self.most_played else -1
+        least = self.least_played[0] if self.least_played else None
+        next_drop = self.next_drop
+        total = played = count = 0
+        most_index = least_index = None
+
+        for index, (appid, minutes, recent, last_played) in enumerate(rows):
+            count += 1
+            total += minutes
+            brackets[bisect_right(BRACKET_BOUNDS, minutes)] += 1
+
+            if minutes > most:
+                most = minutes
+                most_index = index
+            if minutes > 0:
+                played += 1
+                key = ceil(log(minutes) * scale)
+                buckets[key] = buckets.get(key, 0) + 1
+                if least is None or minutes < least:
+                    least = minutes
+                    least_index = index
+
+            # mirrors utils.classify_status
+            status = overrides.get(appid) if overrides else None
+            if status is None:
+                if recent > 0:
+                    status = "playing"
+                elif minutes == 0:
+                    status = "backlog"
+                elif 0 < last_played < cutoff:
+                    status = "dropped"
+                else:
+                    status = "inactive"
+                    if last_played > 0 and (
+                        next_drop is None or last_played < next_drop
+                    ):
+                        next_drop = last_played
+            statuses[status] = statuses.get(status, 0) + 1
+
+        self.count += count
+        self.total_minutes += total
+        self.played += played
+        self.playtime.add_counts(buckets)
+        self.next_drop = next_drop
+
+        # names are only decoded for the games that ended up as extremes
+        if most_index is not None:
+            self.most_played = _extreme(games, most_index)
+        if least_index is not None:
+            self.least_played = _extreme(games, least_index)
+
+    def _status(self, game):
+        """classify_status for one game, at the summary's cutoff"""
+        return classify_status(
+            game["appid"],
+            game.get("playtime_forever", 0),
+            game.get("playtime_2weeks", 0),
+            game.get("rtime_last_played", 0),
+            self._overrides,
+            self.cutoff,
+        )
+
+    def add_game(self, game):
+        """Count one new or updated game"""
+        minutes = game.get("playtime_forever", 0)
+        last_played = game.get("rtime_last_played", 0)
+        status = self._status(game)
+
+        self.count += 1
+        self.total_minutes += minutes
+        self.brackets[bisect_right(BRACKET_BOUNDS, minutes)] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+        if status == "inactive" and last_played > 0:
+            if self.next_drop is None or last_played < self.next_drop:
+                self.next_drop = last_played
+
+        # an extreme that beats the last known one beats every game left,
+        # even if the game that held it has since changed
+        entry = (minutes, game["appid"], game["name"])
+        if self.most_played is None or minutes > self.most_played[0]:
+            self.most_played = entry
+            self.most_stale = False
+        if minutes > 0:
+            self.played += 1
+            self.playtime.add(minutes)
+            if self.least_played is None or minutes < self.least_played[0]:
+                self.least_played = entry
+                self.least_stale = False
+
+    def remove_game(self, game):
+        """Uncount one game that changed or left the library
+
+        game must be the version that was counted, and manual overrides
+        must still be the ones it was counted with.
+        """
+        minutes = game.get("playtime_forever", 0)
+        status = self._status(game)
+
+        self.count -= 1
+        self.total_minutes -= minutes
+        self.brackets[bisect_right(BRACKET_BOUNDS, minutes)] -= 1
+        self.statuses[status] -= 1
+
+        if minutes > 0:
+            self.played -= 1
+            self.playtime.remove(minutes)
+
+        if self.most_played and self.most_played[1] == game["appid"]:
+            self.most_stale = True
+        if self.least_played and self.least_played[1] == game["appid"]:
+            self.least_stale = True
+
+    def set_override(self, appid, status):
+        """Change one manual status override, None clearing it
+
+        Remove the game before and add it back after, so its status count
+        moves with the override.
+        """
+        appid = str(appid)
+        # overrides are looked up by the appid as stored, str or int
+        if appid.isdigit() and str(int(appid)) == appid:
+            keys = (appid, int(appid))
+        else:
+            keys = (appid,)
+
+        for key in keys:
+            if status is None:
+                self._overrides.pop(key, None)
+            else:
+                self._overrides[key] = status
+
+    def is_current(self):
+        """Whether the summary still matches the library right now
+
+        Counts go stale once time moves an inactive game past the dropped
+        cutoff, and extremes once the game holding one shrank or left.
+        """
+        if self.most_stale or self.least_stale:
+            return False
+        return self.next_drop is None or dropped_cutoff() <= self.next_drop
+
+    def differences(self, other):
+        """Names of the figures that differ between two summaries"""
+        checks = {
+            "count": (self.count, other.count),
+            "total playtime": (self.total_minutes, other.total_minutes),
+            "played": (self.played, other.played),
+            "brackets": (list(self.brackets), list(other.brackets)),
+            "statuses": (
+                {k: v for k, v in self.statuses.items() if v},
+                {k: v for k, v in other.statuses.items() if v},
+            ),
+            "most played": (
+                self.most_played and self.most_played[0],
+                other.most_played and other.most_played[0],
+            ),
+            "least played": (
+                self.least_played and self.least_played[0],
+                other.least_played and other.least_played[0],
+            ),
+            "percentiles": (self.playtime._buckets, other.playtime._buckets),
+        }
+        return [name for name, (mine, theirs) in checks.items() if mine != theirs]
+
+    @property
+    def unplayed(self):
+        """Number of games with no playtime at all"""
+        return self.count - self.played
+
+    @property
+    def mean_played_minutes(self):
+        """Average playtime of the games that were played at all"""
+        return self.total_minutes / self.played if self.played else 0
+
+    def percentile(self, q):
+        """Approximate playtime percentile of played games, in minutes"""
+        return self.playtime.quantile(q)
+
+    def to_dict(self):
+        """Serialize the summary for the stats snapshot"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "count": self.count,
+            "total_minutes": self.total_minutes,
+            "played": self.played,
+            "most_played": self.most_played,
+            "least_played": self.least_played,
+            "brackets": self.brackets,
+            "statuses": self.statuses,
+            "playtime": self.playtime.to_dict(),
+            "cutoff": self.cutoff,
+            "next_drop": self.next_drop,
+            "most_stale": self.most_stale,
+            "least_stale": self.least_stale,
+        }
+
+    @classmethod
+    def from_dict(cls, data, manual_status=None):
+        """Restore a summary saved with to_dict, None if it's unusable"""
+        if not data or data.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        stats = cls(manual_status, data["cutoff"])
+        stats.count = data["count"]
+        stats.total_minutes = data["total_minutes"]
+        stats.played = data["played"]
+        stats.most_played = data["most_played"] and tuple(data["most_played"])
+        stats.least_played = data["least_played"] and tuple(data["least_played"])
+        stats.brackets = data["brackets"]
+        stats.statuses = data["statuses"]
+        stats.playtime = QuantileSketch.from_dict(data["playtime"])
+        stats.next_drop = data["next_drop"]
+        stats.most_stale = data["most_stale"]
+        stats.least_stale = data["least_stale"]
+        return stats
+
+
+def _extreme(games, index):
+    """(minutes, appid, name) of one game of a library"""
+    if isinstance(games, ColumnarLibrary):
+        return (
+            games.column("playtime_forever")[index],
+            games.column("appid")[index],
+            games.name(index),
+        )
+    game = games[index]
+    return (game.get("playtime_forever", 0), game["appid"], game["name"])
+
+
+@timed("stats")
+def library_stats(libraries, manual_status=None, cutoff=None):
+    """Compute LibraryStats over several libraries in one pass each"""
+    stats = LibraryStats(manual_status, cutoff)
+    for games in libraries:
+        stats.add_library(games)
+    return stats
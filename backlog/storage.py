@@ -0,0 +1,107 @@
+"""Crash-safe file writes and a cross-process lock for the cache directory
+
+Every cache file is written to a temporary file next to it, flushed to
+disk and renamed over the original, so a crash leaves either the old or
+the new contents. Commands that read a file, change it and write it back
+hold the cache lock for the whole sequence, so two processes (a cron
+sync and an interactive edit, say) never overwrite each other's changes.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic but aren't serialized
+    fcntl = None
+
+LOCK_NAME = ".lock"
+
+_held = threading.local()
+
+
+def _fsync_directory(directory):
+    """Make a rename in directory durable, where the platform allows it"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode="w", **kwargs):
+    """Open a temporary file that replaces path when the block succeeds
+
+    The data is fsynced before the rename and the directory after it. If
+    the block raises, path is left untouched.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    _fsync_directory(os.path.dirname(path) or ".")
+
+
+def write_json(path, data, indent: Optional[int] = 2, default=None):
+    """Write data as JSON to path atomically, on one line with indent=None"""
+    with atomic_open(path, "w") as f:
+        json.dump(data, f, indent=indent, default=default)
+
+
+def append_durably(path, text):
+    """Append text to path and flush it to disk"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+@contextmanager
+def locked(directory):
+    """Hold directory's exclusive lock for the block
+
+    The lock is an advisory fcntl lock on a file in the directory, so it
+    covers every process using the same cache. A thread that already
+    holds it can take it again; the lock is released when the outermost
+    block exits.
+    """
+    held = _held.__dict__.setdefault("locks", {})
+    key = os.path.abspath(directory)
+
+    if key in held:
+        held[key][1] += 1
+        try:
+            yield
+        finally:
+            held[key][1] -= 1
+        return
+
+    f = open(os.path.join(directory, LOCK_NAME), "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        held[key] = [f, 1]
+        try:
+            yield
+        finally:
+            del held[key]
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    finally:
+        f.close()
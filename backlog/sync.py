@@ -0,0 +1,104 @@
+"""Concurrent library sync for several Steam accounts"""
+
+import asyncio
+import time
+
+from requests import RequestException
+
+from backlog.api import SteamAPIError, get_client
+from backlog.cache import (
+    load_http_validators,
+    load_last_updated,
+    profile_directory,
+    save_http_validators,
+    sync_cache,
+    use_profile,
+)
+
+
+class AsyncRateLimiter:
+    """Token bucket shared by every task on one event loop"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _sync_profiles(api_key, profiles, concurrency, rate):
+    """Fetch every profile concurrently and store each result as it arrives"""
+    client = get_client()
+    limiter = AsyncRateLimiter(rate, burst=concurrency) if rate else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(name, steam_id):
+        use_profile(profile_directory(name))
+        conditional = load_last_updated() is not None
+
+        async with semaphore:
+            if limiter:
+                await limiter.acquire()
+            started = time.perf_counter()
+            try:
+                # the blocking client runs in a worker thread, keeping its
+                # pooled connections and retry handling
+                games = await asyncio.to_thread(
+                    client.get_owned_games, api_key, steam_id, True, conditional
+                )
+            # one profile's failure must not stop the others
+            except (SteamAPIError, RequestException) as e:
+                return name, None, e, time.perf_counter() - started
+        return name, games, None, time.perf_counter() - started
+
+    results = {}
+    tasks = [fetch(name, steam_id) for name, steam_id in profiles.items()]
+
+    for next_done in asyncio.as_completed(tasks):
+        name, games, error, elapsed = await next_done
+        result = {"elapsed": elapsed, "error": error, "summary": None}
+
+        # cache writes happen one profile at a time on the event loop
+        if games is not None:
+            use_profile(profile_directory(name))
+            result["summary"] = sync_cache(games)
+        results[name] = result
+
+    return results
+
+
+def sync_profiles(api_key, profiles, concurrency=8, rate=None):
+    """Sync several accounts at once
+
+    Wall time is close to the slowest single fetch rather than the sum.
+    Returns a dict of profile name to {"elapsed", "error", "summary"};
+    summary is None when the fetch failed or the library was unchanged.
+    """
+    client = get_client()
+    client.validators = load_http_validators()
+
+    try:
+        results = asyncio.run(_sync_profiles(api_key, profiles, concurrency, rate))
+    finally:
+        use_profile(None)
+
+    # only once every library is stored, as a validator saved ahead of a
+    # failed write would answer later syncs with "unchanged"
+    save_http_validators(client.validators)
+    return results
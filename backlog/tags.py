@@ -0,0 +1,184 @@
+"""Inverted tag index and boolean tag expressions
+
+A tag expression combines tag names with & (and), | (or), ! (not) and
+parentheses, e.g. "rpg & !finished" or "(souls | metroidvania) & !dropped".
+Names are trimmed, so they may contain spaces; a lone name matches just
+that tag.
+"""
+
+import re
+
+TOKEN = re.compile(r"[&|!()]|[^&|!()]+")
+
+
+class TagIndex:
+    """Tags by game and games by tag, updated together
+
+    Both sides map to dicts used as insertion-ordered sets, so adding or
+    removing a tag is O(1) and listings keep the order tags were added in.
+    Appids are stored as strings, as in tags.json.
+    """
+
+    def __init__(self, tags=None):
+        self._by_game = by_game = {}
+        self._by_tag = by_tag = {}
+
+        for appid, game_tags in (tags or {}).items():
+            if not game_tags:
+                continue
+            appid = str(appid)
+            by_game[appid] = dict.fromkeys(game_tags)
+            for tag in game_tags:
+                if tag in by_tag:
+                    by_tag[tag][appid] = None
+                else:
+                    by_tag[tag] = {appid: None}
+
+    def __bool__(self):
+        return bool(self._by_game)
+
+    def add(self, appid, tag):
+        """Tag a game, returning False if it already had the tag"""
+        appid = str(appid)
+        game_tags = self._by_game.setdefault(appid, {})
+        if tag in game_tags:
+            return False
+
+        game_tags[tag] = None
+        self._by_tag.setdefault(tag, {})[appid] = None
+        return True
+
+    def remove(self, appid, tag):
+        """Untag a game, returning False if it didn't have the tag"""
+        appid = str(appid)
+        game_tags = self._by_game.get(appid)
+        if game_tags is None or tag not in game_tags:
+            return False
+
+        del game_tags[tag]
+        if not game_tags:
+            del self._by_game[appid]
+        del self._by_tag[tag][appid]
+        if not self._by_tag[tag]:
+            del self._by_tag[tag]
+        return True
+
+    def tags_of(self, appid):
+        """The tags of one game, in the order they were added"""
+        return list(self._by_game.get(str(appid), ()))
+
+    def games_with(self, tag):
+        """The appids tagged with tag, in the order they were tagged"""
+        return list(self._by_tag.get(tag, ()))
+
+    def tag_names(self):
+        """Every tag in use"""
+        return list(self._by_tag)
+
+    def to_dict(self):
+        """The appid to tag list mapping stored in tags.json"""
+        return {appid: list(tags) for appid, tags in self._by_game.items()}
+
+    def _evaluate(self, node):
+        """Evaluate a parsed expression to (appids, complemented)
+
+        Negation only flips the flag, so no operation needs the set of
+        every game; the answer is "in appids", or "not in appids" when
+        complemented.
+        """
+        kind = node[0]
+        if kind == "tag":
+            return self._by_tag.get(node[1], {}).keys(), False
+        if kind == "not":
+            appids, complemented = self._evaluate(node[1])
+            return appids, not complemented
+
+        a, a_not = self._evaluate(node[1])
+        b, b_not = self._evaluate(node[2])
+        if kind == "or":
+            # a | b is !(!a & !b)
+            a_not, b_not = not a_not, not b_not
+
+        if not a_not and not b_not:
+            result = (a & b, False)
+        elif not a_not:
+            result = (a - b, False)
+        elif not b_not:
+            result = (b - a, False)
+        else:
+            result = (a | b, True)
+
+        if kind == "or":
+            return result[0], not result[1]
+        return result
+
+    def matcher(self, expression):
+        """Build a predicate on raw appids for a tag expression
+
+        The predicate accepts appids as stored in a library, ints or
+        strings. Raises ValueError if the expression is malformed.
+        """
+        appids, complemented = self._evaluate(parse_tag_expression(expression))
+
+        keys = set(appids)
+        for appid in appids:
+            if appid.isdigit() and str(int(appid)) == appid:
+                keys.add(int(appid))
+
+        if complemented:
+            return lambda appid: appid not in keys
+        return lambda appid: appid in keys
+
+
+def parse_tag_expression(text):
+    """Parse a tag expression into nested tuples
+
+    Nodes are ("tag", name), ("not", node), ("and", left, right) and
+    ("or", left, right); ! binds tighter than &, and & tighter than |.
+    Raises ValueError if the expression is malformed.
+    """
+    tokens = [token.strip() for token in TOKEN.findall(text)]
+    tokens = [token for token in tokens if token]
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def either():
+        node = both()
+        while peek() == "|":
+            take()
+            node = ("or", node, both())
+        return node
+
+    def both():
+        node = single()
+        while peek() == "&":
+            take()
+            node = ("and", node, single())
+        return node
+
+    def single():
+        token = peek()
+        if token is None or token in "&|)":
+            raise ValueError(f"expected a tag name in '{text}'")
+        take()
+        if token == "!":
+            return ("not", single())
+        if token == "(":
+            node = either()
+            if peek() != ")":
+                raise ValueError(f"unbalanced parentheses in '{text}'")
+            take()
+            return node
+        return ("tag", token)
+
+    node = either()
+    if pos != len(tokens):
+        raise ValueError(f"unexpected '{tokens[pos]}' in '{text}'")
+    return node
@@ -0,0 +1,141 @@
+"""Opt-in timers and counters around the stages of a command
+
+Stages are marked with @timed("name") or `with timer("name")`, and
+counts with count("name", n). Until enable() is called (by --timings)
+these do nothing but check one flag, so they can stay in place for good.
+"""
+
+import functools
+import os
+import threading
+import time
+
+_enabled = False
+_started = None
+_totals = {}  # name -> [calls, total seconds, own seconds]
+_counters = {}
+_events = None  # Chrome trace events, when a trace was asked for
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class _Timer:
+    """Time one stage, subtracting nested stages from its own time"""
+
+    __slots__ = ("name", "start", "nested")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        stack.append(self)
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        elapsed = end - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+
+        with _lock:
+            totals = _totals.setdefault(self.name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] += elapsed - self.nested
+            if _events is not None and _started is not None:
+                _events.append(
+                    {
+                        "name": self.name,
+                        "ph": "X",
+                        "ts": (self.start - _started) * 1e6,
+                        "dur": elapsed * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                    }
+                )
+
+
+class _NoTimer:
+    """Stand-in returned by timer() while timing is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def enable(trace=False):
+    """Start recording, keeping every call as a trace event with trace"""
+    global _enabled, _started, _events
+
+    _started = time.perf_counter()
+    _totals.clear()
+    _counters.clear()
+    _events = [] if trace else None
+    _enabled = True
+
+
+def enabled():
+    """Whether timers are recording"""
+    return _enabled
+
+
+def timer(name):
+    """Context manager timing one stage"""
+    return _Timer(name) if _enabled else _NO_TIMER
+
+
+def timed(name):
+    """Decorator timing every call of a function as the stage name"""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, n=1):
+    """Add n to a counter"""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def report():
+    """Return the wall time so far, the stage totals and the counters
+
+    Stages map to (calls, total seconds, own seconds), own time leaving
+    out the stages nested inside, sorted by total time.
+    """
+    wall = time.perf_counter() - _started if _started is not None else 0.0
+    with _lock:
+        stages = sorted(_totals.items(), key=lambda item: item[1][1], reverse=True)
+        return wall, {name: tuple(t) for name, t in stages}, dict(_counters)
+
+
+def write_trace(path):
+    """Write the recorded calls as Chrome trace JSON (chrome://tracing, Perfetto)"""
+    import json
+
+    with _lock:
+        events = list(_events or ())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
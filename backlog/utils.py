@@ -1,21 +1,32 @@
 """Utility functions for game data manipulation"""
 
 import time
-from .cache import load_manual_games
+from .cache import load_manual_games, load_search_index
+from .columnar import COLUMNS, ColumnarLibrary
+from .game import Game
+from .index import GameIndex
+from .timing import timed
 
 
 def get_game_status(game, manual_status=None):
     """Calculate game status if its manually overriden or auto detected"""
-    import time
+    return classify_status(
+        game["appid"],
+        game.get("playtime_forever", 0),
+        game.get("playtime_2weeks", 0),
+        game.get("rtime_last_played", 0),
+        manual_status,
+    )
 
-    appid = str(game["appid"])
 
-    if manual_status and appid in manual_status:
-        return manual_status[appid]
-
-    playtime = game.get("playtime_forever", 0)
-    playtime_2weeks = game.get("playtime_2weeks", 0)
-    last_played = game.get("rtime_last_played", 0)
+def classify_status(
+    appid, playtime, playtime_2weeks, last_played, manual_status=None, cutoff=None
+):
+    """Calculate a status from raw column values instead of a game dict"""
+    if manual_status:
+        appid = str(appid)
+        if appid in manual_status:
+            return manual_status[appid]
 
     if playtime_2weeks > 0:
         return "playing"
@@ -23,16 +34,114 @@ def get_game_status(game, manual_status=None):
     if playtime == 0:
         return "backlog"
 
-    six_months_ago = time.time() - (180 * 24 * 60 * 60)
-    if last_played > 0 and last_played < six_months_ago:
+    if cutoff is None:
+        cutoff = dropped_cutoff()
+    if last_played > 0 and last_played < cutoff:
         return "dropped"
 
     return "inactive"
 
 
-def get_next_manual_id():
+@timed("status")
+def classify_library(games, manual_status=None, cutoff=None):
+    """Calculate the status of every game in a library in one pass
+
+    games is a ColumnarLibrary, a list of game dicts or a dict of columns
+    keyed like COLUMNS. The cutoff is computed once and manual overrides
+    are matched by appid without formatting each game's appid. Returns
+    the statuses in library order, as classify_status would give them.
+    """
+    if cutoff is None:
+        cutoff = dropped_cutoff()
+
+    if isinstance(games, MergedLibrary):
+        # each side keeps its own fast path, e.g. a columnar Steam library
+        return classify_library(
+            games.steam_games, manual_status, cutoff
+        ) + classify_library(games.manual_games, manual_status, cutoff)
+
+    if isinstance(games, ColumnarLibrary):
+        columns = {column: games.column(column) for column in COLUMNS}
+    elif isinstance(games, dict):
+        columns = games
+    else:
+        columns = {column: [g.get(column, 0) for g in games] for column in COLUMNS}
+
+    statuses = []
+    append = statuses.append
+    for minutes, recent, last_played in zip(
+        columns["playtime_forever"],
+        columns["playtime_2weeks"],
+        columns["rtime_last_played"],
+    ):
+        if recent > 0:
+            append("playing")
+        elif minutes == 0:
+            append("backlog")
+        elif 0 < last_played < cutoff:
+            append("dropped")
+        else:
+            append("inactive")
+
+    if manual_status:
+        overrides = status_overrides(manual_status)
+        statuses = [
+            overrides.get(appid, status)
+            for appid, status in zip(columns["appid"], statuses)
+        ]
+
+    return statuses
+
+
+def status_overrides(manual_status):
+    """Key manual overrides by raw appid as well as str(appid)
+
+    Overrides are stored by str(appid) but Steam appids are ints, so the
+    map lets batch code look up a game's appid as it is.
+    """
+    overrides = {}
+    for appid, status in manual_status.items():
+        overrides[appid] = status
+        if appid.isdigit() and str(int(appid)) == appid:
+            overrides[int(appid)] = status
+    return overrides
+
+
+def status_predicate(status, manual_status=None, cutoff=None):
+    """Build a predicate on game dicts that checks their status
+
+    Gives the same answer as classify_status, with the cutoff and the
+    override map worked out once for every game tested.
+    """
+    overrides = status_overrides(manual_status) if manual_status else {}
+    if cutoff is None:
+        cutoff = dropped_cutoff()
+
+    def predicate(game):
+        override = overrides.get(game["appid"])
+        if override is not None:
+            return override == status
+        if game.get("playtime_2weeks", 0) > 0:
+            return status == "playing"
+        minutes = game.get("playtime_forever", 0)
+        if minutes == 0:
+            return status == "backlog"
+        if 0 < game.get("rtime_last_played", 0) < cutoff:
+            return status == "dropped"
+        return status == "inactive"
+
+    return predicate
+
+
+def dropped_cutoff():
+    """Timestamp before which an unplayed-since game counts as dropped"""
+    return time.time() - (180 * 24 * 60 * 60)
+
+
+def get_next_manual_id(games=None):
     """Generate next manual game ID"""
-    games = load_manual_games()
+    if games is None:
+        games = load_manual_games()
     if not games:
         return "manual_1"
 
@@ -47,29 +156,132 @@ def get_next_manual_id():
     return f"manual_{max_id + 1}"
 
 
+def game_source(game):
+    """Where a game comes from: "Steam", or a manual game's platform"""
+    if isinstance(game, Game):
+        return "Steam"
+    return game.get("source") or game.get("platform") or "Manual"
+
+
+class MergedLibrary:
+    """The Steam library followed by the manual games, without copying either
+
+    Indexing and iterating read through to the two collections, so a
+    ColumnarLibrary only materializes the games asked for, and nothing is
+    written to the games; game_source() says where each one came from.
+    """
+
+    def __init__(self, steam_games, manual_games):
+        self.steam_games = steam_games
+        self.manual_games = manual_games
+
+    def __len__(self):
+        return len(self.steam_games) + len(self.manual_games)
+
+    def __iter__(self):
+        yield from self.steam_games
+        yield from self.manual_games
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("library index out of range")
+
+        steam_count = len(self.steam_games)
+        if index < steam_count:
+            return self.steam_games[index]
+        return self.manual_games[index - steam_count]
+
+    def partition(self, source):
+        """The games --source keeps: "steam", "manual" or "all"
+
+        Steam games are the library plus manual games on the Steam
+        platform, so only the (short) manual list is ever filtered.
+        """
+        if source == "steam":
+            return MergedLibrary(
+                self.steam_games,
+                [g for g in self.manual_games if g.get("platform") == "Steam"],
+            )
+        if source == "manual":
+            return MergedLibrary(
+                [], [g for g in self.manual_games if g.get("platform") != "Steam"]
+            )
+        return self
+
+
+@timed("merge")
 def merge_games(steam_games, manual_games):
-    """Merge steam and manual games into one list"""
-    for game in steam_games:
-        game["source"] = "Steam"
-    for game in manual_games:
-        game["source"] = game.get("platform", "Manual")
+    """Merge steam and manual games into one MergedLibrary view"""
+    return MergedLibrary(steam_games, manual_games)
 
-    return steam_games + manual_games
 
+def filter_games(games, column, predicate):
+    """Keep games whose numeric column matches predicate
 
-def find_game_by_name(games, search_term):
-    """Find game by partial name match"""
-    search_lower = search_term.lower()
+    Columnar libraries are filtered on the raw column so only matching
+    games are turned into dicts.
+    """
+    if isinstance(games, ColumnarLibrary):
+        return games.where(column, predicate)
 
-    for game in games:
-        if game["name"].lower() == search_lower:
-            return game
+    return [g for g in games if predicate(g.get(column, 0))]
 
-    matches = [g for g in games if search_lower in g["name"].lower()]
 
-    if len(matches) == 1:
-        return matches[0]
-    elif len(matches) > 1:
-        return matches
+def hours_predicate(min_hrs=None, max_hrs=None, strict=False):
+    """Build a predicate on minutes that checks a range of hours"""
+
+    def predicate(minutes):
+        hours = minutes / 60
+        if min_hrs is not None and (hours <= min_hrs if strict else hours < min_hrs):
+            return False
+        if max_hrs is not None and (hours >= max_hrs if strict else hours > max_hrs):
+            return False
+        return True
+
+    return predicate
+
+
+def library_names(steam_games, manual_games):
+    """Names of the merged library, in merge_games order"""
+    if isinstance(steam_games, ColumnarLibrary):
+        names = steam_games.names()
+    else:
+        names = [g["name"] for g in steam_games]
+    return names + [g["name"] for g in manual_games]
+
+
+def fuzzy_ranks(steam_games, manual_games, query):
+    """Rank the merged library by similarity to query
+
+    Uses the persisted search index, so only the first search after the
+    library changes pays for building it. Returns a dict of
+    (appid, name) to rank, 0 being the best match; games that aren't
+    similar enough are left out.
+    """
+    names = library_names(steam_games, manual_games)
+    if isinstance(steam_games, ColumnarLibrary):
+        appids = list(steam_games.column("appid"))
+    else:
+        appids = [g["appid"] for g in steam_games]
+    appids += [g["appid"] for g in manual_games]
+
+    ranked = load_search_index(names).search(query)
+    return {
+        (appids[position], names[position]): rank
+        for rank, (position, score) in enumerate(ranked)
+    }
+
+
+def find_game_by_name(games, search_term):
+    """Find game by partial name match
 
-    return None
+    games may be a GameIndex; commands that look up several names should
+    build one up front instead of passing a plain list each time.
+    """
+    if not isinstance(games, GameIndex):
+        games = GameIndex(games)
+    return games.find(search_term)
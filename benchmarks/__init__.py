@@ -0,0 +1 @@
+"""Benchmarks for Steam Backlog Tracker, run with python -m benchmarks.<name>"""
@@ -0,0 +1,64 @@
+"""Steam client throughput and retry behaviour against a local stub server"""
+
+import sys
+import time
+
+import requests
+
+from backlog.api import SteamClient
+from benchmarks.common import make_games
+from benchmarks.stub_steam import StubSteamServer
+
+LOOKUPS = 500
+
+
+def bare_lookups(url, count):
+    """Look up apps the old way, one fresh connection per request"""
+    for appid in range(count):
+        requests.get(f"{url}/api/appdetails?appids={appid}", timeout=10).json()
+
+
+def pooled_lookups(url, count):
+    """Look up apps through one pooled SteamClient session"""
+    client = SteamClient(api_url=url, store_url=url)
+    for appid in range(count):
+        client.get_app_name(appid)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else LOOKUPS
+
+    print(f"{'client':>8} {'lookups/s':>10} {'connections':>12}")
+    for name, func in (("bare", bare_lookups), ("pooled", pooled_lookups)):
+        with StubSteamServer() as stub:
+            start = time.perf_counter()
+            func(stub.url, count)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8} {count / elapsed:>10.0f} {stub.connections:>12}")
+
+    print()
+    with StubSteamServer(fail_every=3, throttle_every=5) as stub:
+        client = SteamClient(api_url=stub.url, store_url=stub.url, backoff=0.01)
+        names = [client.get_app_name(appid) for appid in range(100)]
+        resolved = sum(1 for name in names if name)
+        print(
+            f"flaky server: {resolved}/100 resolved in {stub.requests} requests "
+            "(every 3rd answers 503, every 5th 429)"
+        )
+
+    with StubSteamServer(games=make_games(10_000)) as stub:
+        client = SteamClient(api_url=stub.url, store_url=stub.url)
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            games = client.get_owned_games("key", "1", conditional=True)
+            timings.append((time.perf_counter() - start, games is None))
+        print(
+            f"GetOwnedGames 10k: first {timings[0][0] * 1000:.1f} ms, "
+            f"conditional repeat {timings[1][0] * 1000:.1f} ms "
+            f"(not modified: {timings[1][1]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Bulk App ID resolution: sequential, concurrent, and from the TTL cache"""
+
+import sys
+import time
+
+from backlog import api
+from benchmarks.common import scratch_dir
+from benchmarks.stub_steam import StubSteamServer
+
+LOOKUPS = 200
+LATENCY = 0.05
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else LOOKUPS
+    appids = [str(10 + i * 10) for i in range(count)]
+
+    with StubSteamServer(latency=LATENCY) as stub, scratch_dir():
+        api.configure_client(api_url=stub.url, store_url=stub.url)
+
+        start = time.perf_counter()
+        for appid in appids:
+            api.get_client().get_app_name(appid)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        api.resolve_app_names(appids, workers=8)
+        concurrent = time.perf_counter() - start
+
+        before = stub.requests
+        start = time.perf_counter()
+        api.resolve_app_names(appids, workers=8)
+        cached = time.perf_counter() - start
+
+    print(f"{count} App IDs, {LATENCY * 1000:.0f} ms simulated latency")
+    print(f"  sequential        {sequential:8.3f} s")
+    print(f"  8 workers         {concurrent:8.3f} s")
+    print(f"  cached            {cached:8.3f} s ({stub.requests - before} requests)")
+
+
+if __name__ == "__main__":
+    main()
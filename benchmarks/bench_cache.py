@@ -0,0 +1,170 @@
+"""Cache load and filter cost for each storage backend
+
+Before timing, games.bin is checked to round-trip every field, name and
+the header, to reject damaged files, to apply changes (PatchedNames) like
+a plain list would, and to convert to and from games.json when the
+backend changes. The script exits with status 1 if any check fails.
+"""
+
+import os
+import sys
+
+from backlog import cache
+from backlog.columnar import COLUMNS, HEADER, open_library, write_library
+from backlog.game import Game
+from backlog.utils import dropped_cutoff, filter_games, hours_predicate
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def under_one_hour(cache):
+    """Run the --under 1 filter the way cli.main does for the active backend"""
+    if cache.supports_queries():
+        return cache.query_games(
+            dropped_cutoff(), column="playtime_forever", maximum=1, strict=True
+        )
+
+    return filter_games(
+        cache.load_cache()["games"],
+        "playtime_forever",
+        hours_predicate(max_hrs=1, strict=True),
+    )
+
+
+def check_round_trip(path, games, failures):
+    """Write and reopen a library file, comparing every row, column and name"""
+    write_library(path, games, "2026-01-02T03:04:05.678901")
+    library = open_library(path)
+    expected = [Game.from_dict(game) for game in games]
+
+    if library.last_updated != "2026-01-02T03:04:05.678901":
+        failures.append(f"last_updated read back as {library.last_updated!r}")
+    if len(library) != len(expected) or list(library) != expected:
+        failures.append(f"{len(games)} games don't read back as written")
+    if library.names() != [game.name for game in expected]:
+        failures.append("names don't read back as written")
+    for column in COLUMNS:
+        if list(library.column(column)) != [game[column] for game in expected]:
+            failures.append(f"column {column} doesn't read back as written")
+    return library
+
+
+def check_damaged(failures):
+    """Truncated files and foreign headers must raise ValueError"""
+    with open("check.bin", "rb") as f:
+        data = f.read()
+
+    damaged = {
+        "empty": b"",
+        "header only": data[: HEADER.size - 1],
+        "columns cut": data[: HEADER.size + 8],
+        "names cut": data[:-1],
+        "magic": b"XXXX" + data[4:],
+        "version": data[:4] + b"\xff\xff" + data[6:],
+        "byte order": data[:6] + b"\x09\x00" + data[8:],
+    }
+    for damage, content in damaged.items():
+        with open("damaged.bin", "wb") as f:
+            f.write(content)
+        try:
+            open_library("damaged.bin")
+        except ValueError:
+            continue
+        failures.append(f"a file with a damaged {damage} was accepted")
+
+
+def check_changes(library, games, failures):
+    """with_changes must match applying the same changes to a list"""
+    upserts = [
+        dict(games[1], name="Renamed \u00e9\u00e8 \U0001f3ae"),
+        dict(games[2], playtime_forever=999_999),
+        {"appid": 7_777_777, "name": "New Game", "playtime_forever": 5},
+    ]
+    removed = {games[0]["appid"], games[-1]["appid"]}
+
+    expected = [Game.from_dict(g) for g in games if g["appid"] not in removed]
+    position = {game.appid: i for i, game in enumerate(expected)}
+    for game in upserts:
+        if game["appid"] in position:
+            expected[position[game["appid"]]] = Game.from_dict(game)
+        else:
+            expected.append(Game.from_dict(game))
+
+    patched = library.with_changes(upserts, removed, "later")
+    if list(patched) != expected:
+        failures.append("with_changes doesn't match the same changes on a list")
+
+    # and the patched names must survive being written out again
+    write_library("patched.bin", patched, "later")
+    if list(open_library("patched.bin")) != expected:
+        failures.append("a changed library doesn't read back as written")
+
+
+def check_migration(games, failures):
+    """Switching backends converts games.bin and games.json both ways"""
+    cache.set_backend("binary")
+    cache.save_cache(games)
+    changed = [dict(game) for game in games[:-1]]
+    changed[0]["playtime_forever"] += 60
+    cache.sync_cache(changed)
+    expected = [Game.from_dict(game) for game in changed]
+
+    for backend in ("json", "binary"):
+        cache.set_backend(backend)
+        if backend == "binary":
+            # a newer games.json is imported on the way back
+            os.utime(cache.CACHE_FILE)
+            os.utime(cache.LIBRARY_FILE, (0, 0))
+        loaded = cache.load_cache()
+        if loaded is None or list(loaded["games"]) != expected:
+            failures.append(f"switching to the {backend} backend lost the library")
+            return
+
+
+def check():
+    """Return the failures of the games.bin format and migration checks"""
+    failures = []
+    games = make_games(1_000)
+    games[3]["name"] = ""
+    games[4]["name"] = "Caf\u00e9 \u6e38\u620f \U0001f3b2"
+    games[5].update(appid=2**63 - 1, playtime_forever=2**40)
+    del games[6]["rtime_last_played"]
+
+    with scratch_dir():
+        check_round_trip("empty.bin", [], failures)
+        library = check_round_trip("check.bin", games, failures)
+        check_damaged(failures)
+        check_changes(library, games, failures)
+        check_migration(games, failures)
+
+    return failures
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    failures = check()
+    if failures:
+        print("games.bin checks failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print(f"{'games':>8} {'backend':>8} {'load (ms)':>10} {'--under 1 (ms)':>15}")
+    with scratch_dir():
+        for size in sizes:
+            games = make_games(size)
+            for backend in cache.BACKENDS:
+                cache.set_backend(backend)
+                cache.save_cache(games)
+
+                load = best_of(cache.load_cache)
+                under = best_of(lambda: under_one_hour(cache))
+                print(
+                    f"{size:>8} {backend:>8} {load * 1000:>10.2f} {under * 1000:>15.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
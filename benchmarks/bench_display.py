@@ -0,0 +1,75 @@
+"""Time to first row: rendering the whole table versus one page"""
+
+import sys
+import time
+from contextlib import redirect_stdout
+
+from backlog import cache
+from backlog.display import display_games, display_page
+from backlog.utils import merge_games
+from benchmarks.common import make_games, scratch_dir
+
+SIZES = [1_000, 10_000, 100_000]
+PAGE_SIZE = 50
+
+
+class FirstWrite:
+    """Discarding stdout that remembers when the first output arrived"""
+
+    def __init__(self):
+        self.first = None
+
+    def write(self, text):
+        if self.first is None and text:
+            self.first = time.perf_counter()
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def time_to_first_row(render):
+    """Seconds from starting render until it first writes anything"""
+    out = FirstWrite()
+    start = time.perf_counter()
+    with redirect_stdout(out):
+        render()
+    done = time.perf_counter()
+    # a render that wrote nothing reports its first row at the end
+    first = done if out.first is None else out.first
+    return first - start, done - start
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>8} {'full: first row (s)':>20} {'full: done (s)':>15} "
+        f"{'page: first row (ms)':>21}"
+    )
+    with scratch_dir():
+        for size in sizes:
+            cache.save_cache(make_games(size))
+            data = cache.load_cache()
+            if data is None:
+                sys.exit("cache did not load back after save_cache")
+            games = merge_games(data["games"], [])
+
+            full_first, full_done = time_to_first_row(lambda: display_games(games))
+            page_first, _ = time_to_first_row(
+                lambda: display_page(
+                    lambda start, stop: games[start:stop], len(games), 1, PAGE_SIZE
+                )
+            )
+
+            print(
+                f"{size:>8} {full_first:>20.2f} {full_done:>15.2f} "
+                f"{page_first * 1000:>21.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
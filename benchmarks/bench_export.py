@@ -0,0 +1,30 @@
+"""Export throughput: time per record should stay flat as the library grows"""
+
+import sys
+
+from backlog.export import export_csv, export_json, export_ndjson
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(f"{'games':>8} {'format':>7} {'total (s)':>10} {'us/game':>8}")
+    with scratch_dir():
+        for size in sizes:
+            games = make_games(size)
+            for name, func in (
+                ("csv", export_csv),
+                ("json", export_json),
+                ("ndjson", export_ndjson),
+            ):
+                elapsed = best_of(lambda: func(games, f"out.{name}"))
+                print(
+                    f"{size:>8} {name:>7} {elapsed:>10.3f} {elapsed / size * 1e6:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Name lookups: GameIndex versus scanning the library per lookup"""
+
+import random
+import sys
+
+from backlog.index import GameIndex
+from benchmarks.common import best_of, make_titles
+
+SIZES = [1_000, 10_000, 100_000]
+LOOKUPS = 50
+
+
+def scan_lookup(games, search_term):
+    """find_game_by_name as it was before GameIndex"""
+    search_lower = search_term.lower()
+
+    for game in games:
+        if game["name"].lower() == search_lower:
+            return game
+
+    matches = [g for g in games if search_lower in g["name"].lower()]
+    if len(matches) == 1:
+        return matches[0]
+    return matches or None
+
+
+def lookup_terms(titles, count, seed=0):
+    """Half exact titles, half partial names, like a --bulktag argument list"""
+    rng = random.Random(seed)
+    terms = []
+    for i in range(count):
+        title = rng.choice(titles)
+        terms.append(title if i % 2 else title.split()[-1] + " " + title[:3])
+    return terms
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>8} {'build (ms)':>11} {'scan x{0} (ms)':>15} "
+        f"{'index x{0} (ms)':>16} {'postings x{0} (ms)':>19} "
+        f"{'--search (ms)':>14} {'scan (ms)':>10}".format(LOOKUPS)
+    )
+    for size in sizes:
+        titles = make_titles(size)
+        games = [{"appid": i, "name": t} for i, t in enumerate(titles)]
+        terms = lookup_terms(titles, LOOKUPS)
+
+        build = best_of(lambda: GameIndex(games))
+        scan = best_of(lambda: [scan_lookup(games, t) for t in terms], repeat=1)
+
+        def indexed():
+            index = GameIndex(games)
+            return [index.find(t) for t in terms]
+
+        bulk = best_of(indexed)
+        search = best_of(lambda: GameIndex(games).search("ring"))
+        search_scan = best_of(lambda: [g for g in games if "ring" in g["name"].lower()])
+
+        def long_lived():
+            index = GameIndex(games)
+            index._build_postings()
+            return [index.find(t) for t in terms]
+
+        postings = best_of(long_lived)
+
+        print(
+            f"{size:>8} {build * 1000:>11.2f} {scan * 1000:>15.2f} "
+            f"{bulk * 1000:>16.2f} {postings * 1000:>19.2f} {search * 1000:>14.2f} {search_scan * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Multi-account sync: concurrent wall time versus fetching one by one"""
+
+import sys
+import time
+
+from backlog import api
+from backlog.cache import sync_cache, use_profile
+from backlog.sync import profile_directory, sync_profiles
+from benchmarks.common import make_games, scratch_dir
+from benchmarks.stub_steam import StubSteamServer
+
+PROFILES = 10
+LATENCY = 0.3
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else PROFILES
+    profiles = {f"user{i}": str(76561198000000000 + i) for i in range(count)}
+
+    with StubSteamServer(games=make_games(5_000), latency=LATENCY) as stub:
+        client = api.configure_client(api_url=stub.url, store_url=stub.url)
+
+        with scratch_dir():
+            start = time.perf_counter()
+            for name, steam_id in profiles.items():
+                use_profile(profile_directory(name))
+                sync_cache(client.get_owned_games("key", steam_id))
+            use_profile(None)
+            sequential = time.perf_counter() - start
+
+        with scratch_dir():
+            start = time.perf_counter()
+            sync_profiles("key", profiles, concurrency=count)
+            concurrent = time.perf_counter() - start
+
+    print(f"{count} profiles, {LATENCY * 1000:.0f} ms per GetOwnedGames")
+    print(f"  one by one   {sequential:6.2f} s")
+    print(f"  concurrent   {concurrent:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Sorted listings: sorting on every run versus the saved sort orders"""
+
+import sys
+
+from backlog.columnar import open_library, write_library
+from backlog.order import SortIndex, read_index, write_index
+from backlog.query import COLUMN, SORT_KEYS, Query
+from backlog.utils import hours_predicate
+from benchmarks.common import best_of, make_games, make_titles, scratch_dir
+
+SIZES = [10_000, 100_000]
+
+# (label, sortby, limit, playtime range in hours)
+CASES = [
+    ("--sortby name --limit 20", "name", 20, None),
+    ("--sortby playtime", "playtime", None, None),
+    ("--between 300 310", None, None, (300, 310, False)),
+]
+
+
+def scan(library, sortby, limit, hours):
+    query = Query(SORT_KEYS.get(sortby), limit)
+    if hours:
+        query.where(hours_predicate(*hours), COLUMN, "playtime_forever")
+    return query.run(query.merged(library, []))
+
+
+def indexed(library, sortby, limit, hours):
+    index = read_index("order.idx").bind(library, [])
+    query = Query(limit=limit)
+    if hours:
+        query.where(hours_predicate(*hours), COLUMN, "playtime_forever")
+    return query.run(query.indexed(index, index.positions(sortby, hours)))
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(f"{'games':>8} {'build (ms)':>11}")
+    with scratch_dir():
+        results = []
+        for size in sizes:
+            games = make_games(size)
+            for game, title in zip(games, make_titles(size)):
+                game["name"] = title
+            write_library("games.bin", games, "")
+            library = open_library("games.bin")
+
+            build = best_of(lambda: SortIndex.build(library, [], ""))
+            write_index("order.idx", SortIndex.build(library, [], ""))
+            print(f"{size:>8} {build * 1000:>11.2f}")
+
+            for label, *case in CASES:
+                assert indexed(library, *case) == scan(library, *case)
+                before = best_of(lambda: scan(library, *case))
+                after = best_of(lambda: indexed(library, *case))
+                results.append((size, label, before, after))
+
+        print(f"\n{'games':>8} {'case':<26} {'scan (ms)':>10} {'index (ms)':>11}")
+        for size, label, before, after in results:
+            print(f"{size:>8} {label:<26} {before * 1000:>10.2f} {after * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Listing throughput: the rich table versus the plain, TSV and JSON lines formats
+
+Writes a whole merged library (Steam games, manual games, tags and
+statuses) to /dev/null the way a piped listing does, once through
+display_games and once per --format, and reports rows per second.
+"""
+
+import os
+import sys
+from contextlib import redirect_stdout
+
+from backlog import cache
+from backlog.display import FORMATS, display_games, write_games
+from backlog.utils import merge_games
+from benchmarks.common import best_of, make_library, scratch_dir, write_library
+
+SIZES = [10_000, 100_000]
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(f"{'games':>8} {'format':>8} {'time (s)':>9} {'rows/s':>10} {'vs table':>9}")
+    with scratch_dir(), open(os.devnull, "w", encoding="utf-8") as sink:
+        for size in sizes:
+            write_library(make_library(size))
+            games = merge_games(cache.load_cache()["games"], cache.load_manual_games())
+            rows = len(games)
+
+            with redirect_stdout(sink):
+                # the table takes a minute at 100k games, so it runs once
+                table = best_of(lambda: display_games(games), 1)
+                times = {
+                    fmt: best_of(lambda fmt=fmt: write_games(games, fmt))
+                    for fmt in FORMATS
+                }
+
+            print(f"{size:>8} {'table':>8} {table:>9.2f} {rows / table:>10.0f}")
+            for fmt, seconds in times.items():
+                print(
+                    f"{size:>8} {fmt:>8} {seconds:>9.2f} {rows / seconds:>10.0f} "
+                    f"{table / seconds:>8.0f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
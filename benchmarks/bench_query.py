@@ -0,0 +1,77 @@
+"""Filter, sort and limit: chained list passes versus one Query pipeline"""
+
+import sys
+
+from backlog.columnar import open_library, write_library
+from backlog.query import CLASSIFY, COLUMN, SORT_KEYS, TEXT, Query
+from backlog.utils import (
+    classify_library,
+    filter_games,
+    hours_predicate,
+    merge_games,
+    status_predicate,
+)
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [10_000, 100_000]
+
+# (label, search, status, playtime range in hours, sortby, limit)
+CASES = [
+    ("top 20 by playtime", None, None, None, "playtime", 20),
+    ("search + status", "game 1", "inactive", None, None, None),
+    ("hours + status + sort", None, "dropped", (1, 100), "name", 50),
+]
+
+
+def chained(library, search, status, hours, sortby, limit, manual_status):
+    """The previous approach: a full list per filter, then a full sort"""
+    games = library
+    if hours:
+        games = filter_games(games, "playtime_forever", hours_predicate(*hours))
+    games = merge_games(games, [])
+    if search:
+        games = [g for g in games if search in g["name"].lower()]
+    if status:
+        statuses = classify_library(games, manual_status)
+        games = [g for g, s in zip(games, statuses) if s == status]
+    if sortby:
+        games = sorted(games, key=SORT_KEYS[sortby])
+    return games[:limit] if limit else games
+
+
+def pipeline(library, search, status, hours, sortby, limit, manual_status):
+    query = Query(SORT_KEYS.get(sortby), limit)
+    if hours:
+        query.where(hours_predicate(*hours), COLUMN, "playtime_forever")
+    if search:
+        query.where(lambda name: search in name.lower(), TEXT, "name")
+    if status:
+        query.where(status_predicate(status, manual_status), CLASSIFY)
+    return query.run(query.merged(library, []))
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(f"{'games':>8} {'case':<22} {'chained (ms)':>13} {'query (ms)':>11}")
+    with scratch_dir():
+        for size in sizes:
+            games = make_games(size)
+            manual_status = {str(g["appid"]): "completed" for g in games[::50]}
+            write_library("games.bin", games, "")
+            library = open_library("games.bin")
+
+            for label, *case in CASES:
+                expected = chained(library, *case, manual_status)
+                assert pipeline(library, *case, manual_status) == expected
+
+                before = best_of(lambda: chained(library, *case, manual_status))
+                after = best_of(lambda: pipeline(library, *case, manual_status))
+                print(
+                    f"{size:>8} {label:<22} {before * 1000:>13.2f} "
+                    f"{after * 1000:>11.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Memory held by a loaded, merged library, per storage backend
+
+Loads the cache the way a listing does (load_cache, then merge_games)
+and reports the memory the merged library keeps alive, traced with
+tracemalloc. A binary cache stays memory-mapped, so its games only cost
+memory once something materializes them.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from backlog import cache
+from backlog.utils import merge_games
+from benchmarks.common import make_library, scratch_dir, write_library
+
+SIZES = [10_000, 100_000]
+
+
+def held_bytes():
+    """Bytes still allocated once the current cache is loaded and merged"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        games = merge_games(cache.load_cache()["games"], cache.load_manual_games())
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del games
+    return held
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(f"{'games':>8} {'backend':>8} {'held (MiB)':>11} {'bytes/game':>11}")
+    with scratch_dir():
+        for size in sizes:
+            library = make_library(size)
+            for backend in cache.BACKENDS:
+                cache.set_backend(backend)
+                write_library(library)
+                held = held_bytes()
+                print(
+                    f"{size:>8} {backend:>8} {held / 2**20:>11.1f} "
+                    f"{held / size:>11.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Fuzzy search: index build, load from disk and ranked query latency"""
+
+import os
+import sys
+
+from backlog.search import SearchIndex, read_index, write_index
+from benchmarks.common import best_of, make_titles, scratch_dir
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = ["witcher 3", "dark soul", "elden rng", "space", "neon kingdom tactics"]
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>8} {'build (ms)':>11} {'size (KiB)':>11} "
+        f"{'load (ms)':>10} {'query p50 (ms)':>15} {'query max (ms)':>15}"
+    )
+    with scratch_dir():
+        for size in sizes:
+            titles = make_titles(size)
+            titles[size // 2] = "The Witcher® 3: Wild Hunt"
+
+            build = best_of(lambda: SearchIndex.build(titles), repeat=1)
+            write_index("search.idx", SearchIndex.build(titles))
+            load = best_of(lambda: read_index("search.idx"))
+
+            index = read_index("search.idx")
+            times = sorted(best_of(lambda: index.search(q, limit=20)) for q in QUERIES)
+
+            print(
+                f"{size:>8} {build * 1000:>11.1f} "
+                f"{os.path.getsize('search.idx') / 1024:>11.0f} "
+                f"{load * 1000:>10.2f} {times[len(times) // 2] * 1000:>15.2f} "
+                f"{times[-1] * 1000:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-command latency: a fresh process per command versus the --serve daemon
+
+"process" runs main.py the usual way. "client" is the same command
+forwarded to a running daemon, still paying for the interpreter to
+start, and "round trip" is the forward alone, the latency a script
+reusing one interpreter sees.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from backlog.cache import save_cache
+from backlog.client import forward
+from benchmarks.common import make_games, make_titles, scratch_dir
+
+SIZE = 10_000
+RUNS = 5
+MAIN = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py"
+)
+
+COMMANDS = [
+    ["--stats"],
+    ["--sortby", "playtime", "--limit", "10"],
+    ["--search", "dark", "--limit", "10"],
+    ["--filterstatus", "backlog", "--limit", "10"],
+]
+
+
+def median_ms(func, runs=RUNS):
+    """Median wall time of func over runs, in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+
+    with scratch_dir(), open(os.devnull, "w") as devnull:
+        with open("config.json", "w") as f:
+            json.dump({"API_KEY": "key", "STEAM_ID": "1", "SERVE_SYNC_INTERVAL": 0}, f)
+        games = make_games(size)
+        for game, title in zip(games, make_titles(size)):
+            game["name"] = title
+        save_cache(games)
+
+        def process(argv):
+            subprocess.run([sys.executable, MAIN, *argv], stdout=devnull, check=True)
+
+        # warm the saved summaries and indexes before anything is timed
+        for argv in COMMANDS:
+            process(argv)
+        cold = {tuple(argv): median_ms(lambda: process(argv)) for argv in COMMANDS}
+
+        daemon = subprocess.Popen([sys.executable, MAIN, "--serve"], stdout=devnull)
+        while not os.path.exists("cache/backlog.sock"):
+            time.sleep(0.05)
+
+        saved = os.dup(1)
+        try:
+            print(f"{size} games")
+            print(
+                f"{'command':>38} {'process (ms)':>13} {'client (ms)':>12} "
+                f"{'round trip (ms)':>16}"
+            )
+            for argv in COMMANDS:
+                client = median_ms(lambda: process(argv))
+                os.dup2(devnull.fileno(), 1)
+                try:
+                    trip = median_ms(lambda: forward(argv))
+                finally:
+                    os.dup2(saved, 1)
+                print(
+                    f"{' '.join(argv):>38} {cold[tuple(argv)]:>13.1f} "
+                    f"{client:>12.1f} {trip:>16.1f}"
+                )
+        finally:
+            os.close(saved)
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""CLI startup: import time of backlog.cli against a budget
+
+Runs `python -X importtime -c "import backlog.cli"` a few times and
+reports the median cumulative import time and the slowest modules. It
+exits with status 1 if the median is over budget or a module that only
+some commands need (requests, asyncio, csv, rich, ...) is imported up front.
+
+    python -m benchmarks.bench_startup [budget ms]
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+RUNS = 7
+BUDGET_MS = 120
+
+# loaded on the code paths that use them, never by importing the CLI
+LAZY_MODULES = (
+    "requests",
+    "urllib3",
+    "asyncio",
+    "concurrent.futures",
+    "csv",
+    "rich",
+    "sqlite3",
+    "mmap",
+    "hashlib",
+    "unicodedata",
+    "backlog.export",
+    "backlog.server",
+    "backlog.sync",
+)
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    """Import backlog.cli in a fresh interpreter and time every module
+
+    Returns {module: (self microseconds, cumulative microseconds)}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backlog.cli"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+
+    runs = [import_times() for _ in range(RUNS)]
+    totals = sorted(run["backlog.cli"][1] / 1000 for run in runs)
+    median = totals[len(totals) // 2]
+    times = runs[-1]
+
+    print(f"import backlog.cli: {median:.1f} ms median of {RUNS} (budget {budget} ms)")
+    print(f"\n{'module':>32} {'self (ms)':>10} {'total (ms)':>11}")
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)
+    for module, (own, total) in slowest[:10]:
+        print(f"{module:>32} {own / 1000:>10.1f} {total / 1000:>11.1f}")
+
+    eager = [m for m in LAZY_MODULES if m in times]
+    if eager:
+        print(f"\nImported up front, should be lazy: {', '.join(eager)}")
+    if median > budget:
+        print(f"\nOver budget by {median - budget:.1f} ms")
+    if eager or median > budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""--stats computation: the old multi-pass walk, LibraryStats and the snapshot"""
+
+import json
+import sys
+import tracemalloc
+
+from backlog.columnar import open_library, write_library
+from backlog.stats import LibraryStats, library_stats
+from backlog.utils import classify_library
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+BRACKETS = [
+    lambda h: h == 0,
+    lambda h: 0 < h < 1,
+    lambda h: 1 <= h < 10,
+    lambda h: 10 <= h < 50,
+    lambda h: 50 <= h < 100,
+    lambda h: h >= 100,
+]
+
+
+def multi_pass(library):
+    """What display_stats computed before, one walk per figure"""
+    columns = {c: library.column(c).tolist() for c in ("appid", "playtime_forever")}
+    playtimes = columns["playtime_forever"]
+    played = [i for i, minutes in enumerate(playtimes) if minutes > 0]
+    return (
+        sum(playtimes),
+        playtimes.count(0),
+        sum(playtimes[i] for i in played) / len(played),
+        max(range(len(playtimes)), key=playtimes.__getitem__),
+        min(played, key=playtimes.__getitem__),
+        [len([m for m in playtimes if c(m / 60)]) for c in BRACKETS],
+        classify_library(library),
+    )
+
+
+def peak_memory(func):
+    """Peak traced allocation while func runs, in MiB"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>9} {'multi-pass (ms)':>16} {'single pass (ms)':>17} "
+        f"{'snapshot (ms)':>14} {'peak MiB old/new':>17} {'worst pct error':>16}"
+    )
+    with scratch_dir():
+        for size in sizes:
+            write_library("games.bin", make_games(size), "")
+            library = open_library("games.bin")
+
+            old = best_of(lambda: multi_pass(library), repeat=1)
+            new = best_of(lambda: library_stats([library]), repeat=1)
+            saved = json.dumps(library_stats([library]).to_dict())
+            snapshot = best_of(
+                lambda: LibraryStats.from_dict(json.loads(saved)).is_current()
+            )
+            old_peak = peak_memory(lambda: multi_pass(library))
+            new_peak = peak_memory(lambda: library_stats([library]))
+
+            stats = library_stats([library])
+            played = sorted(m for m in library.column("playtime_forever") if m)
+            error = max(
+                abs(stats.percentile(q) - played[round(q * (len(played) - 1))])
+                / played[round(q * (len(played) - 1))]
+                for q in (0.5, 0.9, 0.99)
+            )
+
+            print(
+                f"{size:>9} {old * 1000:>16.1f} {new * 1000:>17.1f} "
+                f"{snapshot * 1000:>14.3f} "
+                f"{old_peak:>8.1f}/{new_peak:<8.2f} {error * 100:>15.2f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
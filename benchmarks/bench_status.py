@@ -0,0 +1,48 @@
+"""Status classification: one call per game versus classify_library"""
+
+import sys
+
+from backlog.columnar import open_library, write_library
+from backlog.utils import classify_library, get_game_status
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def manual_overrides(games, every=50):
+    """Mark every nth game completed, the way --setstatus stores it"""
+    return {str(g["appid"]): "completed" for g in games[::every]}
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>8} {'per game (ms)':>14} {'batch dicts (ms)':>17} "
+        f"{'batch columns (ms)':>19}"
+    )
+    with scratch_dir():
+        for size in sizes:
+            games = make_games(size)
+            manual_status = manual_overrides(games)
+            write_library("games.bin", games, "")
+            library = open_library("games.bin")
+
+            expected = [get_game_status(g, manual_status) for g in games]
+            assert classify_library(games, manual_status) == expected
+            assert classify_library(library, manual_status) == expected
+
+            per_game = best_of(
+                lambda: [get_game_status(g, manual_status) for g in games]
+            )
+            dicts = best_of(lambda: classify_library(games, manual_status))
+            columns = best_of(lambda: classify_library(library, manual_status))
+
+            print(
+                f"{size:>8} {per_game * 1000:>14.2f} {dicts * 1000:>17.2f} "
+                f"{columns * 1000:>19.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""End-to-end suite: every stage of a command, timed and memory-profiled
+
+Builds a seeded synthetic library (Steam games, manual games, tags and
+statuses) at each size, then times the stages a command goes through one
+function at a time (load_cache, merge_games, the filter chain,
+display_games, display_stats, export_csv, export_json) and a few whole
+cli.main runs. Each stage reports its best wall time and its peak traced
+allocation.
+
+    python -m benchmarks.bench_suite [sizes ...] [--backend NAME] [--seed N]
+    python -m benchmarks.bench_suite --save-baseline
+    python -m benchmarks.bench_suite --compare [--threshold 1.5]
+
+--save-baseline stores the results in benchmarks/baseline.json (or the
+given path) and --compare checks a run against it, exiting with status 1
+if any stage got slower or bigger by more than the threshold. Baselines
+only mean something on the machine that recorded them.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+
+from backlog import cache
+from backlog import cli
+from backlog.display import display_games, display_stats
+from backlog.export import export_csv, export_json
+from backlog.stats import library_stats
+from backlog.utils import dropped_cutoff, merge_games
+from benchmarks.common import best_of, make_library, scratch_dir, write_library
+
+SIZES = [1_000, 10_000, 100_000]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# wall times on a busy machine move by a third or more between identical runs
+THRESHOLD = 1.5
+
+# stage timings under this are mostly noise, so they never count as regressions
+MIN_SECONDS = 0.05
+
+# stages slower than this are timed once rather than best of REPEAT
+SLOW_SECONDS = 1.0
+REPEAT = 5
+
+# whole commands, run through cli.main against the generated cache
+COMMANDS = {
+    "main: list": [],
+    "main: --under 10 --sortby playtime": ["--under", "10", "--sortby", "playtime"],
+    "main: --filter-tag": ["--filter-tag", "rpg & !finished"],
+    "main: --stats": ["--stats"],
+    "main: --export csv": ["--export", "csv"],
+}
+
+
+class Discard:
+    """stdout that throws the rendered tables away"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def run_main(argv):
+    """Run cli.main with argv as the command line"""
+    saved = sys.argv
+    sys.argv = ["main.py", *argv]
+    try:
+        cli.main()
+    finally:
+        sys.argv = saved
+
+
+def stages(library):
+    """Return (name, function) for every stage, in the order a command runs"""
+    args = cli.build_parser().parse_args(["--under", "10", "--sortby", "playtime"])
+    loaded = {}
+
+    def load():
+        loaded["games"] = cache.load_cache()["games"]
+
+    def merge():
+        loaded["merged"] = merge_games(loaded["games"], library["manual_games"])
+
+    def stats():
+        return library_stats(
+            [loaded["games"], library["manual_games"]],
+            library["status"],
+            dropped_cutoff(),
+        )
+
+    yield "load_cache", load
+    yield "merge_games", merge
+    yield "filter chain", lambda: cli.select_games(
+        args, loaded["games"], library["manual_games"]
+    )
+    yield "display_games", lambda: display_games(loaded["merged"])
+    yield "display_stats", lambda: display_stats(stats())
+    yield "export_csv", lambda: export_csv(loaded["merged"], "out.csv")
+    yield "export_json", lambda: export_json(loaded["merged"], "out.json")
+    for name, argv in COMMANDS.items():
+        yield name, lambda argv=argv: run_main(argv)
+
+
+def timed(func):
+    """Best wall time of func, running slow stages only once
+
+    Like timeit, the collector is off while timing so a collection that
+    happens to land in one stage doesn't make it look slower.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        first = best_of(func, 1)
+        if first > SLOW_SECONDS:
+            return first
+        return min(first, best_of(func, REPEAT - 1))
+    finally:
+        gc.enable()
+
+
+def peak_bytes(func):
+    """Peak memory traced while func runs, above what was allocated before"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(size, backend, seed):
+    """Time and trace every stage against a fresh library of size games"""
+    results = {}
+
+    with scratch_dir():
+        with open("config.json", "w") as f:
+            json.dump({"API_KEY": "k", "STEAM_ID": "1", "CACHE_BACKEND": backend}, f)
+        cache.use_profile(None)
+        cache.set_backend(backend)
+        library = make_library(size, seed)
+        write_library(library)
+
+        with redirect_stdout(Discard()):
+            for name, func in stages(library):
+                # traced first, which also warms caches for the timed runs
+                peak = peak_bytes(func)
+                seconds = timed(func)
+                results[name] = {"seconds": seconds, "peak_bytes": peak}
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print every stage against the baseline and return the regressions"""
+    regressions = []
+
+    print(f"\n{'games':>8} {'stage':>36} {'time':>8} {'memory':>8}")
+    for size, stages_now in results.items():
+        stages_then = baseline.get("results", {}).get(size)
+        if stages_then is None:
+            print(f"{size:>8} {'(not in baseline)':>36}")
+            continue
+
+        for name, now in stages_now.items():
+            then = stages_then.get(name)
+            if then is None:
+                continue
+            time_ratio = now["seconds"] / max(then["seconds"], 1e-9)
+            memory_ratio = now["peak_bytes"] / max(then["peak_bytes"], 1)
+            slower = time_ratio > threshold and now["seconds"] > MIN_SECONDS
+            bigger = memory_ratio > threshold
+
+            flag = " <- regression" if slower or bigger else ""
+            print(
+                f"{size:>8} {name:>36} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{flag}"
+            )
+            if slower or bigger:
+                regressions.append((size, name))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--backend", choices=cache.BACKENDS, default="binary")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_FILE)
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    options = parser.parse_args()
+
+    results = {}
+    print(f"{'games':>8} {'stage':>36} {'best (ms)':>10} {'peak (MiB)':>11}")
+    for size in options.sizes:
+        results[str(size)] = measure(size, options.backend, options.seed)
+        for name, result in results[str(size)].items():
+            print(
+                f"{size:>8} {name:>36} {result['seconds'] * 1000:>10.1f} "
+                f"{result['peak_bytes'] / 2**20:>11.1f}"
+            )
+
+    run = {
+        "backend": options.backend,
+        "seed": options.seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if options.save_baseline:
+        with open(options.save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved baseline to {options.save_baseline}")
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        if (baseline["backend"], baseline["seed"]) != (options.backend, options.seed):
+            print("\nBaseline was recorded with a different backend or seed")
+            sys.exit(1)
+
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print(
+                f"\n{len(regressions)} stage(s) regressed by over {options.threshold}x"
+            )
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Sync cost: full cache rewrite versus incremental delta sync"""
+
+import copy
+import os
+import random
+import sys
+
+from backlog import CACHE_DIR, cache
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZE = 100_000
+CHANGES = [10, 100, 1_000]
+
+
+def cache_bytes():
+    """Total size of the files in the cache directory"""
+    return sum(
+        os.path.getsize(os.path.join(CACHE_DIR, name)) for name in os.listdir(CACHE_DIR)
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    base = make_games(size)
+    rng = random.Random(0)
+
+    print(
+        f"{'backend':>8} {'changed':>8} {'full (ms)':>10} {'delta (ms)':>11} "
+        f"{'delta KiB':>10}"
+    )
+    for backend in cache.BACKENDS:
+        with scratch_dir():
+            cache.set_backend(backend)
+            cache.close_database()
+
+            for changes in CHANGES:
+                games = copy.deepcopy(base)
+                for game in rng.sample(games, changes):
+                    game["playtime_2weeks"] += 30
+                    game["playtime_forever"] += 30
+
+                cache.save_cache(base)
+                full = best_of(lambda: cache.save_cache(games), repeat=1)
+
+                cache.save_cache(base)
+                before = cache_bytes()
+                delta = best_of(lambda: cache.sync_cache(games), repeat=1)
+                written = max(cache_bytes() - before, 0)
+
+                print(
+                    f"{backend:>8} {changes:>8} {full * 1000:>10.1f} "
+                    f"{delta * 1000:>11.1f} {written / 1024:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""--filter-tag: list membership per game versus the inverted tag index
+
+Before timing, every expression in EXPRESSIONS is checked against a
+brute-force scan of each game's tags, before and after untagging, and
+every entry of MALFORMED must be rejected. The script exits with status
+1 if any check fails, so the grammar and the index can't drift apart.
+"""
+
+import random
+import sys
+
+from backlog.columnar import open_library, write_library
+from backlog.tags import TagIndex
+from benchmarks.common import best_of, make_games, scratch_dir
+
+SIZES = [10_000, 100_000]
+TAGS = ["rpg", "finished", "souls", "coop", "indie", "roguelike", "open world"]
+
+# each expression with what it must mean for one game's set of tags
+EXPRESSIONS = {
+    "rpg": lambda t: "rpg" in t,
+    "!rpg": lambda t: "rpg" not in t,
+    "!!rpg": lambda t: "rpg" in t,
+    "rpg & !finished": lambda t: "rpg" in t and "finished" not in t,
+    "!rpg | souls": lambda t: "rpg" not in t or "souls" in t,
+    "rpg | souls & coop": lambda t: "rpg" in t or ("souls" in t and "coop" in t),
+    "(rpg | souls) & coop": lambda t: ("rpg" in t or "souls" in t) and "coop" in t,
+    "!(rpg | souls)": lambda t: "rpg" not in t and "souls" not in t,
+    "!(rpg & souls)": lambda t: not ("rpg" in t and "souls" in t),
+    "!rpg & !souls | indie": lambda t: ("rpg" not in t and "souls" not in t)
+    or "indie" in t,
+    "((indie))": lambda t: "indie" in t,
+    " open world & !roguelike ": lambda t: "open world" in t and "roguelike" not in t,
+    "rpg | nosuchtag": lambda t: "rpg" in t,
+    "!nosuchtag & coop": lambda t: "coop" in t,
+    "rpg & souls & coop | !indie & finished": lambda t: (
+        "rpg" in t and "souls" in t and "coop" in t
+    )
+    or ("indie" not in t and "finished" in t),
+}
+
+MALFORMED = ["", "  ", "&", "rpg &", "| rpg", "rpg !", "(rpg", "rpg)", "()", "!"]
+
+
+def make_tags(games, seed=0):
+    """Tag a third of the library with one to three tags"""
+    rng = random.Random(seed)
+    return {
+        str(g["appid"]): rng.sample(TAGS, rng.randint(1, 3))
+        for g in games
+        if rng.random() < 0.33
+    }
+
+
+def check(appids, tags):
+    """Return the failures of EXPRESSIONS and MALFORMED against brute force"""
+    failures = []
+    index = TagIndex(tags)
+
+    for stage in ("tagged", "untagged"):
+        for expression, meaning in EXPRESSIONS.items():
+            try:
+                matches = index.matcher(expression)
+            except ValueError as e:
+                failures.append(f"{expression!r} was rejected: {e}")
+                continue
+            got = [a for a in appids if matches(a)]
+            expected = [a for a in appids if meaning(set(tags.get(str(a), ())))]
+            if got != expected:
+                failures.append(
+                    f"{expression!r} ({stage}): {len(got)} games, "
+                    f"expected {len(expected)}"
+                )
+
+        # untag half the rpg games and every souls game, then check again
+        for appid in index.games_with("rpg")[::2]:
+            index.remove(appid, "rpg")
+        for appid in index.games_with("souls"):
+            index.remove(appid, "souls")
+        tags = index.to_dict()
+
+    for expression in MALFORMED:
+        try:
+            index.matcher(expression)
+        except ValueError:
+            continue
+        failures.append(f"{expression!r} was accepted")
+
+    return failures
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+
+    print(
+        f"{'games':>8} {'per game (ms)':>14} {'build (ms)':>11} "
+        f"{'rpg (ms)':>9} {'rpg & !finished (ms)':>21}"
+    )
+    with scratch_dir():
+        for size in sizes:
+            games = make_games(size)
+            tags = make_tags(games)
+            write_library("games.bin", games, "")
+            appids = open_library("games.bin").column("appid")
+
+            def per_game():
+                return [a for a in appids if "rpg" in tags.get(str(a), [])]
+
+            index = TagIndex(tags)
+
+            def indexed(expression):
+                matches = index.matcher(expression)
+                return [a for a in appids if matches(a)]
+
+            failures = check(appids, tags)
+            if failures:
+                print("\nTag expressions that don't match a brute-force scan:")
+                for failure in failures:
+                    print(f"  {failure}")
+                sys.exit(1)
+
+            before = best_of(per_game)
+            build = best_of(lambda: TagIndex(tags))
+            after = best_of(lambda: indexed("rpg"))
+            combined = best_of(lambda: indexed("rpg & !finished"))
+            print(
+                f"{size:>8} {before * 1000:>14.2f} {build * 1000:>11.2f} "
+                f"{after * 1000:>9.2f} {combined * 1000:>21.2f}"
+            )
+
+    print("\nEvery tag expression matches a brute-force scan")
+
+
+if __name__ == "__main__":
+    main()
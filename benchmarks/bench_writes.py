@@ -0,0 +1,152 @@
+"""Concurrent cache writers: lost updates and torn reads with and without locking
+
+Several processes tag games, set statuses and add manual games at once
+while another keeps parsing the cache files. The unlocked run does the
+same load, change and save without the cache lock, the way every edit
+worked before it. Every update is to its own key, so any missing one was
+lost to another writer's stale save.
+
+The script exits with status 1 if a locked run loses an update or a
+reader ever sees a half-written file, so it doubles as a check on the
+cache lock and atomic writes.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from backlog import cache
+from benchmarks.common import scratch_dir
+
+WORKERS = 4
+UPDATES = 100
+
+
+def naive_update(load, save, change):
+    """Read, change and write a cache file with no lock, as edits used to"""
+    data = load()
+    change(data)
+    save(data)
+
+
+def writer(path, backend, worker, updates, locked):
+    """Tag, set the status of and add one new game per update"""
+    os.chdir(path)
+    cache.set_backend(backend)
+
+    for i in range(updates):
+        appid = f"{worker}{i:06d}"
+        game = {"appid": int(appid), "name": f"Game {appid}", "playtime_forever": 0}
+
+        if locked:
+            cache.add_tag(appid, "stress")
+            cache.set_status(appid, "completed")
+            cache.update_manual_games(lambda games: games.append(game))
+        else:
+            naive_update(
+                cache.load_tags,
+                cache.save_tags,
+                lambda tags: tags.setdefault(appid, []).append("stress"),
+            )
+            naive_update(
+                cache.load_status,
+                cache.save_status,
+                lambda status: status.__setitem__(appid, "completed"),
+            )
+            naive_update(
+                cache.load_manual_games,
+                cache.save_manual_games,
+                lambda games: games.append(game),
+            )
+
+
+def reader(path, done, results):
+    """Parse the JSON cache files until the writers finish"""
+    os.chdir(path)
+    reads = torn = 0
+    names = (cache.TAGS_FILE, cache.STATUS_FILE, cache.MANUAL_GAMES_FILE)
+
+    while not done.is_set():
+        for name in names:
+            try:
+                with open(name, encoding="utf-8") as f:
+                    json.load(f)
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                torn += 1
+            reads += 1
+
+    results.put((reads, torn))
+
+
+def run(backend, workers, updates, locked):
+    """Run the writers once, returning (seconds, lost updates, reads, torn)"""
+    context = multiprocessing.get_context("spawn")
+
+    with scratch_dir() as path:
+        cache.set_backend(backend)
+        cache.ensure_cache()
+        done = context.Event()
+        results = context.Queue()
+        watcher = context.Process(target=reader, args=(path, done, results))
+        watcher.start()
+
+        start = time.perf_counter()
+        processes = [
+            context.Process(target=writer, args=(path, backend, w, updates, locked))
+            for w in range(1, workers + 1)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        reads, torn = results.get()
+        watcher.join()
+
+        expected = workers * updates
+        kept = (
+            len(cache.load_tags())
+            + len(cache.load_status())
+            + len(cache.load_manual_games())
+        )
+        return elapsed, 3 * expected - kept, reads, torn
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else UPDATES
+
+    print(f"{workers} writers x {updates} tag, status and manual game updates")
+    print(
+        f"{'backend':>8} {'mode':>9} {'seconds':>8} {'updates/s':>10} "
+        f"{'lost':>6} {'reads':>7} {'torn':>5}"
+    )
+    runs = (("binary", False), ("binary", True), ("sqlite", True))
+    failures = []
+    for backend, locked in runs:
+        elapsed, lost, reads, torn = run(backend, workers, updates, locked)
+        label = "locked" if locked else "unlocked"
+        print(
+            f"{backend:>8} {label:>9} {elapsed:>8.2f} "
+            f"{3 * workers * updates / elapsed:>10.0f} {lost:>6} {reads:>7} {torn:>5}"
+        )
+        # saves are atomic either way, only the unlocked run may lose updates
+        if torn or (locked and lost):
+            failures.append(f"{backend} {label}")
+
+    cache.set_backend("binary")
+
+    if failures:
+        print(f"\nLost updates or torn reads: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nNo lost updates or torn reads with the lock")
+
+
+if __name__ == "__main__":
+    main()
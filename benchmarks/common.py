@@ -0,0 +1,153 @@
+"""Shared helpers for the benchmark scripts"""
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+from backlog import cache
+
+
+def make_games(count, seed=0):
+    """Build a synthetic Steam library with GetOwnedGames-shaped entries"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    games = []
+
+    for i in range(count):
+        played = rng.random() < 0.6
+        playtime = rng.randint(1, 20000) if played else 0
+        recent = rng.randint(1, 600) if played and rng.random() < 0.05 else 0
+        last_played = now - rng.randint(0, 4 * 365 * 86400) if played else 0
+
+        games.append(
+            {
+                "appid": 10 + i * 10,
+                "name": f"Synthetic Game {i}",
+                "playtime_forever": playtime,
+                "playtime_2weeks": recent,
+                "rtime_last_played": last_played,
+                "img_icon_url": "0" * 40,
+                "has_community_visible_stats": True,
+                "source": "Steam",
+            }
+        )
+
+    return games
+
+
+TITLE_WORDS = (
+    "dark souls elden ring hollow knight star legends dragon age tales city "
+    "empire war craft space quest last night island frontier shadow forest "
+    "blood iron light kingdom galaxy dungeon racing simulator tactics zero "
+    "heroes chronicles origins rising fallen ancient neon wild station"
+).split()
+
+
+def make_titles(count, seed=0):
+    """Build varied game titles of two to four words, numbered when repeated"""
+    rng = random.Random(seed)
+    seen = {}
+    titles = []
+
+    for _ in range(count):
+        title = " ".join(w.title() for w in rng.sample(TITLE_WORDS, rng.randint(2, 4)))
+        seen[title] = seen.get(title, 0) + 1
+        if seen[title] > 1:
+            title = f"{title} {seen[title]}"
+        titles.append(title)
+
+    return titles
+
+
+TAG_NAMES = (
+    "rpg souls roguelike coop indie strategy horror finished wishlist "
+    "multiplayer short long-haul retro puzzle platformer"
+).split()
+
+PLATFORMS = ("Switch", "PS5", "PS4", "Xbox", "GOG", "Epic", "Steam")
+
+
+def make_library(count, seed=0):
+    """Build a whole synthetic library: Steam games plus the user's files
+
+    Returns {"games", "manual_games", "tags", "status"}, shaped like the
+    GetOwnedGames list, manual_games.json, tags.json and status.json.
+    Steam games get varied titles and the per-platform playtimes Steam
+    reports; about 2% extra games are manual, a fifth of all games are
+    tagged and 5% have a manual status. The same seed gives the same
+    library.
+    """
+    rng = random.Random(seed)
+    games = make_games(count, seed)
+    titles = make_titles(count + count // 50, seed)
+
+    for game, title in zip(games, titles):
+        game["name"] = title
+        minutes = game["playtime_forever"]
+        windows = rng.randint(0, minutes)
+        game["playtime_windows_forever"] = windows
+        game["playtime_linux_forever"] = minutes - windows
+        game["playtime_mac_forever"] = 0
+        game["playtime_deck_forever"] = 0
+        game["playtime_disconnected"] = 0
+
+    manual_games = []
+    for i, title in enumerate(titles[count:], 1):
+        manual_games.append(
+            {
+                "appid": f"manual_{i}",
+                "name": title,
+                "platform": rng.choice(PLATFORMS),
+                "playtime_forever": rng.choice((0, rng.randint(60, 6000))),
+                "rtime_last_played": 0,
+                "playtime_2weeks": 0,
+            }
+        )
+
+    tags = {}
+    status = {}
+    for game in games + manual_games:
+        appid = str(game["appid"])
+        if rng.random() < 0.2:
+            tags[appid] = rng.sample(TAG_NAMES, rng.randint(1, 3))
+        if rng.random() < 0.05:
+            status[appid] = rng.choice(("completed", "hold"))
+
+    return {
+        "games": games,
+        "manual_games": manual_games,
+        "tags": tags,
+        "status": status,
+    }
+
+
+def write_library(library):
+    """Save a make_library() library as the current cache"""
+    cache.save_cache(library["games"])
+    cache.save_manual_games(library["manual_games"])
+    cache.save_tags(library["tags"])
+    cache.save_status(library["status"])
+
+
+@contextmanager
+def scratch_dir():
+    """Run the block inside a temporary working directory"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+def best_of(func, repeat=3):
+    """Return the fastest wall time of several runs of func, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
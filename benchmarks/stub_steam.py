@@ -0,0 +1,103 @@
+"""Local stand-in for the Steam Web API and Store API, for offline benchmarks"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubSteamServer:
+    """Serve GetOwnedGames and appdetails from memory on a local port
+
+    fail_every makes every Nth request answer 503 and throttle_every makes
+    every Nth request answer 429, so retry behaviour can be exercised.
+    Use as a context manager; url is the base URL for SteamClient.
+    """
+
+    def __init__(self, games=(), latency=0.0, fail_every=0, throttle_every=0):
+        self.games = list(games)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # send each response in one segment so keep-alive isn't
+            # penalised by Nagle's algorithm and delayed ACKs
+            disable_nagle_algorithm = True
+            wbufsize = -1
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body=None, headers=None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                number = stub._count()
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if stub.fail_every and number % stub.fail_every == 0:
+                    return self.send_json(503, {})
+                if stub.throttle_every and number % stub.throttle_every == 0:
+                    return self.send_json(429, {}, {"Retry-After": "0"})
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                if url.path.startswith("/IPlayerService/GetOwnedGames"):
+                    body = {
+                        "response": {"game_count": len(stub.games), "games": stub.games}
+                    }
+                    etag = '"%s"' % hashlib.sha1(json.dumps(body).encode()).hexdigest()
+                    if self.headers.get("If-None-Match") == etag:
+                        return self.send_json(304, headers={"ETag": etag})
+                    return self.send_json(200, body, {"ETag": etag})
+
+                if url.path == "/api/appdetails":
+                    appid = query.get("appids", ["0"])[0]
+                    return self.send_json(
+                        200,
+                        {appid: {"success": True, "data": {"name": f"App {appid}"}}},
+                    )
+
+                self.send_json(404, {})
+
+        return Handler
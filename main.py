@@ -1,6 +1,15 @@
 """Steam Backlog Tracker - Track and manage your Steam game library"""
 
-from backlog.cli import main
+import sys
+
+from backlog.client import forward
 
 if __name__ == "__main__":
+    # a running --serve daemon answers without this process loading the CLI
+    status = forward(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+    from backlog.cli import main
+
     main()